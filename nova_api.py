@@ -0,0 +1,200 @@
+import os, time, random, threading
+from collections import deque
+from nova_trace import annotate
+
+# Google API 호출 제어 (Vision text_detection / 임베딩 / Gemini generate_content)
+# 프로세스 전역에서 모든 세션이 공유하며, API별로
+#   - 같은 요청이 이미 진행 중이면 새로 호출하지 않고 그 결과를 기다림 (single-flight)
+#   - token bucket으로 초당 호출 수 제한 (토큰이 없으면 대기열에서 기다림)
+#   - quota 초과(429 / RESOURCE_EXHAUSTED) 오류는 jitter를 준 지수 백오프로 재시도
+# 대기 시간 / 제한 횟수 / 재시도 횟수를 집계하여 실제 부하 기준으로 quota를 정할 수 있게 함
+
+# API별 호출 제한 (초당 요청 수, 순간 최대 요청 수), 초당 요청 수가 0이면 제한하지 않음
+API_LIMITS = {
+    'vision': (float(os.getenv('NOVA_VISION_RPS', 30)), int(os.getenv('NOVA_VISION_BURST', 30))),
+    'embedding': (float(os.getenv('NOVA_EMBEDDING_RPS', 25)), int(os.getenv('NOVA_EMBEDDING_BURST', 25))),
+    'gemini': (float(os.getenv('NOVA_GEMINI_RPS', 5)), int(os.getenv('NOVA_GEMINI_BURST', 10))),
+}
+API_MAX_RETRIES = int(os.getenv('NOVA_API_MAX_RETRIES', 4))  # quota 초과 시 재시도 횟수
+API_RETRY_BASE = 1.0  # 재시도 대기 시간(초), 재시도마다 2배 (0 ~ 대기 시간 사이에서 무작위)
+API_RETRY_MAX = 30.0  # 재시도 대기 시간 상한(초)
+API_WAIT_HISTORY = 1000  # 대기 시간 분포 계산에 사용할 최근 호출 수
+
+# quota 초과 오류 여부 (오류 메시지가 아니라 예외 종류 / 상태 코드로만 판단)
+# google.api_core 예외(ResourceExhausted / TooManyRequests) 또는 HTTP 429 상태 코드
+# langchain 등이 감싼 예외는 원래 예외(__cause__)까지 확인
+def is_quota_error(error):
+    while error is not None:
+        if type(error).__name__ in ('ResourceExhausted', 'TooManyRequests'):
+            return True
+        if getattr(error, 'code', None) == 429 or getattr(error, 'status_code', None) == 429:
+            return True
+        error = error.__cause__
+    return False
+
+# token bucket (초당 rate개씩 채워지고 최대 burst개까지 모임)
+# 토큰을 미리 예약하고 부족한 만큼만 기다리므로 먼저 요청한 호출이 먼저 실행됨
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    # 토큰 하나 사용, 기다린 시간(초) 반환
+    def acquire(self):
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+# 진행 중인 호출 하나 (같은 key로 들어온 호출은 결과를 공유)
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+# API 하나의 호출 제어 + 통계
+class ApiLimiter:
+    def __init__(self, name, rate, burst, max_retries=API_MAX_RETRIES):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.calls = 0  # call() 호출 수
+        self.requests = 0  # 실제 API 요청 수 (재시도 포함)
+        self.coalesced = 0  # 진행 중인 같은 요청의 결과를 재사용한 수
+        self.throttled = 0  # token bucket에서 기다린 요청 수
+        self.wait_seconds = 0.0
+        self.quota_errors = 0
+        self.retries = 0
+        self.failures = 0
+        self._waits = deque(maxlen=API_WAIT_HISTORY)
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    # API 호출, key가 같은 요청이 진행 중이면 그 결과를 기다림 (key가 None이면 합치지 않음, 예: 스트리밍)
+    def call(self, key, function, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key) if key is not None else None
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                if key is not None:
+                    self._flights[key] = flight
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            annotate(coalesced=True)
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._call(function, args, kwargs)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            if key is not None:
+                with self._lock:
+                    self._flights.pop(key, None)
+            flight.done.set()
+
+    # token bucket 대기 후 요청, quota 초과 시 재시도
+    def _call(self, function, args, kwargs):
+        wait_total = 0.0
+        for attempt in range(self.max_retries + 1):
+            wait = self.bucket.acquire()
+            wait_total += wait
+            with self._lock:
+                self.requests += 1
+                self.wait_seconds += wait
+                self._waits.append(wait)
+                if wait > 0:
+                    self.throttled += 1
+            try:
+                result = function(*args, **kwargs)
+                annotate(queue_wait_ms=round(wait_total * 1000, 2), api_retries=attempt)
+                return result
+            except Exception as e:
+                quota = is_quota_error(e)
+                with self._lock:
+                    if quota:
+                        self.quota_errors += 1
+                    if not quota or attempt == self.max_retries:
+                        self.failures += 1
+                    else:
+                        self.retries += 1
+                if not quota or attempt == self.max_retries:
+                    raise
+                delay = random.uniform(0, min(API_RETRY_MAX, API_RETRY_BASE * 2 ** attempt))
+                print(f'{self.name} quota 초과, {delay:.1f}초 후 재시도 ({attempt + 1}/{self.max_retries}): {e}')
+                time.sleep(delay)
+                wait_total += delay
+
+    # 호출 통계
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            in_flight = len(self._flights)
+        percentile = lambda q: waits[min(int(q * len(waits)), len(waits) - 1)] if waits else 0.0
+        return {
+            'rate': self.bucket.rate,
+            'burst': self.bucket.burst,
+            'calls': self.calls,
+            'requests': self.requests,
+            'coalesced': self.coalesced,
+            'throttled': self.throttled,
+            'throttle_rate': self.throttled / self.requests if self.requests else 0.0,
+            'wait_seconds': self.wait_seconds,
+            'wait_p50': percentile(0.5),
+            'wait_p95': percentile(0.95),
+            'wait_max': waits[-1] if waits else 0.0,
+            'quota_errors': self.quota_errors,
+            'retries': self.retries,
+            'failures': self.failures,
+            'in_flight': in_flight,
+        }
+
+# 프로세스 전역 호출 제어 (모든 세션이 공유)
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(name):
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                rate, burst = API_LIMITS.get(name, (0, 1))
+                limiter = _limiters[name] = ApiLimiter(name, rate, burst)
+    return limiter
+
+# 호출 제한 변경 (벤치마크 등에서 사용, rate가 0이면 제한하지 않음)
+def set_limit(name, rate, burst=None):
+    bucket = get_limiter(name).bucket
+    with bucket._lock:
+        bucket.rate = rate
+        bucket.burst = max(burst if burst is not None else bucket.burst, 1)
+        bucket.tokens = min(bucket.tokens, bucket.burst)
+
+# API 호출 (예: call_api('vision', digest, annotate_image, content, client))
+def call_api(name, key, function, *args, **kwargs):
+    return get_limiter(name).call(key, function, *args, **kwargs)
+
+# 전체 API 호출 통계
+def api_stats():
+    return {name: limiter.stats() for name, limiter in list(_limiters.items())}
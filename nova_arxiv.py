@@ -1,154 +1,222 @@
 import arxiv
-import os
+import io
 import re
+import gzip
+import time
 import tarfile
-import pandas as pd
-import shutil
-
-# 논문 내용 추출 함수 - 요약 및 결론 후처리
-def clean_text(text):
-    if text is None:
+import argparse
+import posixpath
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from nova_latex import clean_text, clean_authors, find_closing
+from nova_paper_store import PaperStore, normalize_arxiv_id, PAPER_DB
+
+# 수집 설정
+METADATA_BATCH_SIZE = 100  # 한 번의 id_list 검색에 포함할 논문 수
+DOWNLOAD_WORKERS = 4  # 동시에 다운로드 / 파싱할 논문 수
+DOWNLOAD_TIMEOUT = 60
+
+# 소스 처리 설정
+SOURCE_EXTENSIONS = (".tex", ".bbl")  # 메모리로 읽을 파일
+MAX_SOURCE_FILE_SIZE = 5 * 1024 * 1024
+MAX_INCLUDE_DEPTH = 8
+
+_comment_pattern = re.compile(r"(?<!\\)%.*")
+_include_pattern = re.compile(r"\\(input|include|subfile|bibliography)(?![A-Za-z])\s*(?:\{([^{}]+)\}|([^\s{}\\]+))")
+
+# 논문 메타데이터 조회 (id_list 를 batch_size 단위로 묶어 한 번에 검색)
+# 정규화된 arXiv ID -> arxiv.Result 딕셔너리 반환
+def fetch_metadata(arxiv_ids, batch_size=METADATA_BATCH_SIZE):
+    client = arxiv.Client(page_size=batch_size)
+    papers = {}
+    for i in range(0, len(arxiv_ids), batch_size):
+        id_list = arxiv_ids[i:i + batch_size]
+        search = arxiv.Search(id_list=id_list, max_results=len(id_list))
+        for paper in client.results(search):
+            papers[normalize_arxiv_id(paper.get_short_id())] = paper
+    return papers
+
+# 검색어로 논문 조회
+def search_papers(query, max_results=100):
+    client = arxiv.Client()
+    search = arxiv.Search(query=query, max_results=max_results)
+    return {normalize_arxiv_id(paper.get_short_id()): paper for paper in client.results(search)}
+
+# 논문 소스 파일 다운로드 (디스크에 저장하지 않고 메모리로)
+def download_source(paper):
+    with urllib.request.urlopen(paper.source_url(), timeout=DOWNLOAD_TIMEOUT) as response:
+        return response.read()
+
+# 압축 파일 안의 경로 정리 (앞의 ./ 제거, 상위 폴더 / 절대 경로는 None)
+def archive_path(name):
+    name = posixpath.normpath(name)
+    name = name[2:] if name.startswith("./") else name
+    if name.startswith("..") or name.startswith("/"):
         return None
+    return name
 
-    # LaTeX 명령어들 제거
-    text = re.sub(r"\\(emph|textbf|url|textcolor|textsuperscript|[a-zA-Z]+)\{.*?\}", "", text)  # LaTeX 명령어 제거
-
-    # 중괄호 {} 안의 내용 제거
-    text = re.sub(r"\{(.*?)\}", "", text)  # {} 안의 내용 제거 (Deep reinforcement learning)
+# 소스 파일에서 .tex / .bbl 파일만 메모리로 읽기 (경로 -> 내용)
+# tar.gz는 스트림으로 순서대로 읽으며 그림 / 데이터 파일은 건너뛰고, 단일 파일 gzip 소스도 처리
+def read_source_files(data):
+    files = {}
+    try:
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r|*") as tar:
+            for member in tar:
+                if member.isfile() and member.name.lower().endswith(SOURCE_EXTENSIONS) and member.size <= MAX_SOURCE_FILE_SIZE:
+                    name = archive_path(member.name)
+                    if name is None:
+                        continue
+                    files[name] = tar.extractfile(member).read().decode("utf-8", errors="replace")
+        return files
+    except tarfile.ReadError:
+        pass
+
+    # 단일 .tex 파일 (gzip 압축 또는 원본)
+    try:
+        data = gzip.decompress(data)
+    except OSError:
+        pass
+    if b"\\documentclass" in data or b"\\begin{document}" in data:
+        files["main.tex"] = data.decode("utf-8", errors="replace")
+    return files
+
+# 주석 제거 (\% 는 유지)
+def strip_comments(content):
+    return _comment_pattern.sub("", content)
+
+# 메인 .tex 파일 찾기 (\documentclass 와 \begin{document} 가 있는 파일, 여러 개면 main.tex / 큰 파일 우선)
+def find_main_file(files):
+    candidates = []
+    for name, content in files.items():
+        if not name.lower().endswith(".tex"):
+            continue
+        content = strip_comments(content)
+        score = ("\\documentclass" in content) + ("\\begin{document}" in content)
+        if score:
+            candidates.append((score, posixpath.basename(name).lower() in ("main.tex", "ms.tex", "paper.tex"), len(content), name))
+    return max(candidates)[3] if candidates else None
+
+# \input / \include 파일 내용을 제자리에 삽입 (\bibliography 는 .bbl 로 대체)
+def inline_includes(files, name, root_dir=None, depth=0, seen=None):
+    seen = set() if seen is None else seen
+    seen.add(name)
+    base_dir = posixpath.dirname(name)
+    root_dir = base_dir if root_dir is None else root_dir
+
+    # 포함할 파일 경로 찾기 (메인 파일 기준 / 현재 파일 기준, 확장자 생략 허용)
+    def resolve(target, extension):
+        target = target.strip()
+        for directory in (root_dir, base_dir):
+            path = archive_path(posixpath.join(directory, target))
+            if path is None:
+                continue
+            for candidate in (path, path + extension):
+                if candidate in files:
+                    return candidate
+        return None
 
-    # 괄호 () 안의 내용 제거
-    text = re.sub(r"\((.*?)\)", "", text)  # () 안의 내용 제거 (RL)
+    def replace(match):
+        command, target = match.group(1), match.group(2) or match.group(3)
+        if command == "bibliography":
+            path = resolve(posixpath.splitext(name)[0], ".bbl") or next((f for f in files if f.endswith(".bbl")), None)
+        else:
+            path = resolve(target, ".tex")
+        if path is None or path in seen or depth >= MAX_INCLUDE_DEPTH:
+            return " "
+        return inline_includes(files, path, root_dir, depth + 1, seen)
+
+    return _include_pattern.sub(replace, strip_comments(files[name]))
+
+# 소스 파일(bytes)에서 논문 정보 추출
+def extract_info_from_source(data):
+    files = read_source_files(data)
+    main_file = find_main_file(files)
+    if main_file is None:
+        return None
+    return parse_tex(inline_includes(files, main_file))
 
-    # \begin{...}와 \end{...} 환경 제거
-    text = re.sub(r"\\begin\{.*?\}|\\end\{.*?\}", "", text)  # \begin{...}, \end{...} 제거
+# 명령어의 첫 {인자} 내용 (중첩된 { } 포함, \title[짧은 제목]{제목} 형태 허용), 없으면 None
+def command_argument(content, name):
+    match = re.search(r"\\" + name + r"\*?\s*(?:\[[^\]]*\]\s*)?\{", content)
+    if not match:
+        return None
+    start = match.end() - 1
+    end = find_closing(content, start)
+    return content[start + 1:end] if end >= 0 else None
+
+# .tex 내용에서 논문 정보 추출
+def parse_tex(content):
+    # 타이틀(Title) 추출
+    title = command_argument(content, "title")
+    title = title.strip() if title is not None else None
+
+    # 요약(Abstract) 추출
+    abstract_match = None
+
+    abstract_match = re.search(r"\\begin\{abstract\}(.*?)\\end\{abstract\}", content, re.DOTALL)
+    if abstract_match:
+        abstract = abstract_match.group(1).strip()
+    
+    else:
+        abstract_match = re.search(r"\\abstract\{(.*?)\}", content, re.DOTALL)
+
+        # 추출된 요약
+        if abstract_match:
+            abstract_start = abstract_match.end()
+            next_section_match = re.search(r"\\section\*?\{", content[abstract_start:])
+            if next_section_match:
+                # \section을 만나면 그 위치까지만 추출
+                abstract = content[abstract_start:abstract_start + next_section_match.start()].strip()
+            else:
+                # \section이 없다면, 끝까지 추출
+                abstract = content[abstract_start:].strip()
+        else:
+            abstract = None                
 
-    # LaTeX에서 사용하는 다른 명령어들 제거 (\, \,, \text{ 등)
-    text = re.sub(r"\\[a-zA-Z]+", "", text)  # 남아있는 \ 명령어 제거
+    # 결론(Conclusion) 추출
+    conclusion_match = re.search(r"\\section\{(.*[Cc]onclu.*)\}", content, re.IGNORECASE)
 
-    # %로 시작하는 주석 제거
-    text = re.sub(r"%.*?$", "", text, flags=re.MULTILINE)  # %로 시작하는 주석 제거
+    if conclusion_match:
+        conclusion_start = conclusion_match.end()
+        next_section_match = re.search(r"\\section\*?\{", content[conclusion_start:])
+        if next_section_match:
+            # \section을 만나면 그 위치까지만 추출
+            conclusion = content[conclusion_start:conclusion_start + next_section_match.start()].strip()
+        else:
+            # \section이 없다면, 끝까지 추출
+            conclusion = content[conclusion_start:].strip()
+    else:
+        conclusion = None
 
-    # 불필요한 공백 제거
-    text = re.sub(r"\s*\.\s*\}", "", text)  # . } 같은 구문 제거
-    text = re.sub(r"\s*\}", "", text)  # 남은 } 제거
-    text = re.sub(r"\s+", " ", text).strip()  # 다중 공백을 단일 공백으로 변경
+    # 저자(Authors) 추출
+    authors = command_argument(content, "author")
+    authors = authors.strip() if authors is not None else None
 
-    return text
+    # 저자 후처리
+    authors = clean_authors(authors)
 
-# 논문 내용 추출 함수 - 저자 후처리
-def clean_authors(authors_text):
+    # 요약 및 결론 후처리
+    abstract = clean_text(abstract)
+    conclusion = clean_text(conclusion)
 
-    if authors_text is None:
-        return []
-    
-    # 저자 내용 중 불필요 내용 제거
-    authors_text = re.sub(r"%.*?$", "", authors_text, flags=re.MULTILINE) # %로 시작하는 주석 제거
-    authors_text = re.sub(r"\\thanks\{.*?\}", "", authors_text) # 감사 문구 제거
-    authors_text = re.sub(r"\\textsuperscript\{.*?\}", "", authors_text) # \textsuperscript 제거
-    authors_text = re.sub(r"\\and", ",", authors_text) # and를 쉼표로 변경
-    authors_text = re.sub(r"\\[a-zA-Z]+", "", authors_text) # 남아있는 \ 명령어 제거
-    authors_text = re.sub(r"[\{\}]", "", authors_text) # { } 제거
-    authors = re.split(r",+", authors_text)  # 쉼표로 분할
-    authors = [clean_text(author.strip()) for author in authors] # 공백 제거 및 후처리
-    authors = [author for author in authors if author] # 빈 문자열 제거
-
-    return authors
+    return title, authors, abstract, conclusion
 
 # 논문 내용 추출 함수
-# download_dir 경로 설정 필요
-def extract_info(arxiv_id, download_dir="nova_arxiv_papers"):
+# 소스는 메모리에서만 처리하므로 여러 논문을 동시에 실행해도 안전
+def extract_info(arxiv_id, paper=None):
     try:
-        search = arxiv.Search(id_list=[arxiv_id])
-        paper = next(search.results())
-        tex_file_path = os.path.join(download_dir, "main.tex")
-
-        # 폴더 생성
-        if not os.path.exists(download_dir):
-            os.makedirs(download_dir)
-
-        # arXiv에서 논문 파일 다운로드
-        source_file_path = paper.download_source(dirpath=download_dir)
-
-        # tar 파일 압축 해제
-        if source_file_path.endswith(".tar.gz"):
-            with tarfile.open(source_file_path, "r:gz") as tar:
-                tar.extractall(path=download_dir)
-
-            # main.tex가 존재하지 않으면 -arxiv.tex 또는 _arxiv.tex 파일을 찾음
-            if not os.path.exists(tex_file_path):
-                # 해당 디렉토리에서 -arxiv.tex 또는 _arxiv.tex 파일을 대소문자 구분 없이 검색
-                tex_files = [f for f in os.listdir(download_dir) if re.search(r"[-_arxiv_-_review]\.tex$", f, re.IGNORECASE)]
-                
-                if tex_files:
-                    # 첫 번째 파일을 선택
-                    tex_file_path = os.path.join(download_dir, tex_files[0])
-            
-            print(f"tex 파일 : {tex_file_path} ")
-        else:
-            print(f"다른 파일 형식 : {source_file_path}")
+        if paper is None:
+            paper = fetch_metadata([arxiv_id]).get(normalize_arxiv_id(arxiv_id))
+            if paper is None:
+                print(f"arXiv_ID : {arxiv_id}를 찾을 수 없습니다.")
+                return None
+
+        # arXiv에서 논문 소스 다운로드 및 정보 추출
+        parsed = extract_info_from_source(download_source(paper))
+        if parsed is None:
+            print(f"arXiv_ID : {arxiv_id}의 .tex 소스를 찾을 수 없습니다.")
             return None
-
-        # .tex 파일 정보 추출
-        with open(tex_file_path, "r", encoding="utf-8") as f:
-            content = f.read()
-
-            # 타이틀(Title) 추출
-            title_match = re.search(r"\\title\{(.*?)\}", content, re.DOTALL)
-            title = title_match.group(1).strip() if title_match else None
-
-            # 요약(Abstract) 추출
-            abstract_match = None
-
-            abstract_match = re.search(r"\\begin\{abstract\}(.*?)\\end\{abstract\}", content, re.DOTALL)
-            if abstract_match:
-                abstract = abstract_match.group(1).strip()
-            
-            else:
-                abstract_match = re.search(r"\\abstract\{(.*?)\}", content, re.DOTALL)
-
-                # 추출된 요약
-                if abstract_match:
-                    abstract_start = abstract_match.end()
-                    next_section_match = re.search(r"\\section\*?\{", content[abstract_start:])
-                    if next_section_match:
-                        # \section을 만나면 그 위치까지만 추출
-                        abstract = content[abstract_start:abstract_start + next_section_match.start()].strip()
-                    else:
-                        # \section이 없다면, 끝까지 추출
-                        abstract = content[abstract_start:].strip()
-                else:
-                    abstract = None                
-
-            # 결론(Conclusion) 추출
-            conclusion_match = re.search(r"\\section\{(.*[Cc]onclu.*)\}", content, re.IGNORECASE)
-
-            if conclusion_match:
-                conclusion_start = conclusion_match.end()
-                next_section_match = re.search(r"\\section\*?\{", content[conclusion_start:])
-                if next_section_match:
-                    # \section을 만나면 그 위치까지만 추출
-                    conclusion = content[conclusion_start:conclusion_start + next_section_match.start()].strip()
-                else:
-                    # \section이 없다면, 끝까지 추출
-                    conclusion = content[conclusion_start:].strip()
-            else:
-                conclusion = None
-
-            # 저자(Authors) 추출
-            authors_match = re.search(r"\\author\{(.*?)\}", content, re.DOTALL)
-            authors = authors_match.group(1).strip() if authors_match else None
-
-            # 저자 후처리
-            authors = clean_authors(authors)
-        
-        shutil.rmtree(download_dir)
-        print("title >> ",title)
-        print("abstract >> ",abstract)
-        print("conclusion >> ",conclusion)
-
-        # 요약 및 결론 후처리
-        abstract = clean_text(abstract)
-        conclusion = clean_text(conclusion)
+        title, authors, abstract, conclusion = parsed
 
         # 논문 내용 딕셔너리 생성
         result = {
@@ -163,65 +231,44 @@ def extract_info(arxiv_id, download_dir="nova_arxiv_papers"):
         return result
 
     except Exception as e:
-        print(f"Error: {e}")
+        print(f"Error: {arxiv_id}: {e}")
         return None
 
+# 논문 저장소 로드 (기존 CSV 파일이 있으면 처음 한 번 가져옴)
+# db_file, csv_file 경로 설정 필요
+def load_store(db_file=PAPER_DB, csv_file="nova_arxiv_csv.csv"):
+    return PaperStore(db_file, csv_file)
+
 # 논문 중복 방지 함수
-# csv_file 경로 설정 필요
-def check_arxiv_id(arxiv_id, csv_file="nova_arxiv_csv.csv"):
-    if os.path.exists(csv_file):
-        df = pd.read_csv(csv_file)
+def check_arxiv_id(arxiv_id, store):
+    return store.exists(arxiv_id)
 
-        if "arXiv_ID" in df.columns:
-            df["arXiv_ID"] = df["arXiv_ID"].astype(str).fillna("")
+# 논문 내용 -> 저장소 저장 및 CSV 파일 내보내기 (여러 논문을 한 번에 저장)
+# csv_file 경로 설정 필요
+def save_papers(paper_infos, store, csv_file="nova_arxiv_csv.csv"):
+    if not paper_infos:
+        return
 
-            arxiv_id = arxiv_id.strip().lower()
-            existing_arxiv_ids = df["arXiv_ID"].str.strip().str.lower()
+    store.upsert_many(paper_infos)
 
-            return arxiv_id in existing_arxiv_ids.values
-        else:
-            print("CSV 파일에 arXiv_ID 컬럼이 없습니다.")
-            return False
-    return False
+    # nova_embedding의 CSVLoader가 읽을 수 있도록 CSV 파일 갱신
+    store.export_csv(csv_file)
+    print(f"논문 정보 {len(paper_infos)}건이 {store.db_file}, {csv_file}에 저장되었습니다.")
 
-# 논문 내용 -> csv 파일 저장 함수
+# 논문 내용 -> 저장소 저장 함수
 # csv_file 경로 설정 필요
-def save_csv(paper_info, csv_file="nova_arxiv_csv.csv"):
-
-    # 논문 정보
-    data = {
-        "arXiv_ID": paper_info["arxiv_id"],
-        "Title": paper_info["title"],
-        "Year": paper_info["year"],
-        "Authors": ", ".join(paper_info["authors"]),
-        "Abstract": paper_info["abstract"],
-        "Conclusion": paper_info["conclusion"]
-    }
-    
-    # 기존 CSV 파일 존재 확인
-    if os.path.exists(csv_file):
-        # 기존 파일 읽기
-        df = pd.read_csv(csv_file)
-    else:
-        # 새로운 DataFrame 생성
-        df = pd.DataFrame(columns=data.keys())
-
-    # 새로운 행 추가
-    new_row = pd.DataFrame([data])
-    df = pd.concat([df, new_row], ignore_index=True)
-
-    # CSV 파일 저장
-    df.to_csv(csv_file, index=False, encoding="utf-8")
-    print(f"논문 정보가 {csv_file}에 저장되었습니다.")
+def save_csv(paper_info, store, csv_file="nova_arxiv_csv.csv"):
+    save_papers([paper_info], store, csv_file)
 
 
 # 논문 정보 추출 및 CSV 파일 저장 프로세스 함수
 # csv_file 경로 설정 필요
-def process_paper(arxiv_id, csv_file="nova_arxiv_csv.csv"):
+def process_paper(arxiv_id, csv_file="nova_arxiv_csv.csv", db_file=PAPER_DB):
+    store = load_store(db_file, csv_file)
 
     # 논문 중복 방지
-    if check_arxiv_id(arxiv_id, csv_file):
-        print(f"arXiv_ID : {arxiv_id}는 이미 CSV 파일에 존재합니다. 프로세스를 종료합니다.")
+    if check_arxiv_id(arxiv_id, store):
+        print(f"arXiv_ID : {arxiv_id}는 이미 저장되어 있습니다. 프로세스를 종료합니다.")
         return
     
     # 논문 정보 추출
@@ -235,16 +282,81 @@ def process_paper(arxiv_id, csv_file="nova_arxiv_csv.csv"):
         print(f"Authors : {paper_info['authors']}")
         print(f"Abstract : {paper_info['abstract']}")
         print(f"Conclusion : {paper_info['conclusion']}")    
-        save_csv(paper_info, csv_file)
+        save_csv(paper_info, store, csv_file)
 
         # 논문 정보 초기화
         paper_info = None
     else:
         print(f"arXiv_ID : {arxiv_id}에 대한 정보를 추출 할 수 없습니다.")
 
-# arXiv ID 입력
-arxiv_id = "2501.03225"
-
-# 프로세스 실행
+# 여러 논문 일괄 수집
+# 메타데이터는 batch 검색, 소스 다운로드 / 파싱은 동시에 진행하고 CSV 저장은 마지막에 한 번만 수행
 # csv_file 경로 설정 필요
-process_paper(arxiv_id, "nova_arxiv_csv.csv")
\ No newline at end of file
+def ingest_papers(arxiv_ids=None, query=None, max_results=100, csv_file="nova_arxiv_csv.csv", workers=DOWNLOAD_WORKERS, db_file=PAPER_DB):
+    start_time = time.perf_counter()
+    store = load_store(db_file, csv_file)
+
+    # 논문 메타데이터 조회
+    failed = []
+    if query:
+        papers = search_papers(query, max_results)
+    else:
+        unique_ids = list(dict.fromkeys(normalize_arxiv_id(arxiv_id) for arxiv_id in arxiv_ids or [] if arxiv_id.strip()))
+        papers = fetch_metadata(unique_ids)
+        for arxiv_id in unique_ids:
+            if arxiv_id not in papers:
+                failed.append(arxiv_id)
+                print(f"[실패] {arxiv_id} : arXiv에서 찾을 수 없습니다.")
+
+    # 논문 중복 방지
+    existing_ids = store.existing_ids(papers)
+    skipped = [arxiv_id for arxiv_id in papers if arxiv_id in existing_ids]
+    for arxiv_id in skipped:
+        print(f"[건너뜀] {arxiv_id} : 이미 저장되어 있습니다.")
+    pending = {arxiv_id: paper for arxiv_id, paper in papers.items() if arxiv_id not in existing_ids}
+
+    # 소스 다운로드 / 파싱 (tar 파일에서 소스를 바로 메모리로 읽음)
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(extract_info, arxiv_id, paper): arxiv_id for arxiv_id, paper in pending.items()}
+        for future in as_completed(futures):
+            arxiv_id = futures[future]
+            paper_info = future.result()
+            if paper_info:
+                results.append(paper_info)
+                print(f"[성공] {arxiv_id} : {paper_info['title']}")
+            else:
+                failed.append(arxiv_id)
+                print(f"[실패] {arxiv_id} : 정보를 추출 할 수 없습니다.")
+
+    # 결과 저장 (한 번만)
+    save_papers(results, store, csv_file)
+
+    elapsed = time.perf_counter() - start_time
+    print(f"수집 완료 : 성공 {len(results)}건, 실패 {len(failed)}건, 건너뜀 {len(skipped)}건, "
+          f"{elapsed:.1f}초 ({len(pending) / elapsed if elapsed else 0:.2f}편/초)")
+    return results, failed
+
+# ID 목록 파일 읽기 (한 줄에 하나, # 주석 허용)
+def read_id_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.split("#")[0].strip() for line in f if line.split("#")[0].strip()]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="arXiv 논문 일괄 수집")
+    parser.add_argument("ids", nargs="*", help="arXiv ID 목록")
+    parser.add_argument("--file", help="arXiv ID 목록 파일 (한 줄에 하나)")
+    parser.add_argument("--query", help="arXiv 검색어 (ID 대신 검색 결과를 수집)")
+    parser.add_argument("--max-results", type=int, default=100, help="검색어 사용 시 최대 논문 수")
+    parser.add_argument("--csv", default="nova_arxiv_csv.csv", help="내보낼 CSV 파일 경로")
+    parser.add_argument("--db", default=PAPER_DB, help="논문 저장소(SQLite) 경로")
+    parser.add_argument("--workers", type=int, default=DOWNLOAD_WORKERS, help="동시 다운로드 수")
+    args = parser.parse_args()
+
+    arxiv_ids = list(args.ids)
+    if args.file:
+        arxiv_ids += read_id_file(args.file)
+    if not arxiv_ids and not args.query:
+        parser.error("arXiv ID, --file 또는 --query 중 하나가 필요합니다.")
+
+    ingest_papers(arxiv_ids, args.query, args.max_results, args.csv, args.workers, args.db)
@@ -0,0 +1,457 @@
+import os, io, csv, json, time, random, shutil, tarfile, argparse, hashlib, tempfile, tracemalloc
+from types import SimpleNamespace
+from langchain_core.embeddings import Embeddings
+
+# NOVA 오프라인 벤치마크
+# Google 서비스(Vision / Gemini / 임베딩) 대신 지연 시간을 설정할 수 있는 로컬 대체 객체를 사용하여
+# PDF 처리 / RAG 검색 / 프롬프트 생성 / arXiv 소스 파싱 / 번역 단계의 처리량, p50/p95 지연 시간, 최대 메모리를 측정
+# 사용법: python nova_bench.py [--pdf sample.pdf] [--baseline nova_bench_baseline.json] [--save-baseline]
+
+BENCH_CSV = "nova_arxiv_csv.csv"
+BENCH_BASELINE = "nova_bench_baseline.json"
+REGRESSION_TOLERANCE = 0.2  # 기준 대비 p50 / p95가 20% 이상 느려지면 회귀로 표시
+EMBEDDING_DIM = 256
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-bench")
+
+### 로컬 대체 객체 ###
+# 지연 시간 (평균 latency 초, ±jitter 비율, 시드 고정)
+class Latency:
+    def __init__(self, seconds, jitter=0.2, seed=0):
+        self.seconds = seconds
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def sleep(self, scale=1.0):
+        if self.seconds > 0:
+            time.sleep(self.seconds * scale * (1 + self._random.uniform(-self.jitter, self.jitter)))
+
+# Cloud Vision 클라이언트 대체 (text_detection 호출마다 지연 후 준비된 OCR 텍스트 반환)
+class FakeVisionClient:
+    def __init__(self, page_texts, latency=0.15, seed=0):
+        self.page_texts = page_texts
+        self.latency = Latency(latency, seed=seed)
+        self.calls = 0
+
+    def text_detection(self, image):
+        self.latency.sleep()
+        text = self.page_texts[self.calls % len(self.page_texts)]
+        self.calls += 1
+        return SimpleNamespace(
+            error=SimpleNamespace(message=""),
+            text_annotations=[SimpleNamespace(description=text)],
+        )
+
+# Gemini GenerativeModel 대체 (첫 토큰 지연 + 초당 토큰 수로 스트리밍)
+class FakeGenerativeModel:
+    def __init__(self, first_token_latency=0.8, tokens_per_second=80, response_tokens=200, seed=0):
+        self.latency = Latency(first_token_latency, seed=seed)
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.calls = 0
+
+    def _answer(self, prompt):
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        words = [digest[i:i + 6] for i in range(0, len(digest), 6)]
+        body = " ".join(words[i % len(words)] for i in range(self.response_tokens))
+        return f"{body} :stars:" if int(digest[0], 16) % 2 else body
+
+    def _chunks(self, text, chunk_tokens=20):
+        words = text.split(" ")
+        for i in range(0, len(words), chunk_tokens):
+            if self.tokens_per_second:
+                time.sleep(chunk_tokens / self.tokens_per_second)
+            yield SimpleNamespace(text=" ".join(words[i:i + chunk_tokens]) + " ")
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        self.latency.sleep()
+        text = self._answer(prompt)
+        if stream:
+            return self._chunks(text)
+        if self.tokens_per_second:
+            time.sleep(self.response_tokens / self.tokens_per_second)
+        return SimpleNamespace(text=text)
+
+# 임베딩 모델 대체 (단어 해시 기반 고정 차원 벡터, 같은 입력이면 항상 같은 결과)
+class HashingEmbeddings(Embeddings):
+    def __init__(self, dim=EMBEDDING_DIM, latency=0.05, seed=0):
+        self.dim = dim
+        self.latency = Latency(latency, seed=seed)
+        self.calls = 0
+
+    def _embed(self, text):
+        vector = [0.0] * self.dim
+        for word in text.lower().split():
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dim] += 1.0 if digest[4] % 2 else -1.0
+        norm = sum(value * value for value in vector) ** 0.5 or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        self.latency.sleep()
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        self.latency.sleep()
+        return self._embed(text)
+
+# googletrans Translator 대체
+class FakeTranslator:
+    def __init__(self, latency=0.1, seed=0):
+        self.latency = Latency(latency, seed=seed)
+        self.calls = 0
+
+    def translate(self, text, dest="ko"):
+        self.calls += 1
+        self.latency.sleep()
+        return SimpleNamespace(text="\n".join(f"[{dest}] {line}" for line in text.split("\n")))
+
+# Streamlit 업로드 파일 대체
+class UploadedPDF:
+    def __init__(self, path):
+        self.name = os.path.basename(path)
+        self.size = os.path.getsize(path)
+        self._path = path
+
+    def read(self):
+        with open(self._path, "rb") as f:
+            return f.read()
+
+### 샘플 데이터 ###
+# 논문 CSV 로드
+def load_papers(csv_file=BENCH_CSV):
+    with open(csv_file, "r", encoding="utf-8", newline="") as f:
+        return [row for row in csv.DictReader(f) if row.get("arXiv_ID")]
+
+# OCR 결과처럼 보이는 페이지 텍스트
+def paper_pages(paper):
+    return [
+        f"arXiv:{paper['arXiv_ID']}v1 [cs.AI] {paper['Year']}\n{paper['Title']}\n{paper['Authors']}\nAbstract\n{paper['Abstract']}\n1 Introduction\n",
+        f"5 Conclusion\n{paper['Conclusion']}\nReferences\n[1] A. Author. A paper. {paper['Year']}.\n",
+    ]
+
+# 질의 (논문 제목 앞부분 / 일반 질문)
+def make_queries(papers):
+    queries = [" ".join(paper["Title"].split()[:6]) + " 관련 논문 찾아줘" for paper in papers]
+    queries += ["이 논문의 기여가 뭐야?", "강화학습 안전성 검증 연구 추천해줘", "요약해줘"]
+    return queries
+
+# arXiv 소스(tar.gz) 생성 (메인 파일 + \input 섹션 파일 + 그림)
+def make_source_archive(paper):
+    main = (
+        "\\documentclass{article}\n"
+        f"\\title{{{paper['Title']}}}\n\\author{{{paper['Authors']}}}\n"
+        "\\begin{document}\n\\maketitle\n\\input{sections/abstract}\n"
+        "\\section{Method}\nWe use \\textbf{methods} \\cite{x} with $x^2$ (see Fig.~\\ref{f}).\n"
+        "\\input{sections/conclusion}\n\\bibliography{refs}\n\\end{document}\n"
+    )
+    files = {
+        "main.tex": main,
+        "sections/abstract.tex": f"\\begin{{abstract}}\n{paper['Abstract']}\n\\end{{abstract}}\n",
+        "sections/conclusion.tex": f"\\section{{Conclusion}}\n{paper['Conclusion']}\n",
+        "main.bbl": "\\begin{thebibliography}{1}\\bibitem{x} A. Author.\\end{thebibliography}\n",
+        "figures/plot.png": os.urandom(64 * 1024),
+    }
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, content in files.items():
+            data = content if isinstance(content, bytes) else content.encode("utf-8")
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+# 이미지만 있는 샘플 PDF 생성 (텍스트 레이어 없음 -> 전체 OCR 경로)
+def make_sample_pdf(path, papers, page_count=8):
+    from PIL import Image, ImageDraw
+    pages = []
+    for i in range(page_count):
+        paper = papers[i % len(papers)]
+        image = Image.new("RGB", (1240, 1754), "white")  # A4 150 DPI
+        draw = ImageDraw.Draw(image)
+        text = f"{paper['Title']}\n\n{paper['Abstract']}"
+        lines = [text[j:j + 90] for j in range(0, len(text), 90)][:60]
+        for n, line in enumerate(lines):
+            draw.text((80, 80 + n * 26), line, fill="black")
+        pages.append(image)
+    pages[0].save(path, save_all=True, append_images=pages[1:], resolution=150)
+    return path
+
+### 측정 ###
+# 백분위수
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = (len(values) - 1) * q
+    low = int(index)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (index - low)
+
+# 단계 측정 (호출별 지연 시간 -> p50 / p95 / 처리량, 별도 1회 실행으로 tracemalloc 최대 메모리)
+# setup은 호출 전에 실행되며 측정 시간에 포함되지 않음 (캐시 비우기 등)
+def measure(name, function, inputs, repeat=3, setup=None):
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in inputs:
+            if setup is not None:
+                setup()
+            call_start = time.perf_counter()
+            function(item)
+            latencies.append(time.perf_counter() - call_start)
+    wall = time.perf_counter() - start
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    function(inputs[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "calls": len(latencies),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "throughput_per_s": round(len(latencies) / sum(latencies), 2) if sum(latencies) else 0.0,
+        "peak_mb": round(peak / 1024 / 1024, 2),
+    }
+    print(f"{name:<26} {result['calls']:>5}회  p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+          f"{result['throughput_per_s']:>8.2f}/s  peak {result['peak_mb']:>7.2f}MB  (전체 {wall:.1f}초)")
+    return result
+
+### 단계별 벤치마크 ###
+# PDF 처리 (poppler 필요)
+def bench_pdf(results, pdf_paths, papers, args, work_dir):
+    from nova_pdf import poppler_command
+    if shutil.which(poppler_command("pdfinfo")) is None:
+        print("poppler(pdfinfo)를 찾을 수 없어 PDF 단계는 건너뜁니다. (POPPLER_PATH 설정 필요)")
+        return
+
+    import nova_ui
+    from nova_ocr_cache import OCRCache
+
+    if not pdf_paths:
+        pdf_paths = [make_sample_pdf(os.path.join(work_dir, "sample.pdf"), papers)]
+
+    page_texts = [page for paper in papers for page in paper_pages(paper)]
+    client = FakeVisionClient(page_texts, latency=args.vision_latency, seed=args.seed)
+    ocr_cache = OCRCache(os.path.join(work_dir, "ocr_cache"))
+    nova_ui.load_ocr_cache = lambda: ocr_cache
+    upload_dir = os.path.join(work_dir, "input_pdf")
+    os.makedirs(upload_dir, exist_ok=True)
+    uploads = [UploadedPDF(path) for path in pdf_paths]
+
+    # 캐시 비우기 (cold) / 채워진 캐시 (warm)
+    def clear_cache():
+        shutil.rmtree(ocr_cache.cache_dir, ignore_errors=True)
+        os.makedirs(ocr_cache.cache_dir, exist_ok=True)
+
+    results["detect_text_from_pdf"] = measure(
+        "detect_text_from_pdf", lambda path: nova_ui.detect_text_from_pdf(path, client), pdf_paths, args.repeat)
+    results["process_pdf_cold"] = measure(
+        "process_pdf (cache cold)", lambda upload: nova_ui.process_pdf(upload, upload_dir, client), uploads, args.repeat, setup=clear_cache)
+    results["process_pdf_warm"] = measure(
+        "process_pdf (cache warm)", lambda upload: nova_ui.process_pdf(upload, upload_dir, client), uploads, args.repeat)
+    results["detect_text_from_pdf"]["vision_calls"] = client.calls
+
+# RAG 검색 (CSV로 임시 벡터 DB 구축 후 검색)
+def bench_rag(results, papers, args, work_dir, csv_file):
+    import nova_func, nova_embedding
+
+    from langchain_community.vectorstores import Chroma
+
+    embeddings = HashingEmbeddings(latency=args.embed_latency, seed=args.seed)
+    nova_embedding.GoogleGenerativeAIEmbeddings = lambda **kwargs: embeddings
+    persist_directory = os.path.join(work_dir, "database")
+    nova_embedding.update_index(csv_file, persist_directory)
+    nova_func._embeddings = nova_func.CachedEmbeddings(embeddings, nova_func.embedding_cache)
+    nova_func._vector_store = Chroma(persist_directory=persist_directory, embedding_function=nova_func._embeddings)
+
+    queries = make_queries(papers)
+    calls_before = embeddings.calls
+    nova_func.embedding_cache.clear()
+    results["use_rag_cold"] = measure(
+        "use_rag (embedding cold)", nova_func.use_rag, queries, 1, setup=nova_func.embedding_cache.clear)
+    results["use_rag_warm"] = measure("use_rag (embedding warm)", nova_func.use_rag, queries, args.repeat)
+    results["use_rag_warm"]["embedding_calls"] = embeddings.calls - calls_before
+    return queries
+
+# 메모리 매핑 벡터 인덱스 (NOVA_RAG_BACKEND=numpy)
+# 벤치 Chroma DB를 snapshot으로 내보내 use_rag를 측정하고, 합성 벡터 index_size개로 검색 / MMR 지연 시간 측정
+def bench_vector_index(results, queries, args, work_dir):
+    import numpy as np
+    import nova_func, nova_embedding
+    from nova_vector_index import VectorIndex, publish_snapshot
+
+    index_dir = os.path.join(work_dir, "vector_index")
+    start = time.perf_counter()
+    nova_embedding.export_vector_index(nova_func._vector_store, index_dir)
+    export_seconds = time.perf_counter() - start
+
+    backend, vector_index = nova_func.RAG_BACKEND, nova_func._vector_index
+    nova_func.RAG_BACKEND, nova_func._vector_index = "numpy", VectorIndex(index_dir)
+    try:
+        results["use_rag_numpy"] = measure("use_rag (numpy, warm)", nova_func.use_rag, queries, args.repeat)
+        results["use_rag_numpy"]["export_seconds"] = round(export_seconds, 3)
+    finally:
+        nova_func.RAG_BACKEND, nova_func._vector_index = backend, vector_index
+
+    rng = np.random.default_rng(args.seed)
+    vectors = rng.standard_normal((args.index_size, args.index_dim), dtype=np.float32)
+    papers = [{"Title": f"paper {i}", "Year": 2000 + i % 25, "Authors": f"author {i % 1000}", "arXiv_id": str(i)} for i in range(args.index_size)]
+    query_vectors = list(rng.standard_normal((20, args.index_dim), dtype=np.float32))
+    for dtype in ("float32", "float16"):
+        synthetic_dir = os.path.join(work_dir, f"vector_index_{dtype}")
+        os.makedirs(synthetic_dir)
+        publish_snapshot(synthetic_dir, vectors, papers, dtype)
+        start = time.perf_counter()
+        index = VectorIndex(synthetic_dir)
+        index.snapshot()
+        open_ms = round((time.perf_counter() - start) * 1000, 3)
+        index.search(query_vectors[0], 5)  # 페이지 캐시에 올리기
+        name = f"vector_index_{dtype}"
+        results[f"{name}_search"] = measure(
+            f"{name} top-5 ({args.index_size})", lambda query: index.search(query, 5), query_vectors, args.repeat)
+        results[f"{name}_search"]["open_ms"] = open_ms
+        results[f"{name}_mmr"] = measure(
+            f"{name} MMR 5/20 ({args.index_size})", lambda query: index.mmr(query, 5, 20), query_vectors, args.repeat)
+        results[f"{name}_filtered"] = measure(
+            f"{name} top-5 + 연도 필터", lambda query: index.search(query, 5, year_from=2020), query_vectors, args.repeat)
+
+# 프롬프트 생성 (긴 대화 히스토리 + 요약 모델)
+def bench_prompt(results, papers, queries, args):
+    import streamlit as st
+    import nova_ui, nova_func
+
+    model = FakeGenerativeModel(first_token_latency=args.gemini_latency, tokens_per_second=0, seed=args.seed)
+    history = []
+    for i, query in enumerate(queries * 3):
+        history.append({"role": "user", "content": query})
+        history.append({"role": "assistant", "content": " ".join([papers[i % len(papers)]["Abstract"]] * 2)})
+    rag_response = nova_func.use_rag(queries[0]) if "use_rag_warm" in results else {}
+
+    def build(query):
+        nova_ui.generate_combined_prompt(rag_response, query, history + [{"role": "user", "content": query}], model)
+
+    st.session_state.summary_cache = {}
+    results["generate_combined_prompt"] = measure("generate_combined_prompt", build, queries, args.repeat)
+    results["generate_combined_prompt"]["summary_calls"] = model.calls
+
+    # Gemini 응답 (스트리밍, 첫 토큰까지 시간 포함)
+    answer_model = FakeGenerativeModel(first_token_latency=args.gemini_latency, tokens_per_second=args.gemini_tps, seed=args.seed)
+    results["chat_with_gemini"] = measure(
+        "chat_with_gemini", lambda query: nova_ui.chat_with_gemini(answer_model, query, rag_response), queries[:3], 1)
+
+# arXiv 소스 파싱 (다운로드 대신 생성한 tar.gz 사용)
+def bench_arxiv(results, papers, args):
+    import nova_arxiv
+
+    archives = {paper["arXiv_ID"]: make_source_archive(paper) for paper in papers}
+    nova_arxiv.download_source = lambda paper: archives[paper.arxiv_id]
+    items = [(paper["arXiv_ID"], SimpleNamespace(arxiv_id=paper["arXiv_ID"], published=SimpleNamespace(year=int(paper["Year"] or 2025))))
+             for paper in papers]
+    results["arxiv_extract_info"] = measure(
+        "nova_arxiv.extract_info", lambda item: nova_arxiv.extract_info(*item), items, args.repeat)
+
+# 번역 (문장 분리 + batch + 캐시)
+def bench_translate(results, papers, args, work_dir):
+    try:
+        import nova_translate
+    except ImportError as e:
+        print(f"번역 모듈을 불러올 수 없어 번역 단계는 건너뜁니다: {e}")
+        return
+
+    translator = FakeTranslator(latency=args.translate_latency, seed=args.seed)
+    cache = nova_translate.TranslationCache(os.path.join(work_dir, "translate_cache.sqlite"))
+    nova_translate._translator = translator
+    nova_translate._translation_cache = cache
+    texts = [f"Abstract {paper['Abstract']}" for paper in papers]
+
+    def clear_cache():
+        with cache._lock:
+            cache._conn.execute("DELETE FROM translations")
+            cache._conn.commit()
+
+    results["translate_cold"] = measure(
+        "extract_and_translate (cold)", nova_translate.extract_and_translate, texts, 1, setup=clear_cache)
+    results["translate_warm"] = measure("extract_and_translate (warm)", nova_translate.extract_and_translate, texts, args.repeat)
+    results["translate_cold"]["translate_calls"] = translator.calls
+
+### 기준 비교 ###
+# 기준 결과와 비교 (p50 / p95가 tolerance 이상 느려지거나 메모리가 늘면 회귀)
+def compare(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    regressions = []
+    print("\n기준 대비")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<26} (기준 없음)")
+            continue
+        changes = []
+        for metric in ("p50_ms", "p95_ms", "peak_mb"):
+            if base.get(metric):
+                ratio = result[metric] / base[metric]
+                changes.append(f"{metric} {ratio:.2f}배")
+                if ratio > 1 + tolerance:
+                    regressions.append((name, metric, base[metric], result[metric]))
+        print(f"{name:<26} " + ", ".join(changes))
+
+    for name, metric, before, after in regressions:
+        print(f"회귀: {name} {metric} {before} -> {after}")
+    return regressions
+
+def run(args):
+    # 기본적으로 API 호출 제한을 끄고 코드 자체의 처리 시간만 측정 (--api-limits 이면 설정된 제한 적용)
+    if not args.api_limits:
+        import nova_api
+        for name in nova_api.API_LIMITS:
+            nova_api.set_limit(name, 0)
+    papers = load_papers(args.csv)
+    work_dir = tempfile.mkdtemp(prefix="nova_bench_")
+    results = {}
+    try:
+        bench_pdf(results, args.pdf, papers, args, work_dir)
+        queries = bench_rag(results, papers, args, work_dir, args.csv)
+        bench_vector_index(results, queries, args, work_dir)
+        bench_prompt(results, papers, queries, args)
+        bench_arxiv(results, papers, args)
+        bench_translate(results, papers, args, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n기준 저장: {args.baseline}")
+    return results, regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NOVA 오프라인 벤치마크")
+    parser.add_argument("--pdf", nargs="*", default=[], help="측정할 PDF 파일 (없으면 샘플 PDF 생성)")
+    parser.add_argument("--csv", default=BENCH_CSV, help="논문 CSV 파일 경로")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수")
+    parser.add_argument("--baseline", default=BENCH_BASELINE, help="기준 결과 파일")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준으로 저장")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE, help="회귀 판단 기준 (0.2 = 20%%)")
+    parser.add_argument("--vision-latency", type=float, default=0.15, help="Vision 호출 지연(초)")
+    parser.add_argument("--gemini-latency", type=float, default=0.8, help="Gemini 첫 토큰 지연(초)")
+    parser.add_argument("--gemini-tps", type=float, default=80, help="Gemini 초당 토큰 수")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="임베딩 호출 지연(초)")
+    parser.add_argument("--translate-latency", type=float, default=0.1, help="번역 호출 지연(초)")
+    parser.add_argument("--index-size", type=int, default=20000, help="합성 벡터 인덱스 논문 수")
+    parser.add_argument("--index-dim", type=int, default=768, help="합성 벡터 인덱스 차원")
+    parser.add_argument("--api-limits", action="store_true", help="nova_api 호출 제한 적용 (NOVA_*_RPS)")
+    parser.add_argument("--seed", type=int, default=0, help="지연 시간 난수 시드")
+    args = parser.parse_args()
+
+    _, regressions = run(args)
+    if regressions:
+        raise SystemExit(1)
@@ -0,0 +1,88 @@
+import os, hashlib
+
+# 프롬프트 토큰 예산 설정
+PROMPT_TOKEN_BUDGET = int(os.getenv('NOVA_PROMPT_TOKEN_BUDGET', 8000))
+RECENT_MESSAGES = 6  # 원문 그대로 유지할 최근 메시지 수
+SUMMARY_BLOCK_SIZE = 4  # 한 번에 요약할 이전 메시지 수 (블록 단위로 한 번만 요약)
+SUMMARY_MAX_CHARS = 800  # 요약 모델이 없을 때 블록당 남길 글자 수
+DIGEST_MAX_CHARS = 300  # 업로드 논문 요약/결론 digest 글자 수
+
+SUMMARY_PROMPT = '''다음 대화 내용을 이후 대화에 필요한 사실 위주로 5문장 이내로 요약해 주세요.
+
+{conversation}
+'''
+
+# 토큰 수 추정 (영문은 약 4글자당 1토큰, 한글 등은 글자당 1토큰)
+def estimate_tokens(text):
+    ascii_count = sum(1 for ch in text if ch.isascii())
+    return ascii_count // 4 + (len(text) - ascii_count)
+
+# 글자 수 제한
+def truncate(text, max_chars):
+    text = ' '.join(str(text).split())
+    return text if len(text) <= max_chars else text[:max_chars] + '…'
+
+# 업로드 논문 digest (전체 요약/결론 대신 제목과 앞부분만 참조)
+def paper_digest(pdf):
+    return (f"[업로드 논문: {pdf['filename']}] 제목: {truncate(pdf['title'], 200)} / "
+            f"요약: {truncate(pdf['abstract'], DIGEST_MAX_CHARS)} / "
+            f"결론: {truncate(pdf['conclusion'], DIGEST_MAX_CHARS)}")
+
+# 메시지 한 줄 포맷
+def format_message(message):
+    role = 'User' if message['role'] == 'user' else 'Assistant'
+    content = paper_digest(message['pdf']) if message.get('pdf') else message['content']
+    return f'{role}: {content}'
+
+# 블록 요약 (summarize 함수가 없거나 실패하면 앞부분만 남김)
+def summarize_block(lines, summarize=None):
+    conversation = '\n'.join(lines)
+    if summarize is not None:
+        try:
+            return summarize(SUMMARY_PROMPT.format(conversation=conversation)).strip()
+        except Exception as e:
+            print(f'대화 요약 실패: {e}')
+    return truncate(conversation, SUMMARY_MAX_CHARS)
+
+# 토큰 예산에 맞춘 대화 히스토리 생성
+# 최근 메시지는 원문 그대로 두고, 이전 메시지는 블록 단위 요약으로 대체
+# 블록 요약은 summary_cache(블록 해시 -> 요약)에 저장하여 매 턴 다시 요약하지 않음
+def build_history(chat_history, budget, summary_cache, summarize=None):
+    lines = [format_message(message) for message in chat_history]
+    raw_tokens = sum(estimate_tokens(line) for line in lines)
+    stats = {'history_messages': len(lines), 'history_tokens_raw': raw_tokens, 'summarized_messages': 0}
+
+    # 예산 안이면 그대로 사용
+    if raw_tokens <= budget:
+        stats['history_tokens'] = raw_tokens
+        return '\n'.join(lines), stats
+
+    # 이전 메시지 -> 블록 요약 (블록이 다 차지 않은 나머지는 원문 유지)
+    older_count = max(0, len(lines) - RECENT_MESSAGES)
+    block_count = older_count // SUMMARY_BLOCK_SIZE
+    summaries = []
+    for i in range(block_count):
+        block = lines[i * SUMMARY_BLOCK_SIZE:(i + 1) * SUMMARY_BLOCK_SIZE]
+        key = hashlib.sha256('\n'.join(block).encode('utf-8')).hexdigest()
+        if key not in summary_cache:
+            summary_cache[key] = summarize_block(block, summarize)
+        summaries.append(f'(이전 대화 요약) {summary_cache[key]}')
+    verbatim = lines[block_count * SUMMARY_BLOCK_SIZE:]
+    stats['summarized_messages'] = block_count * SUMMARY_BLOCK_SIZE
+
+    # 최신 항목부터 예산이 허락하는 만큼 포함 (가장 최근 메시지는 잘라서라도 포함)
+    selected = []
+    used = 0
+    for item in reversed(summaries + verbatim):
+        tokens = estimate_tokens(item)
+        if used + tokens > budget:
+            if not selected:
+                item = truncate(item, budget)
+                selected.append(item)
+                used += estimate_tokens(item)
+            break
+        selected.append(item)
+        used += tokens
+
+    stats['history_tokens'] = used
+    return '\n'.join(reversed(selected)), stats
@@ -1,31 +1,172 @@
-import os
-import pandas as pd
+import os, json, hashlib, argparse
 from dotenv import load_dotenv
 from langchain_community.document_loaders.csv_loader import CSVLoader
 from langchain_community.vectorstores import Chroma
 from langchain_google_genai.embeddings import GoogleGenerativeAIEmbeddings
+from nova_paper_store import CSV_COLUMNS
+from nova_func import paper_from_document
+from nova_vector_index import publish_snapshot, read_current, VECTOR_INDEX_DIR, VECTOR_INDEX_DTYPE
 
 # 환경 변수 로드
 load_dotenv()
 gemini_api_key = os.getenv('GOOGLE_API_KEY')
 
-# 논문 CSV 파일 로드
-# file path 경로 설정 필요
-loader = CSVLoader(
-    file_path="nova_arxiv_csv.csv", encoding="utf-8"
-)
-pages = loader.load()
-
-# Google Generative AI 임베딩 모델 사용
-emb_model = GoogleGenerativeAIEmbeddings(
-    model="models/embedding-001",
-    google_api_key=os.environ["GOOGLE_API_KEY"],
-)
-
-# Chroma 벡터 저장소 생성
-# persist_directory 경로 설정 필요
-vectordb = Chroma.from_documents(
-    pages,
-    emb_model,
-    persist_directory="database",
-)
\ No newline at end of file
+# 인덱싱 설정
+# csv_file, persist_directory 경로 설정 필요
+CSV_FILE = "nova_arxiv_csv.csv"
+PERSIST_DIRECTORY = "database"
+MANIFEST_FILE = "index_manifest.json"
+BATCH_SIZE = 64
+EXPORT_BATCH_SIZE = 1000  # 벡터 인덱스로 내보낼 때 Chroma에서 한 번에 읽을 행 수
+
+# 논문 메타데이터 (Chroma 필터 / 검색 결과에 사용, 값이 없는 항목은 제외)
+# Chroma 메타데이터는 None / 리스트를 저장할 수 없으므로 저자는 ", " 로 이은 문자열, 연도는 정수로 저장
+def paper_metadata(row):
+    metadata = {
+        "arXiv_ID": str(row.get("arXiv_ID") or "").strip(),
+        "title": str(row.get("Title") or "").strip(),
+        "authors": str(row.get("Authors") or "").strip(),
+        "abstract": str(row.get("Abstract") or "").strip(),
+        "conclusion": str(row.get("Conclusion") or "").strip(),
+    }
+    year = str(row.get("Year") or "").strip()
+    if year.isdigit():
+        metadata["year"] = int(year)
+    return {key: value for key, value in metadata.items() if value != ""}
+
+# 논문 CSV 파일 로드 (arXiv_ID -> Document)
+def load_documents(csv_file=CSV_FILE):
+    loader = CSVLoader(
+        file_path=csv_file, encoding="utf-8", source_column="arXiv_ID",
+        content_columns=CSV_COLUMNS, metadata_columns=CSV_COLUMNS,
+    )
+    documents = {}
+    for page in loader.load():
+        arxiv_id = str(page.metadata["source"]).strip()
+        if arxiv_id:
+            page.metadata = paper_metadata(page.metadata)
+            documents[arxiv_id] = page  # 중복 ID는 마지막 행 사용
+    return documents
+
+# 문서 내용 + 메타데이터 해시 (메타데이터 형식이 바뀌면 해시도 바뀌어 다시 인덱싱됨)
+def content_hash(document):
+    metadata = json.dumps(document.metadata, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256((document.page_content + "\n" + metadata).encode("utf-8")).hexdigest()
+
+# manifest 로드 (arXiv_ID -> 내용 해시)
+def load_manifest(manifest_path):
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return None
+
+# manifest 저장 (임시 파일에 쓴 뒤 교체하여 중단되어도 깨지지 않음)
+def save_manifest(manifest, manifest_path):
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=0)
+    os.replace(tmp_path, manifest_path)
+
+# 리스트를 batch_size 단위로 분할
+def batched(items, batch_size):
+    for i in range(0, len(items), batch_size):
+        yield items[i:i + batch_size]
+
+# Chroma의 임베딩 / 메타데이터를 메모리 매핑 벡터 인덱스 snapshot으로 내보내기 (NOVA_RAG_BACKEND=numpy 에서 사용)
+# 새 snapshot을 게시하면 실행 중인 앱이 다음 검색 때 교체
+def export_vector_index(vectordb, index_dir=VECTOR_INDEX_DIR, dtype=VECTOR_INDEX_DTYPE, batch_size=EXPORT_BATCH_SIZE):
+    from langchain_core.documents import Document
+
+    os.makedirs(index_dir, exist_ok=True)
+    vectors = []
+    papers = []
+    offset = 0
+    while True:
+        batch = vectordb.get(include=["embeddings", "metadatas", "documents"], limit=batch_size, offset=offset)
+        if not batch["ids"]:
+            break
+        for embedding, metadata, content in zip(batch["embeddings"], batch["metadatas"], batch["documents"]):
+            paper = paper_from_document(Document(page_content=content or "", metadata=metadata or {}))
+            del paper["Score"]
+            papers.append(paper)
+            vectors.append(embedding)
+        offset += len(batch["ids"])
+
+    if not papers:
+        print("내보낼 벡터가 없습니다.")
+        return None
+    name = publish_snapshot(index_dir, vectors, papers, dtype, meta={"embedding_model": "models/embedding-001"})
+    print(f"벡터 인덱스 게시 : {name} ({len(papers)}건, {dtype})")
+    return name
+
+# 증분 인덱싱
+# 새로 추가되거나 변경된 행만 임베딩하고, 삭제된 행의 벡터는 제거
+# batch 마다 manifest를 저장하므로 중단 후 다시 실행하면 남은 행부터 이어서 진행
+# vector_index_dir가 주어지면 변경 사항이 있을 때(또는 snapshot이 아직 없을 때) 벡터 인덱스 snapshot도 게시
+def update_index(csv_file=CSV_FILE, persist_directory=PERSIST_DIRECTORY, batch_size=BATCH_SIZE, vector_index_dir=None, dtype=VECTOR_INDEX_DTYPE):
+    os.makedirs(persist_directory, exist_ok=True)
+    manifest_path = os.path.join(persist_directory, MANIFEST_FILE)
+
+    # Google Generative AI 임베딩 모델 사용
+    emb_model = GoogleGenerativeAIEmbeddings(
+        model="models/embedding-001",
+        google_api_key=os.environ["GOOGLE_API_KEY"],
+    )
+
+    # Chroma 벡터 저장소 로드
+    vectordb = Chroma(
+        persist_directory=persist_directory,
+        embedding_function=emb_model,
+    )
+
+    manifest = load_manifest(manifest_path)
+    if manifest is None:
+        # manifest 없이 만들어진 기존 DB는 ID가 arXiv_ID가 아니므로 비우고 다시 구축
+        existing_ids = vectordb.get(include=[])["ids"]
+        for ids in batched(existing_ids, batch_size):
+            vectordb.delete(ids=ids)
+        manifest = {}
+        save_manifest(manifest, manifest_path)
+
+    documents = load_documents(csv_file)
+
+    # 삭제된 행 제거
+    removed_ids = [arxiv_id for arxiv_id in manifest if arxiv_id not in documents]
+    for ids in batched(removed_ids, batch_size):
+        vectordb.delete(ids=ids)
+        for arxiv_id in ids:
+            del manifest[arxiv_id]
+        save_manifest(manifest, manifest_path)
+
+    # 추가 / 변경된 행 임베딩
+    pending = []
+    for arxiv_id, document in documents.items():
+        digest = content_hash(document)
+        if manifest.get(arxiv_id) != digest:
+            pending.append((arxiv_id, document, digest))
+
+    for i, batch in enumerate(batched(pending, batch_size)):
+        vectordb.add_documents(
+            [document for _, document, _ in batch],
+            ids=[arxiv_id for arxiv_id, _, _ in batch],
+        )
+        for arxiv_id, _, digest in batch:
+            manifest[arxiv_id] = digest
+        save_manifest(manifest, manifest_path)
+        print(f"임베딩 진행 : {min((i + 1) * batch_size, len(pending))}/{len(pending)}")
+
+    print(f"인덱싱 완료 : 추가/변경 {len(pending)}건, 삭제 {len(removed_ids)}건, 전체 {len(manifest)}건")
+    if vector_index_dir and (pending or removed_ids or read_current(vector_index_dir) is None):
+        export_vector_index(vectordb, vector_index_dir, dtype)
+    return len(pending), len(removed_ids)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NOVA 논문 벡터 DB 증분 인덱싱")
+    parser.add_argument("--csv", default=CSV_FILE, help="논문 CSV 파일 경로")
+    parser.add_argument("--persist-dir", default=PERSIST_DIRECTORY, help="Chroma 저장 경로")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="임베딩 batch 크기")
+    parser.add_argument("--vector-index", default=VECTOR_INDEX_DIR, help="벡터 인덱스 snapshot 경로 (빈 값이면 내보내지 않음)")
+    parser.add_argument("--dtype", default=VECTOR_INDEX_DTYPE, choices=["float32", "float16"], help="벡터 인덱스 자료형")
+    args = parser.parse_args()
+
+    update_index(args.csv, args.persist_dir, args.batch_size, args.vector_index, args.dtype)
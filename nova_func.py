@@ -1,29 +1,36 @@
-import os, re
+import os, re, threading
 from dotenv import load_dotenv
-from langchain_google_genai.embeddings import GoogleGenerativeAIEmbeddings
-from langchain.vectorstores import Chroma
+from nova_cache import TTLCache
+import nova_sections
+from nova_trace import span, annotate
+from nova_api import call_api
 
 load_dotenv()
 gemini_api_key = os.getenv('GOOGLE_API_KEY')
 
-# 논문 내용 추출 함수
-def extract_info(text):
+# 벡터 DB 설정
+# persist_directory 경로 설정 필요
+PERSIST_DIRECTORY = "nova/database"
+EMBEDDING_MODEL = "models/embedding-001"
+# 검색 설정 (nova_rag_eval.py 로 recall / 지연 시간을 비교해 정할 수 있음)
+SEARCH_K = int(os.getenv('NOVA_SEARCH_K', 5))  # 검색할 논문 수
+SEARCH_FETCH_K = int(os.getenv('NOVA_SEARCH_FETCH_K', 10))  # 중복 제거 / MMR 전 가져올 문서 수
+SEARCH_MMR = os.getenv('NOVA_SEARCH_TYPE', 'mmr') == 'mmr'  # mmr (기본) / similarity
 
-    # 타이틀(Title) 추출
-    title_pattern = r"arXiv:.*\n(.*?)\n"
-    title_match = re.search(title_pattern, text, re.MULTILINE)
-    title = title_match.group(1).strip() if title_match else "제목을 찾을 수 없습니다."
+# 검색 backend (chroma: Chroma 벡터 DB, numpy: nova_vector_index 메모리 매핑 인덱스, snapshot이 없으면 Chroma 사용)
+RAG_BACKEND = os.getenv('NOVA_RAG_BACKEND', 'chroma')
 
-    # # 요약(Abstract) 추출
-    abstract_pattern = r"Abstract\s*(.*?)(?=\n[1-9]+\s+[A-Za-z]|\n[A-Z][a-z])"
-    abstract_match = re.search(abstract_pattern, text, re.DOTALL)
-    abstract = abstract_match.group(1).strip() if abstract_match else "요약을 찾을 수 없습니다."
-
-    # 결론(Conclusion) 추출
-    conclusion_pattern = r"(?<=\n)(\d+\s)?(Conclusion|Concluding(?:\s\w+)?)\s*(.*?)(?=\n[A-Z][a-z]+|\Z)"
-    conclusion_match = re.search(conclusion_pattern, text, re.DOTALL)
-    conclusion = conclusion_match.group(3).strip() if conclusion_match else "결론을 찾을 수 없습니다."
+# 질의 임베딩 캐시 설정 (최대 개수, 유지 시간(초))
+EMBEDDING_CACHE_SIZE = int(os.getenv('NOVA_EMBEDDING_CACHE_SIZE', 1024))
+EMBEDDING_CACHE_TTL = int(os.getenv('NOVA_EMBEDDING_CACHE_TTL', 24 * 60 * 60))
 
+# 논문 내용 추출 함수
+# OCR 텍스트 전체를 한 번만 훑어 섹션 제목 / 페이지 구분선을 색인한 뒤 제목 / 요약 / 결론을 가져옴 (nova_sections)
+def extract_info(text):
+    title, abstract, conclusion = nova_sections.extract_info(text)
+    title = title or "제목을 찾을 수 없습니다."
+    abstract = abstract or "요약을 찾을 수 없습니다."
+    conclusion = conclusion or "결론을 찾을 수 없습니다."
     return title, abstract, conclusion
 
 # 논문 ID 추출
@@ -52,37 +59,220 @@ def extract_conclusion(page_content):
     conclusion = page_content[conclusion_start:].strip()
     return conclusion if conclusion else "없음"
 
-# RAG 활용
-def use_rag(user_query):
-    try:
-        emb_model = GoogleGenerativeAIEmbeddings(
-            model="models/embedding-001",
-            google_api_key=os.environ["GOOGLE_API_KEY"],
-        )
+# 질의 정규화 (캐시 키)
+def normalize_query(text):
+    return re.sub(r"\s+", " ", text).strip().lower()
 
-        vector_store = Chroma(
-            # persist_directory 경로 설정
-            persist_directory="nova/database", 
-            embedding_function=emb_model
-        )
+# 질의 임베딩 캐시를 적용한 임베딩 모델
+# 캐시에 없는 질의는 nova_api를 거쳐 호출 (같은 질의를 동시에 요청하면 한 번만 호출)
+# Chroma는 embed_documents / embed_query만 사용하므로 langchain_core Embeddings를 상속하지 않음 (import 시간 절약)
+class CachedEmbeddings:
+    def __init__(self, embeddings, cache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts):
+        return call_api('embedding', None, self.embeddings.embed_documents, texts)
+
+    def embed_query(self, text):
+        key = normalize_query(text)
+        vector = self.cache.get(key)
+        annotate(cache_hit=vector is not None)
+        if vector is None:
+            vector = call_api('embedding', key, self.embeddings.embed_query, text)
+            self.cache.set(key, vector)
+        return vector
+
+# 프로세스 전역 임베딩 캐시 / 임베딩 모델 / 벡터 DB (모든 세션이 공유)
+embedding_cache = TTLCache(maxsize=EMBEDDING_CACHE_SIZE, ttl=EMBEDDING_CACHE_TTL)
+_embeddings = None
+_vector_store = None
+_vector_index = None
+_vector_store_lock = threading.Lock()
+
+# 임베딩 모델 로드 (질의 임베딩 캐시 적용, 프로세스당 한 번)
+def get_embeddings():
+    global _embeddings
+    if _embeddings is None:
+        with _vector_store_lock:
+            if _embeddings is None:
+                from langchain_google_genai.embeddings import GoogleGenerativeAIEmbeddings
+
+                _embeddings = CachedEmbeddings(
+                    GoogleGenerativeAIEmbeddings(
+                        model=EMBEDDING_MODEL,
+                        google_api_key=os.environ["GOOGLE_API_KEY"],
+                    ),
+                    embedding_cache,
+                )
+    return _embeddings
+
+# 벡터 DB 로드 (프로세스당 한 번만 연다)
+# LangChain Google / Chroma 모듈은 무거우므로 첫 RAG 검색(또는 백그라운드 warmup) 때 로드
+def get_vector_store():
+    global _vector_store
+    if _vector_store is None:
+        emb_model = get_embeddings()
+        with _vector_store_lock:
+            if _vector_store is None:
+                from langchain_community.vectorstores import Chroma
+
+                _vector_store = Chroma(
+                    persist_directory=PERSIST_DIRECTORY,
+                    embedding_function=emb_model
+                )
+    return _vector_store
 
-        retriever = vector_store.as_retriever(
-            search_type="mmr", 
-            search_kwargs={"k": 5, "fetch_k": 10}
+# 메모리 매핑 벡터 인덱스 로드 (NOVA_RAG_BACKEND=numpy 일 때만, 게시된 snapshot이 없으면 None)
+def get_vector_index():
+    global _vector_index
+    if RAG_BACKEND != "numpy":
+        return None
+    if _vector_index is None:
+        with _vector_store_lock:
+            if _vector_index is None:
+                from nova_vector_index import VectorIndex
+                _vector_index = VectorIndex()
+    return _vector_index if _vector_index.snapshot() is not None else None
+
+# 검색 backend 미리 로드 (백그라운드 warmup)
+def load_retrieval_backend():
+    if get_vector_index() is None:
+        get_vector_store()
+    get_embeddings()
+
+# 검색기 로드 (MMR 검색, LangChain 체인용)
+def get_retriever():
+    return get_vector_store().as_retriever(
+        search_type="mmr",
+        search_kwargs={"k": SEARCH_K, "fetch_k": SEARCH_FETCH_K}
+    )
+
+# 질의 임베딩 (임베딩 캐시 사용, 같은 질의로 검색했다면 API를 다시 호출하지 않음)
+def embed_query(user_query):
+    return get_embeddings().embed_query(user_query)
+
+# 임베딩 캐시 통계 (hit/miss)
+def get_embedding_cache_stats():
+    return embedding_cache.stats()
+
+# 메타데이터 필터 생성 (연도 / 연도 범위 Chroma where 조건)
+def build_filters(year=None, year_from=None, year_to=None):
+    conditions = []
+    if year is not None:
+        conditions.append({"year": int(year)})
+    if year_from is not None:
+        conditions.append({"year": {"$gte": int(year_from)}})
+    if year_to is not None:
+        conditions.append({"year": {"$lte": int(year_to)}})
+
+    if len(conditions) == 1:
+        return conditions[0]
+    if conditions:
+        return {"$and": conditions}
+    return None
+
+# 저자 필터 (numpy backend와 같이 authors 메타데이터에 대소문자 구분 없는 부분 일치)
+# Chroma where에는 부분 일치 연산자가 없으므로 조건에 맞는 논문 ID를 먼저 찾아 arXiv_ID $in 조건으로 변환
+def author_filter(vector_store, where, author):
+    from nova_vector_index import normalize_authors
+
+    author = normalize_authors(author)
+    if not author:
+        return where
+    rows = vector_store.get(where=where, include=["metadatas"])
+    ids = [metadata["arXiv_ID"] for metadata in rows["metadatas"]
+           if metadata and "arXiv_ID" in metadata and author in normalize_authors(metadata.get("authors"))]
+    return {"arXiv_ID": {"$in": ids}} if ids else None
+
+# 검색 결과 문서 -> 논문 정보
+# 메타데이터가 없는 예전 인덱스는 page_content를 파싱
+def paper_from_document(document, score=None):
+    metadata = document.metadata or {}
+    if "title" in metadata:
+        paper = {
+            "Title": metadata.get("title", "없음"),
+            "Year": metadata.get("year"),
+            "Authors": metadata.get("authors", ""),
+            "Abstract": metadata.get("abstract", "없음"),
+            "Conclusion": metadata.get("conclusion", "없음"),
+            "arXiv_id": metadata.get("arXiv_ID", "없음"),
+        }
+    else:
+        paper = {
+            "Title": extract_title(document.page_content),
+            "Year": None,
+            "Authors": "",
+            "Abstract": extract_abstract(document.page_content),
+            "Conclusion": extract_conclusion(document.page_content),
+            "arXiv_id": extract_arxiv_id(document.page_content),
+        }
+    paper["Score"] = score
+    return paper
+
+# 논문 검색 (중복 없는 상위 k개 논문과 관련도 점수 반환)
+# 필터는 벡터 검색 단계에서 적용되어 조건에 맞는 문서만 비교
+# mmr=True 이면 fetch_k개 후보 중에서 관련도와 다양성을 함께 고려해 선택
+def search_papers(user_query, k=SEARCH_K, fetch_k=SEARCH_FETCH_K, year=None, year_from=None, year_to=None, author=None, mmr=SEARCH_MMR):
+    vector_index = get_vector_index()
+    with span('embed', chars=len(user_query)):
+        embedding = embed_query(user_query)
+
+    if vector_index is not None:
+        filters = {"year": year, "year_from": year_from, "year_to": year_to, "author": author}
+        with span('vector_search', backend='numpy', k=k, mmr=mmr) as s:
+            if mmr:
+                papers = vector_index.mmr(embedding, k, fetch_k, **filters)
+            else:
+                papers = vector_index.search(embedding, k, **filters)
+            s.set(results=len(papers))
+        return papers
+
+    import numpy as np
+    from langchain_core.documents import Document
+    from langchain_community.vectorstores.utils import maximal_marginal_relevance
+    from nova_vector_index import MMR_LAMBDA
+
+    vector_store = get_vector_store()
+    where = build_filters(year, year_from, year_to)
+    with span('vector_search', backend='chroma', k=max(k, fetch_k), mmr=mmr, filtered=where is not None or bool(author)) as s:
+        if author:
+            where = author_filter(vector_store, where, author)
+            if where is None:
+                s.set(results=0)
+                return []
+        # 유사도 상위 fetch_k개를 임베딩과 함께 가져와 MMR은 직접 계산 (선택된 논문도 관련도 점수를 가짐)
+        result = vector_store._collection.query(
+            query_embeddings=[embedding], n_results=max(k, fetch_k), where=where,
+            include=["documents", "metadatas", "distances", "embeddings"],
         )
+        documents = [Document(page_content=content or "", metadata=metadata or {})
+                     for content, metadata in zip(result["documents"][0], result["metadatas"][0])]
+        order = range(len(documents))
+        if mmr and documents:
+            order = maximal_marginal_relevance(np.array(embedding, dtype=np.float32), result["embeddings"][0], k=k, lambda_mult=MMR_LAMBDA)
+        results = [(documents[i], result["distances"][0][i]) for i in order]
+        s.set(results=len(results))
+    relevance = vector_store._select_relevance_score_fn()  # 거리 -> 관련도 (0~1, 높을수록 관련)
+
+    papers = []
+    seen = set()
+    for document, distance in results:
+        paper = paper_from_document(document, relevance(distance))
+        if paper["arXiv_id"] in seen:
+            continue
+        seen.add(paper["arXiv_id"])
+        papers.append(paper)
+        if len(papers) >= k:
+            break
+    return papers
 
-        documents = retriever.get_relevant_documents(user_query)
-
-        dict_response = {}
-        if documents:
-            document = documents[0]  # 첫 번째 검색 결과 문서
-            dict_response = {
-                "Title": extract_title(document.page_content),
-                "Abstract": extract_abstract(document.page_content),
-                "Conclusion": extract_conclusion(document.page_content),
-                "arXiv_id": extract_arxiv_id(document.page_content)
-            }
-        return dict_response        
+# RAG 활용 (가장 관련도 높은 논문 정보 반환)
+def use_rag(user_query, **filters):
+    try:
+        # 채팅에는 가장 관련 있는 논문 하나만 사용
+        papers = search_papers(user_query, k=1, **filters)
+        return papers[0] if papers else {}
 
     except Exception as e:
         print(f"오류 발생: {e}")
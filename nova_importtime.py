@@ -0,0 +1,98 @@
+import os, sys, json, time, argparse, subprocess
+
+# 모듈 import 시간 측정 (python -X importtime)
+# 새 프로세스에서 모듈을 import하여 전체 시간과 오래 걸린 모듈을 출력하고, 결과를 기록 파일에 추가하여 변화를 추적
+# 사용법: python nova_importtime.py [nova_ui] [--top 15] [--repeat 3]
+
+IMPORTTIME_HISTORY = "nova_importtime_history.jsonl"
+
+# -X importtime 출력 파싱 -> [(모듈, self_us, cumulative_us, 깊이)]
+def parse_importtime(stderr):
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+# 한 번 측정 (새 프로세스, 같은 폴더 기준)
+def measure_once(module):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import 실패")
+    return wall, parse_importtime(result.stderr)
+
+# 현재 git commit (없으면 None)
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+# 최상위 패키지별 누적 시간 (가장 바깥에서 import된 시점 기준)
+def top_level_modules(rows):
+    totals = {}
+    for name, _, cumulative_us, depth in rows:
+        if depth == 1:  # import 대상 모듈이 직접 불러온 패키지
+            totals[name] = totals.get(name, 0) + cumulative_us
+    return totals
+
+# 여러 번 측정하여 가장 빠른 결과 사용 (디스크 캐시 영향 줄이기)
+def run(module="nova_ui", top=15, repeat=3, history_file=IMPORTTIME_HISTORY):
+    best = None
+    for _ in range(repeat):
+        wall, rows = measure_once(module)
+        total_us = next((cumulative_us for name, _, cumulative_us, depth in rows if name == module and depth == 0), 0)
+        if best is None or total_us < best[1]:
+            best = (wall, total_us, rows)
+    wall, total_us, rows = best
+
+    modules = sorted(top_level_modules(rows).items(), key=lambda item: item[1], reverse=True)[:top]
+    print(f"import {module}: {total_us / 1000:.1f}ms (프로세스 시작 포함 {wall * 1000:.0f}ms, 모듈 {len(rows)}개)")
+    for name, cumulative_us in modules:
+        print(f"  {cumulative_us / 1000:>9.1f}ms  {name}")
+
+    record = {
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "module": module,
+        "import_ms": round(total_us / 1000, 1),
+        "wall_ms": round(wall * 1000, 1),
+        "module_count": len(rows),
+        "top": {name: round(cumulative_us / 1000, 1) for name, cumulative_us in modules},
+    }
+
+    # 이전 기록과 비교 후 추가
+    if history_file:
+        previous = None
+        if os.path.exists(history_file):
+            with open(history_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if entry.get("module") == module:
+                        previous = entry
+        if previous is not None:
+            change = record["import_ms"] - previous["import_ms"]
+            print(f"이전 기록 대비 ({previous.get('commit')} {previous['ts']}): {change:+.1f}ms")
+        with open(history_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return record
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NOVA import 시간 측정")
+    parser.add_argument("module", nargs="?", default="nova_ui", help="측정할 모듈")
+    parser.add_argument("--top", type=int, default=15, help="출력할 모듈 수")
+    parser.add_argument("--repeat", type=int, default=3, help="측정 횟수 (가장 빠른 결과 사용)")
+    parser.add_argument("--history", default=IMPORTTIME_HISTORY, help="기록 파일 (빈 값이면 기록하지 않음)")
+    args = parser.parse_args()
+
+    run(args.module, args.top, args.repeat, args.history)
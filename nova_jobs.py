@@ -0,0 +1,120 @@
+import os, time, uuid, threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+# 백그라운드 작업 설정
+# PDF 처리는 poppler 하위 프로세스 / Vision API 대기가 대부분이므로 스레드 풀로 충분
+JOB_WORKERS = int(os.getenv('NOVA_JOB_WORKERS', 2))  # 동시에 처리할 작업 수
+JOB_MAX_QUEUED = int(os.getenv('NOVA_JOB_MAX_QUEUED', 8))  # 처리 대기 중인 작업 수 상한
+
+# 대기열이 가득 찬 경우
+class JobQueueFull(Exception):
+    pass
+
+# 작업 하나 (상태 / 진행률 / 결과, 여러 스레드에서 읽고 쓰므로 값 단위로만 갱신)
+class Job:
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.state = 'queued'  # queued / running / done / failed / cancelled
+        self.stage = '대기 중'
+        self.done = 0
+        self.total = 0
+        self.result = None
+        self.error = None
+        self.errors = []  # 작업 중 발생한 부분 오류 (예: 페이지별 OCR 실패)
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    # 진행 상황 보고 (작업 함수에서 호출)
+    def report(self, done, total, stage=None):
+        self.done = done
+        self.total = total
+        if stage is not None:
+            self.stage = stage
+
+    # 취소 요청 (대기 중이면 바로 취소, 실행 중이면 작업 함수가 cancel_event를 확인하고 중단)
+    def cancel(self):
+        self.cancel_event.set()
+        if self.future is not None and self.future.cancel():
+            self.state = 'cancelled'
+            self.finished_at = time.time()
+
+    @property
+    def finished(self):
+        return self.state in ('done', 'failed', 'cancelled')
+
+    # 진행률 (0~1)
+    def progress(self):
+        return min(self.done / self.total, 1.0) if self.total else 0.0
+
+# 작업 대기열 (프로세스 전역에서 여러 세션이 공유)
+# 실행 중 + 대기 중인 작업 수를 제한하여 업로드가 몰려도 메모리 / 스레드 사용량 유지
+class JobQueue:
+    def __init__(self, max_workers=JOB_WORKERS, max_queued=JOB_MAX_QUEUED):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='nova-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    # 작업 등록, function(job, *args)는 백그라운드 스레드에서 실행
+    def submit(self, name, function, *args):
+        with self._lock:
+            self._prune()
+            if self.active_count() >= self.max_workers + self.max_queued:
+                raise JobQueueFull(f'처리 대기 중인 작업이 너무 많습니다. ({self.max_queued}개)')
+            job = Job(name)
+            self._jobs[job.id] = job
+            job.future = self._pool.submit(self._run, job, function, args)
+        return job
+
+    def _run(self, job, function, args):
+        if job.cancel_event.is_set():
+            job.state = 'cancelled'
+            job.finished_at = time.time()
+            return
+        job.state = 'running'
+        job.stage = '처리 중'
+        job.started_at = time.time()
+        try:
+            job.result = function(job, *args)
+            job.state = 'done'
+        except CancelledError:
+            job.state = 'cancelled'
+        except Exception as e:
+            job.error = str(e)
+            job.state = 'failed'
+        finally:
+            job.finished_at = time.time()
+
+    # 끝난 지 오래된 작업 정리 (lock 안에서 호출)
+    def _prune(self, max_age=60 * 60):
+        now = time.time()
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and now - (job.finished_at or now) > max_age]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    # 실행 중 + 대기 중인 작업 수
+    def active_count(self):
+        return sum(1 for job in list(self._jobs.values()) if not job.finished)
+
+    # 작업 통계
+    def stats(self):
+        jobs = list(self._jobs.values())
+        return {
+            'running': sum(1 for job in jobs if job.state == 'running'),
+            'queued': sum(1 for job in jobs if job.state == 'queued'),
+            'done': sum(1 for job in jobs if job.state == 'done'),
+            'failed': sum(1 for job in jobs if job.state == 'failed'),
+            'cancelled': sum(1 for job in jobs if job.state == 'cancelled'),
+        }
+
+    def shutdown(self, wait=False):
+        for job in list(self._jobs.values()):
+            job.cancel()
+        self._pool.shutdown(wait=wait)
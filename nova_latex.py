@@ -0,0 +1,287 @@
+import re
+
+# LaTeX -> 일반 텍스트 변환 (한 번의 선형 탐색)
+# 정규식을 여러 번 적용하는 대신 토큰 단위로 한 번만 읽으면서 명령어 / 중첩 괄호 / 주석 / 환경을 처리
+
+# 인자 내용을 남기는 서식 명령어 (\emph{text} -> text)
+KEEP_ARGUMENT_COMMANDS = {
+    "emph", "textbf", "textit", "texttt", "textsc", "textsf", "textrm", "textnormal", "textup", "textsl",
+    "text", "mbox", "hbox", "underline", "uline", "hl", "mathrm", "mathbf", "mathit", "mathsf", "mathtt",
+    "mathcal", "mathbb", "boldsymbol", "bm", "operatorname",
+}
+
+# 마지막 인자만 남기는 명령어 (\textcolor{red}{text} -> text)
+KEEP_LAST_ARGUMENT_COMMANDS = {"textcolor", "colorbox", "href"}
+
+# 기호 명령어
+SYMBOL_COMMANDS = {
+    "ldots": "...", "dots": "...", "cdots": "...", "textendash": "-", "textemdash": "-", "textasciitilde": "∼",
+    "times": "x", "pm": "±", "sim": "∼", "approx": "≈", "leq": "≤", "geq": "≥", "le": "≤", "ge": "≥",
+    "LaTeX": "LaTeX", "TeX": "TeX", "S": "§", "ie": "i.e.", "eg": "e.g.", "etal": "et al.",
+}
+
+# 내용까지 통째로 제거하는 환경
+DROP_ENVIRONMENTS = {
+    "equation", "equation*", "align", "align*", "eqnarray", "eqnarray*", "gather", "gather*", "multline", "multline*",
+    "figure", "figure*", "table", "table*", "tabular", "tabular*", "tabularx", "algorithm", "algorithmic",
+    "lstlisting", "verbatim", "minted", "tikzpicture", "comment", "thebibliography",
+}
+
+# 특수 토큰 (하나의 정규식, 그 사이의 일반 텍스트는 그대로 복사)
+# 자주 나오는 단순한 형태(중첩 없는 인자 / 괄호 / 수식)는 한 토큰으로 처리하고, 중첩된 { } 는 여는 / 닫는 괄호를 따로 읽어 깊이를 셈
+_simple_text = r"[^{}\\%$()^_]*"  # 더 처리할 것이 없는 인자 내용
+_simple_argument = _simple_text + r"(?:\{" + _simple_text + r"\}" + _simple_text + r")*"  # 한 단계까지 중첩된 { } 허용
+_options = r"(?:\[[^\[\]{}]*\])*"  # [옵션] 인자
+_token = re.compile(r"""
+    \\(?:
+        (?P<environment>(?P<environment_kind>begin|end)[ \t]*\{(?P<environment_name>[^{}]*)\}""" + _options + r""")
+      | (?P<command>(?P<name>[A-Za-z]+)\*?""" + _options + r"""(?:\{(?P<argument>""" + _simple_argument + r""")\}|(?P<open>\{))?)
+      | (?P<line_break>\\\*?""" + _options + r""")
+      | (?P<escaped>[%&_\#$\{\}])
+      | (?P<math_delimiter>[()\[\]])
+      | (?P<accent>['`^"~=.\-/@])
+      | (?P<spacing>[^A-Za-z]|\Z)
+    )
+  | \{(?:(?P<group_simple>(?P<group_text>""" + _simple_text + r""")\})|(?P<open_brace>))
+  | \}(?P<close_brace>)
+  | \$(?:(?P<math_simple>(?P<math_text>[^$\\{}%]*)\$)|(?P<dollar>))
+  | \((?:(?P<paren_simple>[^(){}\\$%]*\))|(?P<paren>))
+  | %(?P<comment>[^\n]*\n?)
+  | \^(?P<superscript>)
+  | _(?P<subscript>)
+""", re.VERBOSE)  # 모든 갈래가 글자 하나로 시작해야 정규식 엔진이 토큰 시작 문자만 빠르게 찾음
+_special_commands = KEEP_ARGUMENT_COMMANDS | KEEP_LAST_ARGUMENT_COMMANDS | set(SYMBOL_COMMANDS) | {"and"}
+_math_scripts = str.maketrans("", "", "^_")
+_space_before_punctuation = re.compile(r" (?=[.,;:!?])")
+
+# 명령어 인자 사이에 올 수 있는 [옵션] (\newcommand{\x}[1]{...})
+_argument_gap = re.compile(r"(?:\[[^\[\]{}]*\])*")
+
+# 괄호 / 이스케이프 문자 / 주석 (주석 안의 괄호는 세지 않음)
+_closing = {
+    "{": re.compile(r"\\.|%[^\n]*|[{}]", re.DOTALL),
+    "(": re.compile(r"\\.|%[^\n]*|[()]", re.DOTALL),
+}
+
+# 닫는 괄호 위치 찾기 (중첩 고려, 없으면 -1)
+def find_closing(text, start, open_char="{"):
+    depth = 0
+    for match in _closing[open_char].finditer(text, start):
+        ch = match.group(0)
+        if ch == open_char:
+            depth += 1
+        elif len(ch) == 1 and ch != "%":
+            depth -= 1
+            if depth == 0:
+                return match.start()
+    return -1
+
+# 짝이 맞는 괄호 위치 (여는 괄호 위치 -> 닫는 괄호 위치), 텍스트를 한 번만 훑음
+def match_brackets(text, open_char="{"):
+    pairs = {}
+    opened = []
+    for match in _closing[open_char].finditer(text):
+        ch = match.group(0)
+        if ch == open_char:
+            opened.append(match.start())
+        elif len(ch) == 1 and ch != "%" and opened:
+            pairs[opened.pop()] = match.start()
+    return pairs
+
+# \end{env} 위치 찾기 (같은 환경의 중첩 고려), \end{env} 다음 위치 반환
+def skip_environment(text, i, name):
+    begin = f"\\begin{{{name}}}"
+    end = f"\\end{{{name}}}"
+    depth = 1
+    while depth:
+        next_end = text.find(end, i)
+        if next_end < 0:
+            return len(text)
+        next_begin = text.find(begin, i, next_end)
+        if next_begin >= 0:
+            depth += 1
+            i = next_begin + len(begin)
+        else:
+            depth -= 1
+            i = next_end + len(end)
+    return i
+
+# LaTeX 텍스트 정리
+# 하나의 토큰 정규식을 finditer 로 한 번 훑으면서 토큰 사이의 일반 텍스트를 그대로 복사
+# 제거할 인자(\cite{...}, \footnote{...} 등)는 { } 깊이를 세어 닫힐 때까지 출력하지 않고, 남기는 그룹의 괄호는 출력하지 않음
+# 제거할 환경 / 중첩된 괄호만 닫는 위치를 찾아 그 뒤에서 탐색을 다시 시작
+# drop_parentheses=True 이면 수식 밖의 ( ) 안 내용 제거 (약어 등)
+# and_separator 가 있으면 \and 를 해당 문자로 변환하고 \\ 줄바꿈 뒤의 소속 기관 등은 다음 \and 까지 제거 (저자 목록용)
+def clean_latex(text, drop_parentheses=True, and_separator=None):
+    out = []
+    append = out.append
+    n = len(text)
+    pos = 0  # 아직 복사하지 않은 일반 텍스트의 시작 위치
+    scan = 0  # 토큰 탐색을 시작할 위치
+    math = False
+    depth = 0  # 제거 중인 인자의 { } 깊이 (0 이면 출력 중)
+    repeat = False  # 제거 중인 인자가 끝난 뒤 이어지는 { } 도 인자로 제거할지
+    resume = 0  # 제거 중인 인자가 닫히지 않으면 다시 탐색할 위치 (여는 괄호 다음)
+    braces = None  # 닫히지 않은 인자가 있었으면 짝이 맞는 { } 위치 (이후에는 닫히는 인자만 제거, 다시 읽는 것은 한 번뿐)
+    parentheses = None  # 닫히지 않은 괄호가 있었으면 짝이 맞는 ( ) 위치 (이후 괄호마다 끝까지 다시 찾지 않음)
+    argument_end = -1  # 마지막으로 제거한 명령어 인자의 끝 위치
+    affiliation = None  # 저자 목록에서 \\ 줄바꿈 이후 출력 위치 (다음 \and 에서 제거)
+    while scan < n:
+        for match in _token.finditer(text, scan):
+            kind = match.lastgroup
+
+            # 인자 제거 중에는 괄호 깊이만 셈
+            if depth:
+                if kind == "close_brace":
+                    depth -= 1
+                    if not depth:
+                        pos = match.end()
+                        if repeat:
+                            argument_end = pos
+                elif kind == "open_brace" or (kind == "command" and match.group("open")):
+                    depth += 1
+                continue
+
+            start, end = match.span()
+            if kind == "command":
+                append(text[pos:start])
+                pos = end
+                name, argument, opened = match.group("name", "argument", "open")
+                if name not in _special_commands:
+                    # 그 외 명령어는 인자까지 제거 (\cite{...}, \footnote{...}, \label{...} 등)
+                    append(" ")
+                    if not opened:
+                        argument_end = pos
+                    elif braces is None or end - 1 in braces:
+                        depth, repeat, resume = 1, True, pos
+                elif name in KEEP_ARGUMENT_COMMANDS:
+                    # 인자 내용만 남김 (더 깊이 중첩된 인자는 괄호만 건너뛰고 계속 읽음)
+                    if argument:
+                        append(argument.replace("{", "").replace("}", "") if "{" in argument else argument)
+                elif name in SYMBOL_COMMANDS:
+                    append(SYMBOL_COMMANDS[name])
+                    if argument:
+                        append(argument)
+                elif name in KEEP_LAST_ARGUMENT_COMMANDS:
+                    # 첫 인자(색 / URL)만 제거하고 뒤의 인자는 일반 그룹으로 남김
+                    if opened and (braces is None or end - 1 in braces):
+                        depth, repeat, resume = 1, False, pos
+                elif and_separator:  # \and
+                    if affiliation is not None:
+                        del out[affiliation:]
+                        affiliation = None
+                    append(and_separator)
+                else:
+                    append(" ")
+            elif kind == "escaped":
+                # \ 만 빼고 문자는 다음 일반 텍스트와 함께 복사
+                append(text[pos:start])
+                pos = start + 1
+            elif kind == "paren_simple" or kind == "paren":
+                # 괄호 안 내용 제거 (수식 안 / 닫는 괄호가 없으면 그대로 둠)
+                if not drop_parentheses or math:
+                    continue
+                if kind == "paren_simple":
+                    append(text[pos:start])
+                    pos = end
+                    continue
+                if parentheses is None:
+                    close = find_closing(text, start, "(")
+                    if close < 0:
+                        parentheses = match_brackets(text, "(")
+                else:
+                    close = parentheses.get(start, -1)
+                if close >= 0:
+                    append(text[pos:start])
+                    pos = scan = close + 1
+                    break
+            elif kind == "math_simple":
+                append(text[pos:start])
+                if math:
+                    # 앞에서 열린 수식이 닫히는 $ (다음 $ 부터 다시 탐색)
+                    math = False
+                    pos = scan = start + 1
+                    break
+                append(match.group("math_text").translate(_math_scripts))
+                pos = end
+            elif kind == "group_simple" or kind == "open_brace":
+                # 앞 명령어에 이어지는 인자면 제거, 아니면 괄호만 제거
+                if argument_end >= 0 and (start == argument_end or _argument_gap.fullmatch(text, argument_end, start)):
+                    if kind == "group_simple":
+                        pos = argument_end = end
+                        continue
+                    if braces is None or start in braces:
+                        pos = end
+                        depth, repeat, resume = 1, True, pos
+                        continue
+                append(text[pos:start])
+                pos = end
+                if kind == "group_simple":
+                    append(match.group("group_text"))
+            elif kind == "close_brace" or kind == "comment" or kind == "accent":
+                # 남기는 그룹의 닫는 괄호 / 주석 제거, 악센트는 글자만 유지 (\- \/ \@ 도 제거)
+                append(text[pos:start])
+                pos = end
+            elif kind == "dollar":  # 인라인 수식
+                append(text[pos:start])
+                math = not math
+                pos = end
+            elif kind == "superscript" or kind == "subscript":
+                if math:
+                    append(text[pos:start])
+                    pos = end
+            elif kind == "spacing":
+                # \, \; 등 간격 명령어는 공백
+                append(text[pos:start])
+                append(" ")
+                pos = end
+            elif kind == "line_break":
+                append(text[pos:start])
+                if and_separator and affiliation is None:
+                    affiliation = len(out)
+                append(" ")
+                pos = end
+            elif kind == "math_delimiter":  # \( \) \[ \] 수식
+                append(text[pos:start])
+                append(" ")
+                math = text[start + 1] in "(["
+                pos = end
+            elif kind == "environment":
+                append(text[pos:start])
+                append(" ")
+                pos = end
+                name = match.group("environment_name")
+                if match.group("environment_kind") == "begin" and name in DROP_ENVIRONMENTS:
+                    pos = scan = skip_environment(text, pos, name)
+                    break
+        else:
+            if depth:
+                # 닫히지 않은 인자는 제거하지 않고 여는 괄호 다음부터 다시 읽음
+                depth = 0
+                braces = match_brackets(text, "{")
+                pos = scan = resume
+                continue
+            break
+
+    append(text[pos:])
+    if affiliation is not None:
+        del out[affiliation:]
+    text = "".join(out)
+
+    # ~ 를 공백으로 바꾸고 공백 정리 및 문장 부호 앞 공백 제거
+    return _space_before_punctuation.sub("", " ".join(text.replace("~", " ").split()))
+
+# 논문 내용 추출 함수 - 요약 및 결론 후처리
+def clean_text(text):
+    if text is None:
+        return None
+    return clean_latex(text)
+
+# 논문 내용 추출 함수 - 저자 후처리
+def clean_authors(authors_text):
+    if authors_text is None:
+        return []
+
+    authors_text = clean_latex(authors_text, and_separator=",")
+    authors = [author.strip() for author in authors_text.split(",")]
+    return [author for author in authors if author]  # 빈 문자열 제거
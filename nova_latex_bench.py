@@ -0,0 +1,120 @@
+import os
+import re
+import time
+import difflib
+import argparse
+from nova_latex import clean_text, clean_authors
+
+# LaTeX 정리 함수 벤치마크
+# 실제 .tex 파일들에서 요약 / 결론 / 저자 부분을 뽑아 기존 정규식 방식과 새 방식의 처리 속도와 결과 차이를 비교
+# 사용법: python nova_latex_bench.py <tex 파일 또는 폴더> [--repeat 5] [--show-diffs 5]
+
+# 기존 방식 (정규식 여러 번 적용) - 비교용
+def legacy_clean_text(text):
+    if text is None:
+        return None
+    text = re.sub(r"\\(emph|textbf|url|textcolor|textsuperscript|[a-zA-Z]+)\{.*?\}", "", text)
+    text = re.sub(r"\{(.*?)\}", "", text)
+    text = re.sub(r"\((.*?)\)", "", text)
+    text = re.sub(r"\\begin\{.*?\}|\\end\{.*?\}", "", text)
+    text = re.sub(r"\\[a-zA-Z]+", "", text)
+    text = re.sub(r"%.*?$", "", text, flags=re.MULTILINE)
+    text = re.sub(r"\s*\.\s*\}", "", text)
+    text = re.sub(r"\s*\}", "", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+def legacy_clean_authors(authors_text):
+    if authors_text is None:
+        return []
+    authors_text = re.sub(r"%.*?$", "", authors_text, flags=re.MULTILINE)
+    authors_text = re.sub(r"\\thanks\{.*?\}", "", authors_text)
+    authors_text = re.sub(r"\\textsuperscript\{.*?\}", "", authors_text)
+    authors_text = re.sub(r"\\and", ",", authors_text)
+    authors_text = re.sub(r"\\[a-zA-Z]+", "", authors_text)
+    authors_text = re.sub(r"[\{\}]", "", authors_text)
+    authors = re.split(r",+", authors_text)
+    authors = [legacy_clean_text(author.strip()) for author in authors]
+    return [author for author in authors if author]
+
+# .tex 파일 목록
+def find_tex_files(paths):
+    tex_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                tex_files += [os.path.join(root, f) for f in files if f.endswith(".tex")]
+        elif path.endswith(".tex"):
+            tex_files.append(path)
+    return sorted(tex_files)
+
+# 요약 / 결론 / 저자 원문 추출
+def extract_segments(content):
+    texts = []
+    authors = []
+    abstract = re.search(r"\\begin\{abstract\}(.*?)\\end\{abstract\}", content, re.DOTALL)
+    if abstract:
+        texts.append(abstract.group(1))
+    conclusion = re.search(r"\\section\*?\{[^}]*[Cc]onclu[^}]*\}(.*?)(?=\\section|\\end\{document\}|\Z)", content, re.DOTALL)
+    if conclusion:
+        texts.append(conclusion.group(1))
+    author = re.search(r"\\author\{(.*?)\\maketitle|\\author\{(.*?)\}\s*$", content, re.DOTALL | re.MULTILINE)
+    if author:
+        authors.append(author.group(1) or author.group(2))
+    return texts, authors
+
+# 처리 시간 측정 (repeat 번 반복 중 가장 빠른 시간)
+def measure(function, inputs, repeat):
+    best = float("inf")
+    outputs = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [function(item) for item in inputs]
+        best = min(best, time.perf_counter() - start)
+    return best, outputs
+
+def run(paths, repeat=5, show_diffs=5):
+    tex_files = find_tex_files(paths)
+    texts = []
+    authors = []
+    for tex_file in tex_files:
+        with open(tex_file, "r", encoding="utf-8", errors="replace") as f:
+            segment_texts, segment_authors = extract_segments(f.read())
+        texts += segment_texts
+        authors += segment_authors
+
+    if not texts and not authors:
+        print("비교할 요약 / 결론 / 저자 부분을 찾지 못했습니다.")
+        return
+
+    total_chars = sum(len(text) for text in texts) + sum(len(author) for author in authors)
+    print(f"파일 {len(tex_files)}개, 요약/결론 {len(texts)}개, 저자 {len(authors)}개, 총 {total_chars:,}자")
+
+    legacy_time, legacy_texts = measure(legacy_clean_text, texts, repeat)
+    new_time, new_texts = measure(clean_text, texts, repeat)
+    legacy_author_time, legacy_authors = measure(legacy_clean_authors, authors, repeat)
+    new_author_time, new_authors = measure(clean_authors, authors, repeat)
+
+    legacy_total = legacy_time + legacy_author_time
+    new_total = new_time + new_author_time
+    print(f"기존 방식 : {legacy_total * 1000:.1f}ms ({total_chars / legacy_total / 1e6:.2f}M자/초)")
+    print(f"새 방식   : {new_total * 1000:.1f}ms ({total_chars / new_total / 1e6:.2f}M자/초)")
+    print(f"속도 향상 : {legacy_total / new_total:.2f}배")
+
+    # 결과 차이
+    diffs = [(old, new) for old, new in zip(legacy_texts, new_texts) if old != new]
+    diffs += [(", ".join(old), ", ".join(new)) for old, new in zip(legacy_authors, new_authors) if old != new]
+    print(f"결과가 다른 항목 : {len(diffs)}/{len(texts) + len(authors)}")
+    for old, new in diffs[:show_diffs]:
+        print("-" * 80)
+        for line in difflib.unified_diff(old.split(". "), new.split(". "), "기존", "새 방식", lineterm="", n=0):
+            print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LaTeX 정리 함수 벤치마크")
+    parser.add_argument("paths", nargs="+", help=".tex 파일 또는 폴더")
+    parser.add_argument("--repeat", type=int, default=5, help="반복 측정 횟수")
+    parser.add_argument("--show-diffs", type=int, default=5, help="출력할 결과 차이 개수")
+    args = parser.parse_args()
+
+    run(args.paths, args.repeat, args.show_diffs)
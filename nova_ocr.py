@@ -0,0 +1,163 @@
+import os, io, time, hashlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, CancelledError
+from nova_pdf import get_page_count, iter_pages, extract_text_layer, is_usable_text, RASTER_DPI, RASTER_GRAYSCALE
+from nova_ocr_cache import file_sha256, make_key
+from nova_trace import span, in_context
+from nova_api import call_api, is_quota_error
+
+# PDF 텍스트 추출 (텍스트 레이어 + Cloud Vision OCR)
+# Streamlit에 의존하지 않으므로 화면 스레드 / 백그라운드 작업 어디서든 호출 가능
+# progress(완료 페이지 수, 전체 페이지 수)로 진행 상황을 알리고, cancel(threading.Event)이 설정되면 CancelledError 발생
+
+# OCR 설정 (설정이 바뀌면 캐시 키도 바뀜)
+OCR_SETTINGS = {'engine': 'vision.text_detection', 'text_layer': True, 'dpi': RASTER_DPI, 'grayscale': RASTER_GRAYSCALE, 'format': 'JPEG'}
+OCR_MAX_WORKERS = int(os.getenv('NOVA_OCR_WORKERS', 8))  # 동시 Vision 호출 수
+OCR_MAX_IN_FLIGHT = OCR_MAX_WORKERS * 2  # 메모리에 대기시킬 최대 페이지 수
+OCR_MAX_RETRIES = 2  # 페이지별 재시도 횟수
+OCR_RETRY_DELAY = 0.5  # 재시도 대기 시간(초), 재시도마다 2배
+
+# 페이지 이미지를 디스크에 저장하지 않고 메모리에서 JPEG bytes로 변환
+def encode_page(page):
+    buffer = io.BytesIO()
+    page.save(buffer, OCR_SETTINGS['format'])
+    return buffer.getvalue()
+
+# Vision API 호출 (실패 시 예외 발생)
+def annotate_image(content, client):
+    return call_api('vision', hashlib.sha256(content).hexdigest(), request_text_detection, content, client)
+
+# Vision text_detection 요청 (같은 이미지를 동시에 요청하면 한 번만 호출)
+def request_text_detection(content, client):
+    from google.cloud import vision
+    image = vision.Image(content=content)
+    response = client.text_detection(image=image)
+    if response.error.message:
+        if response.error.code == 8:  # RESOURCE_EXHAUSTED (quota 초과, nova_api에서 재시도)
+            from google.api_core.exceptions import ResourceExhausted
+            raise ResourceExhausted(response.error.message)
+        raise RuntimeError(response.error.message)
+    texts = response.text_annotations
+    return texts[0].description if texts else ''  # 텍스트가 없는 페이지
+
+# 페이지 단위 OCR (실패한 페이지만 개별 재시도, quota 초과는 nova_api에서 이미 재시도했으므로 제외)
+def ocr_page(content, client, retries=OCR_MAX_RETRIES):
+    with span('vision', bytes=len(content)) as s:
+        for attempt in range(retries + 1):
+            try:
+                text = annotate_image(content, client)
+                s.set(retries=attempt, chars=len(text))
+                return text
+            except Exception as e:
+                if attempt == retries or is_quota_error(e):
+                    raise
+                time.sleep(OCR_RETRY_DELAY * 2 ** attempt)
+
+# 취소 확인
+def check_cancelled(cancel):
+    if cancel is not None and cancel.is_set():
+        raise CancelledError()
+
+# 텍스트 추출 (pdf, 페이지별)
+# 페이지를 window 단위로 렌더링하면서 바로 스레드 풀에 OCR을 요청하고, 결과는 페이지 순서대로 정렬
+# 동시에 처리 중인 페이지 수를 제한하여 PDF 길이와 관계없이 메모리 사용량 유지
+# page_numbers가 주어지면 해당 페이지만 OCR (나머지 페이지는 None)
+# 실패한 페이지는 None으로 두고 errors 리스트에 (페이지 index, 오류 메시지) 추가
+def detect_pages_from_pdf(input_path, client, page_numbers=None, progress=None, cancel=None, errors=None):
+    page_count = get_page_count(input_path)
+    if page_numbers is None:
+        page_numbers = range(1, page_count + 1)
+    page_texts = [None] * page_count
+    errors = [] if errors is None else errors
+    pending = {}
+    completed = 0
+
+    # 완료된 OCR 결과 수집
+    def collect(done):
+        nonlocal completed
+        for future in done:
+            i = pending.pop(future)
+            try:
+                page_texts[i] = future.result()
+            except Exception as e:
+                errors.append((i, str(e)))
+            completed += 1
+        if progress is not None:
+            progress(completed, len(page_numbers))
+
+    with ThreadPoolExecutor(max_workers=OCR_MAX_WORKERS) as pool:
+        try:
+            for page_number, page in iter_pages(input_path, dpi=OCR_SETTINGS['dpi'], grayscale=OCR_SETTINGS['grayscale'], page_numbers=page_numbers):
+                check_cancelled(cancel)
+                with span('encode', page=page_number) as s:
+                    content = encode_page(page)
+                    s.set(bytes=len(content))
+                page.close()
+                pending[pool.submit(*in_context(ocr_page, content, client))] = page_number - 1
+
+                if len(pending) >= OCR_MAX_IN_FLIGHT:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+            while pending:
+                check_cancelled(cancel)
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        except CancelledError:
+            # 아직 시작하지 않은 Vision 호출은 취소
+            for future in pending:
+                future.cancel()
+            raise
+    return page_texts
+
+# 페이지별 텍스트 결합
+def join_pages(page_texts):
+    return ''.join(f'\n\n--- Page {i+1} ---\n\n{text}' for i, text in enumerate(page_texts))
+
+# 텍스트 추출 (pdf)
+def detect_text_from_pdf(input_path, client, progress=None, cancel=None, errors=None):
+    page_texts = detect_pages_from_pdf(input_path, client, progress=progress, cancel=cancel, errors=errors)
+    return join_pages(page_texts)
+
+# 텍스트 추출 (pdf, 텍스트 레이어 우선)
+# 텍스트 레이어가 있는 페이지는 poppler로 바로 추출하고, 이미지 / 깨진 페이지만 OCR
+def extract_pages_from_pdf(input_path, client, progress=None, cancel=None, errors=None):
+    try:
+        page_texts = extract_text_layer(input_path)
+    except Exception as e:
+        print(f'텍스트 레이어 추출 실패, 전체 OCR 진행: {e}')
+        return detect_pages_from_pdf(input_path, client, progress=progress, cancel=cancel, errors=errors)
+
+    ocr_page_numbers = [i + 1 for i, text in enumerate(page_texts) if not is_usable_text(text)]
+    text_layer_count = len(page_texts) - len(ocr_page_numbers)
+    if progress is not None:
+        progress(text_layer_count, len(page_texts))
+    if not ocr_page_numbers:
+        return page_texts
+
+    check_cancelled(cancel)
+    ocr_progress = None
+    if progress is not None:
+        ocr_progress = lambda done, total: progress(text_layer_count + done, len(page_texts))
+    ocr_texts = detect_pages_from_pdf(input_path, client, ocr_page_numbers, ocr_progress, cancel, errors)
+    for page_number in ocr_page_numbers:
+        page_texts[page_number - 1] = ocr_texts[page_number - 1]
+    return page_texts
+
+# 텍스트 추출 (pdf, 캐시 사용)
+# 같은 PDF + 같은 OCR 설정이면 poppler / Vision 호출 없이 캐시에서 반환
+def extract_text_from_pdf(input_path, client, ocr_cache, progress=None, cancel=None, errors=None):
+    with span('ocr_cache') as s:
+        key = make_key(file_sha256(input_path), OCR_SETTINGS)
+        cached = ocr_cache.get(key)
+        s.set(cache_hit=cached is not None)
+    if cached is not None:
+        if progress is not None:
+            progress(len(cached['pages']), len(cached['pages']))
+        return cached['text']
+
+    page_texts = extract_pages_from_pdf(input_path, client, progress, cancel, errors)
+    all_text = join_pages(page_texts)
+
+    # 실패한 페이지가 있으면 캐시하지 않음
+    if all(text is not None for text in page_texts):
+        ocr_cache.set(key, all_text, page_texts, OCR_SETTINGS)
+    return all_text
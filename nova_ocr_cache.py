@@ -0,0 +1,76 @@
+import os, json, hashlib, threading
+
+# OCR 캐시 설정
+# cache_dir 경로 설정 필요
+OCR_CACHE_DIR = "nova/ocr_cache"
+OCR_CACHE_QUOTA = int(os.getenv('NOVA_OCR_CACHE_QUOTA_MB', 512)) * 1024 * 1024
+
+# 파일 SHA-256 계산
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# 캐시 키 생성 (PDF 해시 + OCR 설정)
+def make_key(pdf_sha256, settings):
+    settings_json = json.dumps(settings, sort_keys=True)
+    return hashlib.sha256(f'{pdf_sha256}:{settings_json}'.encode('utf-8')).hexdigest()
+
+# PDF 내용 기반 OCR 결과 디스크 캐시
+# 전체 크기가 quota를 넘으면 가장 오래 사용하지 않은 항목부터 삭제
+class OCRCache:
+    def __init__(self, cache_dir=OCR_CACHE_DIR, quota_bytes=OCR_CACHE_QUOTA):
+        self.cache_dir = cache_dir
+        self.quota_bytes = quota_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    # 캐시 조회 (사용 시각 갱신)
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    # 캐시 저장 (추출 텍스트 + 페이지별 결과)
+    def set(self, key, text, pages, settings):
+        entry = {'text': text, 'pages': pages, 'settings': settings}
+        path = self._path(key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    # 용량 기준 삭제
+    def evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.quota_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
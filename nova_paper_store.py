@@ -0,0 +1,115 @@
+import os, re, csv, sqlite3, threading
+
+# 논문 저장소 설정
+# db_file, csv_file 경로 설정 필요
+PAPER_DB = "nova_arxiv.sqlite"
+PAPER_CSV = "nova_arxiv_csv.csv"
+
+# CSV 컬럼 (nova_embedding의 CSVLoader가 읽는 형식)
+CSV_COLUMNS = ["arXiv_ID", "Title", "Year", "Authors", "Abstract", "Conclusion"]
+
+# arXiv ID 정규화 (버전 / 접두어 제거, 소문자)
+def normalize_arxiv_id(arxiv_id):
+    arxiv_id = str(arxiv_id).strip().lower()
+    arxiv_id = re.sub(r"^(arxiv:|https?://arxiv\.org/(abs|pdf)/)", "", arxiv_id)
+    return re.sub(r"v\d+$", "", arxiv_id)
+
+# SQLite 기반 논문 저장소
+# 정규화된 arXiv ID를 primary key로 사용하여 중복 확인은 인덱스 조회, 저장은 트랜잭션 단위 upsert
+class PaperStore:
+    def __init__(self, db_file=PAPER_DB, csv_file=PAPER_CSV):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS papers ("
+            "paper_key TEXT PRIMARY KEY, arxiv_id TEXT NOT NULL, title TEXT, year INTEGER, "
+            "authors TEXT, abstract TEXT, conclusion TEXT)"
+        )
+        self._conn.commit()
+
+        # 기존 CSV 파일이 있으면 처음 한 번 가져옴
+        if csv_file and os.path.exists(csv_file) and self.count() == 0:
+            self.import_csv(csv_file)
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    # 논문 중복 확인
+    def exists(self, arxiv_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM papers WHERE paper_key = ?", (normalize_arxiv_id(arxiv_id),)
+            ).fetchone()
+        return row is not None
+
+    # 저장된 논문 ID 확인 (여러 ID를 한 번에 조회, 정규화된 ID 집합 반환)
+    def existing_ids(self, arxiv_ids):
+        keys = list({normalize_arxiv_id(arxiv_id) for arxiv_id in arxiv_ids})
+        found = set()
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT paper_key FROM papers WHERE paper_key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    # 논문 정보 저장 (하나의 트랜잭션으로 upsert)
+    def upsert_many(self, paper_infos):
+        rows = []
+        for paper_info in paper_infos:
+            authors = paper_info["authors"]
+            if isinstance(authors, (list, tuple)):
+                authors = ", ".join(authors)
+            rows.append((
+                normalize_arxiv_id(paper_info["arxiv_id"]),
+                str(paper_info["arxiv_id"]).strip(),
+                paper_info["title"],
+                int(paper_info["year"]) if str(paper_info["year"]).strip().isdigit() else None,
+                authors,
+                paper_info["abstract"],
+                paper_info["conclusion"],
+            ))
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO papers (paper_key, arxiv_id, title, year, authors, abstract, conclusion) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(paper_key) DO UPDATE SET arxiv_id = excluded.arxiv_id, title = excluded.title, "
+                "year = excluded.year, authors = excluded.authors, abstract = excluded.abstract, "
+                "conclusion = excluded.conclusion",
+                rows,
+            )
+        return len(rows)
+
+    # CSV 파일 가져오기
+    def import_csv(self, csv_file):
+        with open(csv_file, "r", encoding="utf-8", newline="") as f:
+            paper_infos = [{
+                "arxiv_id": row["arXiv_ID"],
+                "title": row.get("Title"),
+                "year": row.get("Year") or "",
+                "authors": row.get("Authors"),
+                "abstract": row.get("Abstract"),
+                "conclusion": row.get("Conclusion"),
+            } for row in csv.DictReader(f) if row.get("arXiv_ID", "").strip()]
+        return self.upsert_many(paper_infos)
+
+    # CSV 파일 내보내기 (임시 파일에 쓴 뒤 교체, 저장 순서 유지)
+    def export_csv(self, csv_file=PAPER_CSV):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT arxiv_id, title, year, authors, abstract, conclusion FROM papers ORDER BY rowid"
+            ).fetchall()
+
+        tmp_path = f"{csv_file}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")  # 기존 CSV (pandas) 와 같은 줄바꿈
+            writer.writerow(CSV_COLUMNS)
+            writer.writerows(["" if value is None else value for value in row] for row in rows)
+        os.replace(tmp_path, csv_file)
+        return len(rows)
@@ -0,0 +1,127 @@
+import os, io, subprocess
+from nova_trace import span
+
+# poppler 경로 설정
+# POPPLER_PATH 환경 변수가 없으면 Windows에서는 동봉된 poppler-24.08.0 사용, 그 외에는 시스템 PATH 사용
+BUNDLED_POPPLER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'poppler-24.08.0', 'Library', 'bin')
+POPPLER_PATH = os.getenv('POPPLER_PATH') or (BUNDLED_POPPLER_PATH if os.name == 'nt' else None)
+
+# OCR용 래스터화 설정
+# 200 DPI 흑백이면 Vision 인식률은 유지하면서 이미지 크기와 메모리 사용량이 줄어듦
+RASTER_DPI = int(os.getenv('NOVA_RASTER_DPI', 200))
+RASTER_GRAYSCALE = os.getenv('NOVA_RASTER_GRAYSCALE', '1') == '1'
+RASTER_WINDOW = int(os.getenv('NOVA_RASTER_WINDOW', 4))  # 한 번에 렌더링할 페이지 수
+
+# 미리보기 썸네일 설정 (가로 픽셀, JPEG 품질)
+THUMBNAIL_WIDTH = int(os.getenv('NOVA_THUMBNAIL_WIDTH', 700))
+THUMBNAIL_QUALITY = 70
+
+# 텍스트 레이어 판정 기준
+TEXT_LAYER_MIN_CHARS = 200  # 이보다 짧으면 이미지 페이지로 간주
+TEXT_LAYER_MAX_BAD_RATIO = 0.02  # 깨진 문자 비율 상한
+TEXT_LAYER_MIN_ALPHA_RATIO = 0.5  # 공백 제외 문자 중 글자(알파벳/한글 등) 비율 하한
+TEXT_LAYER_MAX_WORD_LENGTH = 20  # 평균 단어 길이 상한 (띄어쓰기가 사라진 텍스트 감지)
+POPPLER_TIMEOUT = 120
+
+# poppler 실행 파일 경로
+def poppler_command(name):
+    return os.path.join(POPPLER_PATH, name) if POPPLER_PATH else name
+
+# PDF 페이지 수
+def get_page_count(pdf_path):
+    from pdf2image import pdfinfo_from_path  # 처음 PDF를 처리할 때 로드
+    info = pdfinfo_from_path(pdf_path, poppler_path=POPPLER_PATH)
+    return int(info['Pages'])
+
+# 페이지 번호들을 연속 구간으로 묶되, 구간 길이는 window 이하로 제한
+def page_windows(page_numbers, window=RASTER_WINDOW):
+    start = end = None
+    for page_number in sorted(page_numbers):
+        if start is not None and page_number == end + 1 and page_number - start < window:
+            end = page_number
+            continue
+        if start is not None:
+            yield start, end
+        start = end = page_number
+    if start is not None:
+        yield start, end
+
+# 페이지 단위 래스터화 (window 크기만큼씩 렌더링하여 메모리 사용량 고정)
+# (페이지 번호, PIL 이미지)를 순서대로 반환, page_numbers가 주어지면 해당 페이지만 렌더링
+def iter_pages(pdf_path, dpi=RASTER_DPI, grayscale=RASTER_GRAYSCALE, window=RASTER_WINDOW, first_page=1, last_page=None, page_numbers=None):
+    from pdf2image import convert_from_path  # 처음 PDF를 처리할 때 로드
+    if page_numbers is None:
+        if last_page is None:
+            last_page = get_page_count(pdf_path)
+        page_numbers = range(first_page, last_page + 1)
+
+    for start, end in page_windows(page_numbers, window):
+        with span('rasterize', pages=end - start + 1, dpi=dpi):
+            images = convert_from_path(
+                pdf_path,
+                dpi=dpi,
+                grayscale=grayscale,
+                first_page=start,
+                last_page=end,
+                poppler_path=POPPLER_PATH,
+            )
+        page_number = start
+        while images:
+            yield page_number, images.pop(0)
+            page_number += 1
+
+# 페이지 미리보기 썸네일 (해당 페이지만 지정한 가로 크기로 렌더링, JPEG bytes 반환)
+def render_thumbnail(pdf_path, page_number, width=THUMBNAIL_WIDTH):
+    from pdf2image import convert_from_path
+    with span('thumbnail', page=page_number, width=width) as s:
+        images = convert_from_path(
+            pdf_path,
+            first_page=page_number,
+            last_page=page_number,
+            size=(width, None),
+            poppler_path=POPPLER_PATH,
+        )
+        buffer = io.BytesIO()
+        images[0].convert('RGB').save(buffer, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+        images[0].close()
+        s.set(bytes=buffer.tell())
+    return buffer.getvalue()
+
+# 텍스트 레이어 추출 (pdftotext 한 번 호출, 페이지 구분은 \f)
+# 페이지 순서대로 텍스트 리스트 반환
+def extract_text_layer(pdf_path, first_page=1, last_page=None):
+    if last_page is None:
+        last_page = get_page_count(pdf_path)
+
+    command = [poppler_command('pdftotext'), '-enc', 'UTF-8', '-f', str(first_page), '-l', str(last_page), pdf_path, '-']
+    with span('text_layer', pages=last_page - first_page + 1) as s:
+        result = subprocess.run(command, capture_output=True, timeout=POPPLER_TIMEOUT, check=True)
+        s.set(bytes=len(result.stdout))
+    page_texts = result.stdout.decode('utf-8', errors='replace').split('\f')
+
+    # 페이지 수에 맞춤 (마지막 \f 뒤의 빈 문자열 제거)
+    page_count = last_page - first_page + 1
+    page_texts = page_texts[:page_count]
+    page_texts += [''] * (page_count - len(page_texts))
+    return page_texts
+
+# 깨진 문자 판정 (대체 문자, 사용자 정의 영역, 제어 문자)
+def is_bad_char(ch):
+    code = ord(ch)
+    return ch == '\ufffd' or 0xE000 <= code <= 0xF8FF or (code < 32 and ch not in '\n\r\t')
+
+# 텍스트 레이어 사용 가능 여부 (이미지 페이지 / 깨진 인코딩 페이지는 OCR 필요)
+def is_usable_text(text):
+    chars = [ch for ch in text if not ch.isspace()]
+    if len(chars) < TEXT_LAYER_MIN_CHARS or '(cid:' in text:
+        return False
+
+    bad_count = sum(1 for ch in chars if is_bad_char(ch))
+    alpha_count = sum(1 for ch in chars if ch.isalpha())
+    if bad_count / len(chars) > TEXT_LAYER_MAX_BAD_RATIO:
+        return False
+    if alpha_count / len(chars) < TEXT_LAYER_MIN_ALPHA_RATIO:
+        return False
+
+    words = text.split()
+    return len(chars) / len(words) <= TEXT_LAYER_MAX_WORD_LENGTH
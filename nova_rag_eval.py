@@ -0,0 +1,231 @@
+import os, re, csv, json, time, random, shutil, argparse, tempfile
+
+# RAG 검색 설정 평가 (검색 품질 vs 지연 시간)
+# 논문 CSV에서 정답(arXiv_ID)을 알고 있는 질의를 자동으로 만들고 (제목 바꿔 쓰기 / 요약 문장 / 결론 문장)
+# 검색 방식(similarity / mmr), k, fetch_k, backend(chroma / numpy) 조합마다 recall@k, MRR, p50/p95 지연 시간, 질의당 임베딩 호출 수를 출력
+# --offline 이면 Google 임베딩 대신 nova_bench의 해시 임베딩으로 임시 벡터 DB를 만들어 평가 (API 호출 없음)
+# 사용법: python nova_rag_eval.py [--offline] [--k 1 3 5 10] [--fetch-k 10 20 40] [--search-type similarity mmr] [--backend chroma numpy]
+
+EVAL_CSV = "nova_arxiv_csv.csv"
+EVAL_MAX_QUERIES = 100  # 질의 종류별 최대 개수
+
+# 제목 바꿔 쓰기에 사용하는 불용어 / 유의어
+STOPWORDS = {"a", "an", "the", "of", "for", "and", "in", "on", "to", "with", "via", "by", "from", "towards", "toward", "using", "its", "their", "is", "are"}
+SYNONYMS = {
+    "large": "big", "language": "text", "models": "systems", "model": "system", "learning": "training",
+    "neural": "deep", "network": "net", "networks": "nets", "efficient": "fast", "survey": "review",
+    "approach": "method", "approaches": "methods", "improving": "enhancing", "generation": "synthesis",
+    "reasoning": "inference", "robust": "reliable", "agents": "assistants", "agent": "assistant",
+    "evaluation": "assessment", "benchmark": "testbed", "multimodal": "multi-modal", "vision": "visual",
+}
+
+# 논문 CSV 로드
+def load_papers(csv_file=EVAL_CSV):
+    with open(csv_file, "r", encoding="utf-8", newline="") as f:
+        return [row for row in csv.DictReader(f) if row.get("arXiv_ID")]
+
+# 문장 분리 (단어 8개 이상인 문장만)
+def split_sentences(text):
+    sentences = re.split(r"(?<=[.!?])\s+", " ".join((text or "").split()))
+    return [sentence for sentence in sentences if len(sentence.split()) >= 8]
+
+# 제목 바꿔 쓰기 (불용어 제거, 일부 단어를 유의어로 교체, 어순 섞기)
+def paraphrase_title(title, rng):
+    words = [word for word in re.findall(r"[A-Za-z][A-Za-z0-9\-]*", title.lower()) if word not in STOPWORDS]
+    words = [SYNONYMS.get(word, word) if rng.random() < 0.5 else word for word in words]
+    rng.shuffle(words)
+    return "papers about " + " ".join(words)
+
+# 질의 세트 (종류, 질의, 정답 arXiv_ID)
+# title: 바꿔 쓴 제목, abstract: 요약 중간 문장, conclusion: 결론 문장
+def make_query_set(papers, max_queries=EVAL_MAX_QUERIES, seed=0):
+    rng = random.Random(seed)
+    queries = {"title": [], "abstract": [], "conclusion": []}
+    for paper in papers:
+        arxiv_id = paper["arXiv_ID"].strip()
+        if paper.get("Title"):
+            queries["title"].append({"type": "title", "query": paraphrase_title(paper["Title"], rng), "arxiv_id": arxiv_id})
+        for kind, column in (("abstract", "Abstract"), ("conclusion", "Conclusion")):
+            sentences = split_sentences(paper.get(column))
+            if sentences:
+                sentence = sentences[len(sentences) // 2] if kind == "abstract" else rng.choice(sentences)
+                queries[kind].append({"type": kind, "query": sentence, "arxiv_id": arxiv_id})
+
+    query_set = []
+    for items in queries.values():
+        rng.shuffle(items)
+        query_set += items[:max_queries]
+    return query_set
+
+# 임베딩 호출 수 측정용 래퍼
+class CountingEmbeddings:
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        self.calls += 1
+        return self.embeddings.embed_query(text)
+
+# 오프라인 평가 환경 (CSV로 임시 Chroma DB + 벡터 인덱스 snapshot 구축)
+def setup_offline(csv_file, work_dir, embed_latency):
+    import nova_func, nova_embedding
+    from nova_bench import HashingEmbeddings
+    from langchain_community.vectorstores import Chroma
+
+    embeddings = HashingEmbeddings(latency=embed_latency)
+    nova_embedding.GoogleGenerativeAIEmbeddings = lambda **kwargs: embeddings
+    persist_directory = os.path.join(work_dir, "database")
+    index_dir = os.path.join(work_dir, "vector_index")
+    nova_embedding.update_index(csv_file, persist_directory, vector_index_dir=index_dir)
+    nova_func._embeddings = nova_func.CachedEmbeddings(embeddings, nova_func.embedding_cache)
+    nova_func._vector_store = Chroma(persist_directory=persist_directory, embedding_function=nova_func._embeddings)
+    return index_dir
+
+# 검색 backend 선택 (numpy backend는 게시된 snapshot이 있어야 함)
+def use_backend(backend, vector_index):
+    import nova_func
+
+    nova_func.RAG_BACKEND = backend
+    nova_func._vector_index = vector_index if backend == "numpy" else None
+    return backend != "numpy" or nova_func.get_vector_index() is not None
+
+# 평가할 설정 조합 (결과가 같은 조합은 제외: fetch_k < k, numpy similarity의 fetch_k)
+def make_configs(search_types, ks, fetch_ks, backends):
+    configs = []
+    for backend in backends:
+        for search_type in search_types:
+            for k in ks:
+                for fetch_k in fetch_ks:
+                    if fetch_k < k:
+                        continue
+                    if backend == "numpy" and search_type == "similarity" and fetch_k != min(f for f in fetch_ks if f >= k):
+                        continue
+                    configs.append({"backend": backend, "search_type": search_type, "k": k, "fetch_k": fetch_k})
+    return configs
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+# 설정 하나 평가
+# cold=True 이면 질의마다 임베딩 캐시를 비워 임베딩 시간까지 포함, 아니면 검색 시간만 측정
+def evaluate(config, query_set, counter, cold=False):
+    import nova_func
+
+    latencies = []
+    reciprocal_ranks = []
+    hits_by_type = {}
+    calls_before = counter.calls
+    for item in query_set:
+        if cold:
+            nova_func.embedding_cache.clear()
+        start = time.perf_counter()
+        papers = nova_func.search_papers(item["query"], k=config["k"], fetch_k=config["fetch_k"], mmr=config["search_type"] == "mmr")
+        latencies.append(time.perf_counter() - start)
+
+        ids = [str(paper.get("arXiv_id")) for paper in papers[:config["k"]]]
+        rank = ids.index(item["arxiv_id"]) + 1 if item["arxiv_id"] in ids else None
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+        hits_by_type.setdefault(item["type"], []).append(rank is not None)
+
+    count = len(query_set)
+    return dict(
+        config,
+        queries=count,
+        recall=sum(1 for rr in reciprocal_ranks if rr) / count,
+        mrr=sum(reciprocal_ranks) / count,
+        recall_by_type={kind: sum(hits) / len(hits) for kind, hits in hits_by_type.items()},
+        p50_ms=round(percentile(latencies, 0.5) * 1000, 3),
+        p95_ms=round(percentile(latencies, 0.95) * 1000, 3),
+        embedding_calls_per_query=(counter.calls - calls_before) / count,
+    )
+
+# 품질(recall, MRR)과 지연 시간(p95) 모두에서 다른 설정보다 나쁘지 않은 설정
+def pareto_front(results):
+    front = []
+    for result in results:
+        dominated = any(
+            other["recall"] >= result["recall"] and other["mrr"] >= result["mrr"] and other["p95_ms"] <= result["p95_ms"]
+            and (other["recall"], other["mrr"], -other["p95_ms"]) != (result["recall"], result["mrr"], -result["p95_ms"])
+            for other in results
+        )
+        if not dominated:
+            front.append(result)
+    return sorted(front, key=lambda result: result["p95_ms"])
+
+def print_result(result):
+    by_type = " ".join(f"{kind} {value:.2f}" for kind, value in result["recall_by_type"].items())
+    print(f"{result['backend']:<7} {result['search_type']:<10} k={result['k']:<3} fetch_k={result['fetch_k']:<4} "
+          f"recall@k {result['recall']:.3f}  MRR {result['mrr']:.3f}  p50 {result['p50_ms']:>8.3f}ms  p95 {result['p95_ms']:>8.3f}ms  "
+          f"임베딩 {result['embedding_calls_per_query']:.2f}회/질의  ({by_type})")
+
+def run(args):
+    import nova_func
+    from nova_vector_index import VectorIndex, VECTOR_INDEX_DIR
+
+    papers = load_papers(args.csv)
+    query_set = make_query_set(papers, args.max_queries, args.seed)
+    print(f"논문 {len(papers)}건, 질의 {len(query_set)}개 " + str({kind: sum(1 for item in query_set if item["type"] == kind) for kind in ("title", "abstract", "conclusion")}))
+
+    work_dir = tempfile.mkdtemp(prefix="nova_rag_eval_") if args.offline else None
+    backend, vector_index = nova_func.RAG_BACKEND, nova_func._vector_index
+    results = []
+    try:
+        index_dir = setup_offline(args.csv, work_dir, args.embed_latency) if args.offline else VECTOR_INDEX_DIR
+        index = VectorIndex(index_dir)
+        embeddings = nova_func.get_embeddings()
+        counter = CountingEmbeddings(embeddings.embeddings)
+        embeddings.embeddings = counter
+
+        # 질의 임베딩을 한 번씩 미리 계산 (이후 설정별 비교는 검색 시간만, --cold 이면 매번 임베딩)
+        nova_func.embedding_cache.clear()
+        start = time.perf_counter()
+        for item in query_set:
+            nova_func.embed_query(item["query"])
+        print(f"질의 임베딩 {counter.calls}회, 평균 {(time.perf_counter() - start) / max(len(query_set), 1) * 1000:.1f}ms\n")
+
+        for config in make_configs(args.search_type, args.k, args.fetch_k, args.backend):
+            if not use_backend(config["backend"], index):
+                print(f"{config['backend']} backend를 사용할 수 없습니다 (snapshot 없음: {index_dir}), 건너뜁니다.")
+                continue
+            result = evaluate(config, query_set, counter, args.cold)
+            results.append(result)
+            print_result(result)
+    finally:
+        nova_func.RAG_BACKEND, nova_func._vector_index = backend, vector_index
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if results:
+        print("\n품질 / 지연 시간 균형 (recall, MRR, p95 중 하나라도 다른 설정보다 나은 설정)")
+        for result in pareto_front(results):
+            print_result(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"queries": len(query_set), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.output}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NOVA RAG 검색 설정 평가")
+    parser.add_argument("--csv", default=EVAL_CSV, help="논문 CSV 파일 경로 (질의 생성 / 오프라인 인덱스)")
+    parser.add_argument("--offline", action="store_true", help="해시 임베딩으로 임시 벡터 DB를 만들어 평가 (API 호출 없음)")
+    parser.add_argument("--search-type", nargs="+", default=["similarity", "mmr"], choices=["similarity", "mmr"], help="검색 방식")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10], help="검색할 논문 수")
+    parser.add_argument("--fetch-k", type=int, nargs="+", default=[10, 20, 40], help="MMR / 중복 제거 전 후보 수")
+    parser.add_argument("--backend", nargs="+", default=["chroma", "numpy"], choices=["chroma", "numpy"], help="검색 backend")
+    parser.add_argument("--max-queries", type=int, default=EVAL_MAX_QUERIES, help="질의 종류별 최대 개수")
+    parser.add_argument("--cold", action="store_true", help="질의마다 임베딩 캐시를 비워 임베딩 시간 포함")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="오프라인 임베딩 지연(초)")
+    parser.add_argument("--seed", type=int, default=0, help="질의 생성 시드")
+    parser.add_argument("--output", help="결과 JSON 파일")
+    args = parser.parse_args()
+
+    run(args)
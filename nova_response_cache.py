@@ -0,0 +1,107 @@
+import os, time, threading
+from collections import OrderedDict
+
+# 응답 캐시 설정 (최대 개수, 유지 시간(초), 유사도 기준)
+RESPONSE_CACHE_SIZE = int(os.getenv('NOVA_RESPONSE_CACHE_SIZE', 256))
+RESPONSE_CACHE_TTL = int(os.getenv('NOVA_RESPONSE_CACHE_TTL', 6 * 60 * 60))
+RESPONSE_CACHE_THRESHOLD = float(os.getenv('NOVA_RESPONSE_CACHE_THRESHOLD', 0.95))  # 질의 임베딩 코사인 유사도
+
+# 의미 기반 응답 캐시 (프로세스 전역에서 여러 세션이 공유)
+# 같은 검색 논문 / 같은 업로드 PDF 범위 안에서 질의 임베딩이 threshold 이상 비슷하면 저장된 답변을 재사용
+# 논문도 PDF도 없는 질문은 대화 맥락에 따라 답이 달라지므로 캐시하지 않음
+# 항목은 LRU + TTL 로 만료되고, 적중 시 절약한 Gemini 호출 시간과 토큰 수를 누적
+class SemanticResponseCache:
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL, threshold=RESPONSE_CACHE_THRESHOLD):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.saved_tokens = 0
+        self._entries = OrderedDict()  # id -> 항목 (LRU 순서)
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    # 비교 범위 (검색된 논문 ID, 업로드 PDF digest), 둘 다 없으면 None (캐시 사용 안 함)
+    @staticmethod
+    def scope(paper_id, pdf_digest):
+        if not paper_id and not pdf_digest:
+            return None
+        return (paper_id or '', pdf_digest or '')
+
+    # 만료 항목 제거 (lock 안에서 호출)
+    def _expire(self, now):
+        expired = [entry_id for entry_id, entry in self._entries.items() if entry['expires_at'] <= now]
+        for entry_id in expired:
+            del self._entries[entry_id]
+
+    # 캐시 조회 (가장 비슷한 항목의 답변, 없으면 None)
+    def get(self, vector, paper_id=None, pdf_digest=None):
+        scope = self.scope(paper_id, pdf_digest)
+        if scope is None:
+            return None
+        import numpy as np  # 첫 질문 때 로드 (앱 시작 시간 단축)
+        vector = np.asarray(vector, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        with self._lock:
+            self._expire(time.monotonic())
+            candidates = [(entry_id, entry) for entry_id, entry in self._entries.items() if entry['scope'] == scope]
+            if candidates:
+                similarities = np.stack([entry['vector'] for _, entry in candidates]) @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entry_id, entry = candidates[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    self.saved_seconds += entry['seconds']
+                    self.saved_tokens += entry['tokens']
+                    return entry['response']
+            self.misses += 1
+            return None
+
+    # 캐시 저장 (용량 초과 시 가장 오래 사용하지 않은 항목부터 제거)
+    # seconds / tokens 는 이 답변을 만드는 데 든 Gemini 호출 시간과 프롬프트 + 답변 토큰 수
+    def set(self, vector, response, paper_id=None, pdf_digest=None, seconds=0.0, tokens=0):
+        scope = self.scope(paper_id, pdf_digest)
+        if scope is None:
+            return
+        import numpy as np
+        vector = np.asarray(vector, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        with self._lock:
+            self._entries[self._next_id] = {
+                'vector': vector,
+                'scope': scope,
+                'response': response,
+                'seconds': seconds,
+                'tokens': tokens,
+                'expires_at': time.monotonic() + self.ttl,
+            }
+            self._next_id += 1
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.saved_seconds = 0.0
+            self.saved_tokens = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    # 캐시 통계
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'saved_seconds': self.saved_seconds,
+            'saved_tokens': self.saved_tokens,
+        }
@@ -0,0 +1,88 @@
+import re, threading
+
+# 질의 라우터 설정
+# 인사 / 감사 / 업로드 논문에 대한 후속 질문은 RAG 검색(임베딩 호출 + 벡터 검색)을 건너뜀
+# 판단이 애매하면 검색 (답변 품질 우선)
+SHORT_QUERY_CHARS = 6  # 이 길이 이하이고 검색 키워드가 없으면 잡담으로 판단
+RECENT_HISTORY = 4  # 후속 질문 판단에 볼 최근 메시지 수
+
+# 논문 검색이 필요한 질문
+_search_pattern = re.compile(
+    r"논문|연구|찾아|추천|관련|비슷한|최신|동향|서베이|arxiv|"
+    r"\b(papers?|research|find|search|recommend|related|similar|survey|state[- ]of[- ]the[- ]art|sota|literature)\b",
+    re.IGNORECASE,
+)
+
+# 새 논문을 찾아 달라는 요청 (업로드 논문을 가리켜도 검색)
+_request_pattern = re.compile(r"찾아|추천|검색|\b(find|search|recommend)\b", re.IGNORECASE)
+
+# 인사 / 감사 / 짧은 반응
+_chitchat_pattern = re.compile(
+    r"^\s*(안녕|하이|반가|고마|감사|수고|좋아|좋네|알겠|오케이|ㅇㅋ|ㅎㅎ|ㅋㅋ|네\b|응\b|"
+    r"hi\b|hello|hey\b|thanks|thank you|ok\b|okay|bye|good (morning|night))",
+    re.IGNORECASE,
+)
+
+# 업로드 논문 / 직전 답변을 가리키는 표현
+_followup_pattern = re.compile(
+    r"이 논문|이 pdf|업로드|올린|방금|위 논문|그 논문|앞에서|위에서|더 자세히|다시 설명|요약해|번역해|"
+    r"\b(this paper|the paper above|uploaded|this pdf|you said|explain (it|that)|more detail)",
+    re.IGNORECASE,
+)
+
+# 라우팅 결정 (검색 필요 여부, 이유)
+def route_query(user_query, chat_history=()):
+    # 마지막 메시지는 현재 질문, 첫 인사처럼 사용자 질문에 대한 답이 아닌 assistant 메시지는 맥락으로 보지 않음
+    earlier = list(chat_history)[-RECENT_HISTORY - 1:-1]
+    has_pdf = any(message.get('pdf') for message in chat_history)
+    has_context = has_pdf or any(
+        previous['role'] == 'user' and message['role'] == 'assistant' for previous, message in zip(earlier, earlier[1:])
+    )
+
+    if _followup_pattern.search(user_query) and has_context and not _request_pattern.search(user_query):
+        return False, 'followup'
+    if _search_pattern.search(user_query):
+        return True, 'search_keyword'
+    if _chitchat_pattern.search(user_query) and len(user_query.strip()) <= SHORT_QUERY_CHARS * 4:
+        return False, 'chitchat'
+    if len(user_query.strip()) <= SHORT_QUERY_CHARS:
+        return False, 'short'
+    return True, 'default'
+
+# 라우팅 통계 (프로세스 전역)
+# 검색한 턴에서 측정한 RAG 시간의 평균을 건너뛴 턴이 절약한 시간으로 계산
+class RouterStats:
+    def __init__(self):
+        self.retrieved = 0
+        self.skipped = 0
+        self.rag_seconds = 0.0
+        self.reasons = {}
+        self._lock = threading.Lock()
+
+    # 평균 RAG 시간 (아직 측정값이 없으면 0)
+    def average_rag_seconds(self):
+        return self.rag_seconds / self.retrieved if self.retrieved else 0.0
+
+    # 라우팅 결과 기록 및 로그 출력
+    def record(self, retrieve, reason, seconds=0.0):
+        with self._lock:
+            self.reasons[reason] = self.reasons.get(reason, 0) + 1
+            if retrieve:
+                self.retrieved += 1
+                self.rag_seconds += seconds
+                print(f'[router] RAG 검색 ({reason}) {seconds:.2f}초')
+            else:
+                self.skipped += 1
+                print(f'[router] RAG 생략 ({reason})')
+
+    def stats(self):
+        with self._lock:
+            total = self.retrieved + self.skipped
+            return {
+                'retrieved': self.retrieved,
+                'skipped': self.skipped,
+                'skip_rate': self.skipped / total if total else 0.0,
+                'average_rag_seconds': self.average_rag_seconds(),
+                'saved_seconds': self.skipped * self.average_rag_seconds(),  # 추정치 (생략 횟수 x 평균 검색 시간)
+                'reasons': dict(self.reasons),
+            }
@@ -0,0 +1,186 @@
+import re
+
+# OCR 텍스트 섹션 분할 (한 번의 줄 단위 탐색)
+# 여러 페이지의 OCR 결과 전체에 DOTALL 정규식을 적용하는 대신, 줄마다 짧은 정규식으로 제목 줄 / 페이지 구분선을 한 번만 색인
+# 정규식은 길이가 제한된 한 줄에만 적용하므로 전체 처리 시간은 텍스트 길이에 비례
+# 페이지 구분선(--- Page i ---)과 여러 페이지에 반복되는 머리글 / 바닥글 / 쪽 번호는 섹션 경계로 보지 않고 본문에서도 제외
+
+HEADING_MAX_CHARS = 80  # 제목 줄로 볼 최대 길이
+HEADING_MAX_WORDS = 10  # 번호가 붙은 제목 줄의 최대 단어 수
+HEADING_MAX_UNNUMBERED_WORDS = 5  # 번호가 없는 제목 줄의 최대 단어 수
+RUNNING_EDGE_LINES = 2  # 머리글 / 바닥글 후보로 볼 페이지 앞뒤 줄 수
+RUNNING_MIN_PAGES = 3  # 머리글 / 바닥글로 판단할 최소 반복 페이지 수
+
+# 번호 없이도 제목으로 인정하는 섹션 이름 (소문자, 앞부분 일치, 한국어 논문 포함)
+KNOWN_SECTIONS = (
+    "abstract", "introduction", "related work", "background", "preliminaries", "method", "approach",
+    "model", "experiment", "result", "evaluation", "discussion", "analysis", "limitation", "conclu",
+    "summary", "future work", "acknowledg", "reference", "bibliography", "appendix",
+    "요약", "초록", "서론", "관련 연구", "배경", "방법", "실험", "결과", "논의", "결론", "참고문헌", "부록",
+)
+ABSTRACT_NAMES = ("abstract", "요약", "초록")
+CONCLUSION_NAMES = ("conclu", "결론")
+
+_page_marker = re.compile(r"--- Page (\d+) ---")
+_page_number = re.compile(r"(?:page\s*)?\d{1,4}(?:\s*(?:/|of)\s*\d{1,4})?", re.IGNORECASE)
+_heading = re.compile(r"(?:(?P<number>\d{1,2}(?:\.\d{1,2}){0,3}\.?|[IVX]{1,5}\.)\s+)?(?P<name>[A-Z가-힣][A-Za-z0-9가-힣&,:'’\- ]*[A-Za-z0-9가-힣])")
+_inline_abstract = re.compile(r"(?:Abstract|ABSTRACT)\s*[.:—–-]\s*|ABSTRACT\s+")
+_arxiv_stamp = re.compile(r"arXiv:\S+")
+_digits = re.compile(r"\d+")
+
+# 제목 줄 하나
+class Heading:
+    def __init__(self, line, number, name, inline="", known=False):
+        self.line = line  # 줄 번호
+        self.number = number  # "3.1" / "IV" / None
+        self.name = name
+        self.known = known  # 알려진 섹션 이름 여부 (KNOWN_SECTIONS)
+        self.inline = inline  # 제목과 같은 줄에 이어지는 본문 (예: "Abstract— We propose ...")
+        self.level = number.rstrip(".").count(".") + 1 if number else 1
+
+    def __repr__(self):
+        return f"Heading({self.line}, {self.number!r}, {self.name!r})"
+
+# 섹션 이름 정규화 (비교용)
+def normalize_name(name):
+    return " ".join(name.lower().replace("-", " ").split())
+
+# 제목 줄 판별 (아니면 None)
+# "Abstract— We propose ..." 처럼 본문이 같은 줄에 이어지는 요약 제목도 인정
+def parse_heading(line, index):
+    if line[0] in "Aa":
+        match = _inline_abstract.match(line)
+        if match:
+            return Heading(index, None, "Abstract", line[match.end():], True)
+    if len(line) > HEADING_MAX_CHARS:
+        return None
+
+    match = _heading.fullmatch(line)
+    if not match:
+        return None
+    number, name = match.group("number"), match.group("name").strip()
+    normalized = normalize_name(name)
+    known = normalized.startswith(KNOWN_SECTIONS)
+    if number is None:
+        # 번호가 없으면 알려진 섹션 이름이거나 전체 대문자인 짧은 줄만 인정 (예: "INTRODUCTION")
+        if len(name.split()) > HEADING_MAX_UNNUMBERED_WORDS or not (known or name.isupper()):
+            return None
+    elif len(name.split()) > HEADING_MAX_WORDS or not name[-1].isalpha():
+        return None
+    elif number[0] in "IVX" and not name.isupper():  # "IV. EXPERIMENTS" 형식은 대문자 제목만 인정
+        return None
+    return Heading(index, number, name, known=known)
+
+# 번호 순서 확인 (본문 줄이 숫자로 시작하는 경우를 제목으로 오인하지 않도록)
+# 최상위 번호는 직전 번호 + 1 (OCR이 제목 하나를 놓친 경우를 고려해 + 2까지, 알려진 섹션 이름이면 더 큰 번호도 인정)
+# 하위 번호는 현재 최상위 번호 아래만 인정
+def follows_numbering(number, current_top, known=False):
+    if not number or not number[0].isdigit():
+        return True
+    parts = number.rstrip(".").split(".")
+    top = int(parts[0])
+    if len(parts) == 1:
+        return current_top < top <= current_top + 2 or (known and top > current_top)
+    return top == current_top
+
+# 페이지 앞뒤 줄 (머리글 / 바닥글 / 쪽 번호 후보)
+def edge_lines(lines, start, end, skip):
+    top = []
+    i = start
+    while i < end and len(top) < RUNNING_EDGE_LINES:
+        if lines[i] and i not in skip:
+            top.append(i)
+        i += 1
+    bottom = []
+    j = end - 1
+    while j >= i and len(bottom) < RUNNING_EDGE_LINES:
+        if lines[j] and j not in skip:
+            bottom.append(j)
+        j -= 1
+    return top + bottom
+
+# 페이지 앞뒤에서 반복되는 머리글 / 바닥글 찾기 (숫자는 무시하고 비교)
+def find_running_lines(lines, edges, page_count):
+    counts = {}
+    for page_edges in edges:
+        for key in {_digits.sub("#", lines[i].lower()) for i in page_edges}:
+            counts[key] = counts.get(key, 0) + 1
+    min_pages = max(RUNNING_MIN_PAGES, page_count // 3)
+    return {key for key, count in counts.items() if count >= min_pages}
+
+# 분할된 문서
+class Document:
+    def __init__(self, text):
+        self.lines = [line.strip() for line in text.split("\n")]
+        self.skip = set()  # 본문에서 제외할 줄 (페이지 구분선 / 머리글 / 바닥글 / 쪽 번호)
+        self.headings = []
+
+        # 1) 페이지 범위 색인
+        starts = []
+        for i, line in enumerate(self.lines):
+            if line.startswith("--- Page ") and _page_marker.fullmatch(line):
+                starts.append(i)
+                self.skip.add(i)
+        if not starts or starts[0] != 0:
+            starts.insert(0, 0)
+        self.pages = [(start, end) for start, end in zip(starts, starts[1:] + [len(self.lines)])]
+
+        # 2) 페이지 앞뒤에서 반복되는 머리글 / 바닥글과 쪽 번호 제외 (페이지마다 앞뒤 몇 줄만 확인)
+        edges = [edge_lines(self.lines, start, end, self.skip) for start, end in self.pages]
+        running = find_running_lines(self.lines, edges, len(self.pages)) if len(self.pages) >= RUNNING_MIN_PAGES else set()
+        for i in (i for page_edges in edges for i in page_edges):
+            line = self.lines[i]
+            if _page_number.fullmatch(line) or (running and _digits.sub("#", line.lower()) in running):
+                self.skip.add(i)
+
+        # 3) 제목 줄 색인
+        current_top = 0
+        for i, line in enumerate(self.lines):
+            if line and i not in self.skip:
+                heading = parse_heading(line, i)
+                if heading is not None and follows_numbering(heading.number, current_top, heading.known):
+                    if heading.number and heading.number[0].isdigit():
+                        current_top = int(heading.number.rstrip(".").split(".")[0])
+                    self.headings.append(heading)
+
+    # 섹션 이름 목록
+    def names(self):
+        return [heading.name for heading in self.headings]
+
+    # 제목 줄 다음부터 같은 수준 이상의 다음 제목 줄 전까지의 본문
+    def body(self, index):
+        heading = self.headings[index]
+        end = len(self.lines)
+        for following in self.headings[index + 1:]:
+            if following.level <= heading.level:
+                end = following.line
+                break
+        lines = [heading.inline] if heading.inline else []
+        lines += [self.lines[i] for i in range(heading.line + 1, end) if i not in self.skip]
+        return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+    # 이름으로 섹션 찾기 (소문자 부분 일치, 처음 나온 섹션), 없으면 None
+    def section(self, *keywords):
+        for index, heading in enumerate(self.headings):
+            name = normalize_name(heading.name)
+            if any(keyword in name for keyword in keywords):
+                return self.body(index) or None
+        return None
+
+    # 논문 제목 (첫 제목 줄 전에서 arXiv 표시 / 구분선 / 머리글을 제외한 첫 줄)
+    def title(self):
+        end = self.headings[0].line if self.headings else len(self.lines)
+        for i in range(min(end, self.pages[1][1] if len(self.pages) > 1 else end)):
+            line = self.lines[i]
+            if line and i not in self.skip and not _arxiv_stamp.match(line):
+                return line
+        return None
+
+# 텍스트 분할
+def segment(text):
+    return Document(text)
+
+# 제목 / 요약 / 결론 추출 (없으면 None)
+def extract_info(text):
+    document = segment(text)
+    return document.title(), document.section(*ABSTRACT_NAMES), document.section(*CONCLUSION_NAMES)
@@ -0,0 +1,138 @@
+import os
+import re
+import json
+import time
+import random
+import argparse
+from nova_sections import extract_info
+from nova_ocr import join_pages
+
+# 섹션 분할 벤치마크
+# 길이가 다른 합성 OCR 텍스트와 실제 OCR 결과(.txt 파일 / OCR 캐시 .json)로 기존 정규식 방식과 새 방식의 처리 시간과 결과를 비교
+# 합성 텍스트는 정답(제목 / 요약 / 결론)을 알고 있으므로 정확도도 함께 출력
+# 사용법: python nova_sections_bench.py [OCR 텍스트 파일 / 폴더 / nova/ocr_cache] [--pages 10 100 400] [--repeat 3]
+
+# 기존 방식 (DOTALL 정규식) - 비교용
+def legacy_extract_info(text):
+    title_match = re.search(r"arXiv:.*\n(.*?)\n", text, re.MULTILINE)
+    title = title_match.group(1).strip() if title_match else None
+    abstract_match = re.search(r"Abstract\s*(.*?)(?=\n[1-9]+\s+[A-Za-z]|\n[A-Z][a-z])", text, re.DOTALL)
+    abstract = abstract_match.group(1).strip() if abstract_match else None
+    conclusion_match = re.search(r"(?<=\n)(\d+\s)?(Conclusion|Concluding(?:\s\w+)?)\s*(.*?)(?=\n[A-Z][a-z]+|\Z)", text, re.DOTALL)
+    conclusion = conclusion_match.group(3).strip() if conclusion_match else None
+    return title, abstract, conclusion
+
+WORDS = "model attention layer training data result method network language task performance sequence token".split()
+KOREAN_WORDS = "모델 주의 집중 계층 학습 데이터 결과 방법 신경망 언어 과제 성능 문장 토큰 입니다 제안한다".split()
+
+# 무작위 본문 줄
+def make_line(rng, style="en", words=12):
+    if style == "ko":
+        return " ".join(rng.choice(KOREAN_WORDS) for _ in range(words)) + "."
+    line = " ".join(rng.choice(WORDS) for _ in range(words))
+    return line.upper() if style == "upper" else line.capitalize() + "."
+
+# 합성 OCR 텍스트 (페이지마다 머리글 / 쪽 번호, 번호가 붙은 섹션, 요약 / 결론)
+# style="upper" 는 본문이 대문자, "ko" 는 한국어 논문 (기존 정규식의 종료 조건 \n[A-Z][a-z] 가 맞지 않는 경우)
+def make_document(page_count, seed=0, style="en", lines_per_page=40):
+    rng = random.Random(seed)
+    ko = style == "ko"
+    title = "긴 문서를 위한 효율적인 시퀀스 모델" if ko else "Efficient Sequence Models For Long Documents"
+    abstract = "\n".join(make_line(rng, style) for _ in range(6))
+    conclusion = "\n".join(make_line(rng, style) for _ in range(5))
+    sections = min(max(page_count // 4, 2), 12)
+    conclusion_page = max(page_count - 2, 1)
+    section_pages = {1 + i * (conclusion_page - 1) // sections: i + 2 for i in range(sections)}
+    heading = (lambda number, name: f"{number}. {name}") if ko else (lambda number, name: f"{number} {name}")
+
+    pages = []
+    for page in range(1, page_count + 1):
+        lines = ["NOVA 2024 학술대회 Extended Abstract" if ko else "Extended Abstract - Proceedings of NOVA 2024"]
+        if page == 1:
+            if ko:
+                lines += [title, "홍길동, 김철수", "요약", abstract, heading(1, "서론")]
+            else:
+                lines += [f"arXiv:2401.{seed:05d}v1 [cs.CL] 1 Jan 2024", title, "Jane Doe, John Smith", "Abstract", abstract, heading(1, "Introduction")]
+        if page in section_pages:
+            lines.append(heading(section_pages[page], f"{'실험' if ko else 'Section'} {section_pages[page]}"))
+        if page == conclusion_page:
+            lines += [heading(sections + 2, "결론" if ko else "Conclusion"), conclusion, "참고문헌" if ko else "References"]
+        lines += [make_line(rng, style) for _ in range(lines_per_page - len(lines))]
+        lines.append(str(page))
+        pages.append("\n".join(lines))
+    return join_pages(pages), (title, abstract, conclusion)
+
+# 실제 OCR 텍스트 (.txt 파일, OCR 캐시 .json 파일, 또는 이들이 들어 있는 폴더)
+def load_texts(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files += [os.path.join(root, name) for name in names if name.endswith((".txt", ".json"))]
+        else:
+            files.append(path)
+
+    texts = []
+    for path in sorted(files):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            content = f.read()
+        if path.endswith(".json"):
+            try:
+                content = json.loads(content).get("text", "")
+            except (ValueError, AttributeError):
+                continue
+        if content:
+            texts.append((os.path.basename(path), content))
+    return texts
+
+# 처리 시간 측정 (repeat 번 반복 중 가장 빠른 시간)
+def measure(function, text, repeat):
+    best = float("inf")
+    output = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = function(text)
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+# 정답과 비교 (공백 차이는 무시)
+def correct(output, expected):
+    normalize = lambda value: " ".join((value or "").split())
+    return [normalize(a) == normalize(b) for a, b in zip(output, expected)]
+
+def report(name, text, repeat, expected=None):
+    legacy_time, legacy_output = measure(legacy_extract_info, text, repeat)
+    new_time, new_output = measure(extract_info, text, repeat)
+    line = (f"{name:<28} {len(text):>10,}자  기존 {legacy_time * 1000:>9.1f}ms  새 방식 {new_time * 1000:>7.1f}ms "
+            f"({len(text) / new_time / 1e6:.1f}M자/초)  {legacy_time / new_time:>7.1f}배")
+    if expected is not None:
+        legacy_correct = sum(correct(legacy_output, expected))
+        new_correct = sum(correct(new_output, expected))
+        line += f"  정답 기존 {legacy_correct}/3 새 방식 {new_correct}/3"
+    print(line)
+    return legacy_output, new_output
+
+def run(paths, page_counts=(10, 100, 400), repeat=3):
+    print("합성 OCR 텍스트")
+    for style, label in (("en", ""), ("upper", " (대문자 본문)"), ("ko", " (한국어)")):
+        for page_count in page_counts:
+            text, expected = make_document(page_count, style=style)
+            report(f"{page_count}페이지{label}", text, repeat, expected)
+
+    texts = load_texts(paths)
+    if texts:
+        print("\n실제 OCR 텍스트")
+        for name, text in texts:
+            legacy_output, new_output = report(name[:28], text, repeat)
+            for label, old, new in zip(("제목", "요약", "결론"), legacy_output, new_output):
+                if old != new:
+                    print(f"  {label}: {(old or '')[:60]!r} -> {(new or '')[:60]!r}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="섹션 분할 벤치마크")
+    parser.add_argument("paths", nargs="*", help="OCR 텍스트 파일 / 폴더 (OCR 캐시 폴더 가능)")
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 400], help="합성 텍스트 페이지 수")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 측정 횟수")
+    args = parser.parse_args()
+
+    run(args.paths, args.pages, args.repeat)
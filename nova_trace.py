@@ -0,0 +1,164 @@
+import os, json, time, uuid, threading, contextvars, logging
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+# 단계별 처리 시간 추적 설정
+# NOVA_TRACE=0 이면 span()은 아무것도 하지 않는 객체를 반환 (오버헤드 거의 없음)
+# trace_file 경로 설정 필요 (빈 값이면 파일에 기록하지 않음)
+TRACE_ENABLED = os.getenv('NOVA_TRACE', '1') == '1'
+TRACE_FILE = os.getenv('NOVA_TRACE_FILE', 'nova/trace.jsonl')
+TRACE_FILE_MAX_BYTES = int(os.getenv('NOVA_TRACE_FILE_MB', 10)) * 1024 * 1024
+TRACE_FILE_BACKUPS = 3  # 보관할 이전 로그 파일 수
+TRACE_HISTORY = 50  # 메모리에 보관할 최근 trace 수
+
+_current_trace = contextvars.ContextVar('nova_trace', default=None)
+_current_span = contextvars.ContextVar('nova_span', default=None)
+_history = deque(maxlen=TRACE_HISTORY)
+_history_lock = threading.Lock()
+_logger = None
+_logger_lock = threading.Lock()
+
+# 추적이 꺼져 있거나 trace 밖에서 호출된 경우 사용하는 빈 span
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+_NOOP = _NoopSpan()
+
+# 처리 단계 하나 (이름, 시작 시각, 소요 시간, bytes / tokens / cache_hit 등 속성)
+class Span:
+    def __init__(self, trace, name, attrs):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.parent = None
+        self._token = None
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.parent = parent.name if parent is not None else None
+        self._token = _current_span.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        _current_span.reset(self._token)
+        record = {
+            'name': self.name,
+            'parent': self.parent,
+            'start_ms': round((self.start - self.trace.start) * 1000, 2),
+            'ms': round(elapsed * 1000, 2),
+        }
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        record.update(self.attrs)
+        self.trace.spans.append(record)  # 여러 스레드에서 추가해도 list.append는 안전
+        return False
+
+    # 속성 추가 (span 안에서 결과를 알게 된 뒤 기록)
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+# 요청 하나 (채팅 한 턴 / PDF 업로드)
+class Trace(Span):
+    def __init__(self, kind, attrs):
+        self.kind = kind
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.spans = []
+        super().__init__(self, kind, attrs)
+
+    def __enter__(self):
+        self._trace_token = _current_trace.set(self)
+        self.timestamp = time.time()
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        super().__exit__(exc_type, exc, tb)
+        _current_trace.reset(self._trace_token)
+        root = self.spans.pop()  # 자기 자신 기록
+        record = {
+            'trace_id': self.trace_id,
+            'kind': self.kind,
+            'ts': round(self.timestamp, 3),
+            'ms': root['ms'],
+            'spans': sorted(self.spans, key=lambda span: span['start_ms']),
+        }
+        if 'error' in root:
+            record['error'] = root['error']
+        record.update(self.attrs)
+        with _history_lock:
+            _history.append(record)
+        write_record(record)
+        return False
+
+# trace 시작 (with trace('chat_turn'): ...)
+def trace(kind, **attrs):
+    if not TRACE_ENABLED:
+        return _NOOP
+    return Trace(kind, attrs)
+
+# 처리 단계 측정 (with span('vision', bytes=len(content)) as s: ... s.set(chars=...))
+# 진행 중인 trace가 없으면 기록하지 않음
+def span(name, **attrs):
+    if not TRACE_ENABLED:
+        return _NOOP
+    current = _current_trace.get()
+    if current is None:
+        return _NOOP
+    return Span(current, name, attrs)
+
+# 현재 span에 속성 추가 (하위 함수에서 cache_hit 등을 기록할 때)
+def annotate(**attrs):
+    if TRACE_ENABLED:
+        current = _current_span.get()
+        if current is not None:
+            current.set(**attrs)
+
+# 스레드 풀에 넘길 함수에 현재 trace 전달 (pool.submit(*in_context(fn, ...)))
+def in_context(fn, *args):
+    return (contextvars.copy_context().run, fn) + args
+
+# 회전 JSONL 파일 기록
+def write_record(record):
+    global _logger
+    if not TRACE_FILE:
+        return
+    if _logger is None:
+        with _logger_lock:
+            if _logger is None:
+                directory = os.path.dirname(TRACE_FILE)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                handler = RotatingFileHandler(TRACE_FILE, maxBytes=TRACE_FILE_MAX_BYTES, backupCount=TRACE_FILE_BACKUPS, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                logger = logging.getLogger('nova.trace')
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                logger.addHandler(handler)
+                _logger = logger
+    try:
+        _logger.info(json.dumps(record, ensure_ascii=False, default=str))
+    except Exception as e:
+        print(f'trace 기록 실패: {e}')
+
+# 최근 trace 목록 (최신순)
+def recent_traces(kind=None, limit=TRACE_HISTORY):
+    with _history_lock:
+        records = [record for record in reversed(_history) if kind is None or record['kind'] == kind]
+    return records[:limit]
+
+# 단계별 합계 (trace 하나의 span들을 이름별로 합산, 병렬 단계는 누적 시간)
+def stage_totals(record):
+    totals = {}
+    for span_record in record['spans']:
+        total = totals.setdefault(span_record['name'], {'count': 0, 'ms': 0.0})
+        total['count'] += 1
+        total['ms'] = round(total['ms'] + span_record['ms'], 2)
+    return totals
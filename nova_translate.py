@@ -3,16 +3,147 @@ import google.generativeai as genai
 import os
 from dotenv import load_dotenv
 
-import re
+import re, hashlib, sqlite3, threading
+from concurrent.futures import ThreadPoolExecutor
 from googletrans import Translator  # 번역 기능 추가
 
 # 환경변수 로드(API KEY 보안용)
 load_dotenv()
 gemeni_key  = os.getenv("GOOGLE_API_KEY")
 
+# 번역 설정
+# cache_path 경로 설정 필요
+TRANSLATE_CACHE_PATH = "nova/translate_cache.sqlite"
+TRANSLATE_BATCH_CHARS = 4000  # 한 번에 번역 요청할 최대 글자 수
+TRANSLATE_MAX_WORKERS = 4  # 동시 번역 요청 수
+BATCH_SEPARATOR = "\n"  # batch 안에서 문장을 구분하는 줄바꿈
+
 # API KEY 적용 및 모델 로드
-genai.configure(api_key=gemeni_key)
-model = genai.GenerativeModel('gemini-1.5-pro')
+@st.cache_resource
+def load_model():
+    genai.configure(api_key=gemeni_key)
+    model = genai.GenerativeModel('gemini-1.5-pro')
+    return model
+
+# 번역 결과 캐시 (문장 해시, 대상 언어) -> 번역문
+class TranslationCache:
+    def __init__(self, cache_path=TRANSLATE_CACHE_PATH):
+        if os.path.dirname(cache_path):
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "text_hash TEXT NOT NULL, dest TEXT NOT NULL, translated TEXT NOT NULL, "
+            "PRIMARY KEY (text_hash, dest))"
+        )
+        self._conn.commit()
+
+    def get_many(self, text_hashes, dest):
+        found = {}
+        text_hashes = list(text_hashes)
+        with self._lock:
+            for i in range(0, len(text_hashes), 500):
+                chunk = text_hashes[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, translated FROM translations WHERE dest = ? AND text_hash IN ({','.join('?' * len(chunk))})",
+                    [dest, *chunk],
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def set_many(self, items, dest):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations (text_hash, dest, translated) VALUES (?, ?, ?)",
+                [(text_hash, dest, translated) for text_hash, translated in items],
+            )
+            self._conn.commit()
+
+# 번역기 / 캐시는 프로세스당 하나만 생성하여 재사용
+_translator = None
+_translation_cache = None
+_init_lock = threading.Lock()
+
+def get_translator():
+    global _translator
+    with _init_lock:
+        if _translator is None:
+            _translator = Translator()
+    return _translator
+
+def get_translation_cache():
+    global _translation_cache
+    with _init_lock:
+        if _translation_cache is None:
+            _translation_cache = TranslationCache()
+    return _translation_cache
+
+# 문장 해시
+def sentence_hash(sentence):
+    return hashlib.sha256(sentence.encode("utf-8")).hexdigest()
+
+# 문장들을 글자 수 제한에 맞춰 batch로 묶음
+def make_batches(sentences, max_chars=TRANSLATE_BATCH_CHARS):
+    batches = []
+    batch = []
+    size = 0
+    for sentence in sentences:
+        if batch and size + len(sentence) + len(BATCH_SEPARATOR) > max_chars:
+            batches.append(batch)
+            batch = []
+            size = 0
+        batch.append(sentence)
+        size += len(sentence) + len(BATCH_SEPARATOR)
+    if batch:
+        batches.append(batch)
+    return batches
+
+# batch 번역 (줄 단위로 다시 분리, 요청이 실패하거나 문장 수가 어긋나면 문장별로 번역)
+def translate_batch(batch, target_language):
+    translator = get_translator()
+    if len(batch) > 1:
+        try:
+            translated = translator.translate(BATCH_SEPARATOR.join(batch), dest=target_language).text
+            lines = [line.strip() for line in translated.split(BATCH_SEPARATOR)]
+            if len(lines) == len(batch):
+                return lines
+        except Exception:
+            pass
+
+    results = []
+    for sentence in batch:
+        try:
+            results.append(translator.translate(sentence, dest=target_language).text)
+        except Exception:
+            results.append(None)
+    return results
+
+# 문장 리스트 번역 (캐시 -> batch -> 동시 요청)
+# 번역에 실패한 문장은 None
+def translate_sentences(sentences, target_language="ko"):
+    cache = get_translation_cache()
+    hashes = {sentence: sentence_hash(sentence) for sentence in sentences}
+    cached = cache.get_many(set(hashes.values()), target_language)
+
+    translations = {sentence: cached[hashes[sentence]] for sentence in hashes if hashes[sentence] in cached}
+    missing = [sentence for sentence in hashes if sentence not in translations]
+
+    if missing:
+        batches = make_batches(missing)
+        with ThreadPoolExecutor(max_workers=min(TRANSLATE_MAX_WORKERS, len(batches))) as pool:
+            futures = [pool.submit(translate_batch, batch, target_language) for batch in batches]
+            for batch, future in zip(batches, futures):
+                results = future.result()
+                new_items = []
+                for sentence, translated in zip(batch, results):
+                    if translated:
+                        translations[sentence] = translated
+                        new_items.append((hashes[sentence], translated))
+                if new_items:
+                    cache.set_many(new_items, target_language)
+
+    return [translations.get(sentence) for sentence in sentences]
 
 #후처리 함수
 def clean_spacing(translated_text):
@@ -28,9 +159,6 @@ def clean_spacing(translated_text):
 
 #번역함수 정의
 def extract_and_translate(input_text, target_language="ko"):
-    # 번역기 초기화
-    translator = Translator()
-
     # 번역 요청 문구 제거 및 영어만 추출
     pattern = r"(?:다음을 번역해줘[:：]?\s*|번역[:：]?\s*)?([A-Za-z].+)"
     match = re.search(pattern, input_text, re.DOTALL)
@@ -57,19 +185,20 @@ def extract_and_translate(input_text, target_language="ko"):
             # 문장 분리
             sentences = re.split(r"(?<=[.!?])\s+", english_text)
 
-            # 각 문장 번역
-            translated_sentences = []
+            # 문장 정리
+            cleaned_sentences = []
             for sentence in sentences:
-                # 문장 정리
                 cleaned_sentence = re.sub(r"(?<![.!?])\n", " ", sentence.strip())
                 cleaned_sentence = re.sub(r"\s+", " ", cleaned_sentence).strip()
 
                 if cleaned_sentence:  # 빈 문장은 제외
-                    try:
-                        translated = translator.translate(cleaned_sentence, dest=target_language).text
-                        translated_sentences.append(translated)
-                    except Exception as e:
-                        translated_sentences.append(f"[번역 오류: {sentence}]")
+                    cleaned_sentences.append(cleaned_sentence)
+
+            # 문장 번역 (캐시 / batch / 동시 요청)
+            translated_sentences = [
+                translated if translated is not None else f"[번역 오류: {sentence}]"
+                for sentence, translated in zip(cleaned_sentences, translate_sentences(cleaned_sentences, target_language))
+            ]
 
             translated_text = translated_title + " ".join(translated_sentences)
             return clean_spacing(translated_text)
@@ -78,52 +207,59 @@ def extract_and_translate(input_text, target_language="ko"):
     else:
         return "번역할 영어 문장을 찾을 수 없습니다."
 
-#사이드 바(파일 업로드)
-with st.sidebar:
-    uploaded_file = st.sidebar.file_uploader("번역 및 요약이 필요한 논문 PDF파일", type=["pdf"])
+### UI_Streamlit ###
+def main():
+    model = load_model()
 
-# 대화 내역 초기화
-if "chat_history" not in st.session_state:
-    st.session_state["chat_history"] = []
+    #사이드 바(파일 업로드)
+    with st.sidebar:
+        uploaded_file = st.sidebar.file_uploader("번역 및 요약이 필요한 논문 PDF파일", type=["pdf"])
 
-# 대화 내역 표시
-for message in st.session_state["chat_history"]:
-    with st.chat_message("ai" if message["role"] == "ai" else "user"):
-        st.markdown(message["text"])
+    # 대화 내역 초기화
+    if "chat_history" not in st.session_state:
+        st.session_state["chat_history"] = []
 
+    # 대화 내역 표시
+    for message in st.session_state["chat_history"]:
+        with st.chat_message("ai" if message["role"] == "ai" else "user"):
+            st.markdown(message["text"])
 
-if prompt := st.chat_input("Hi, Nova"):
 
-    # 사용자 입력을 대화 내역에 추가
-    st.session_state["chat_history"].append({"role": "user", "text": prompt})
+    if prompt := st.chat_input("Hi, Nova"):
 
-    # 유지 대화 출력
-    with st.chat_message("user"):
-        st.markdown(prompt)
+        # 사용자 입력을 대화 내역에 추가
+        st.session_state["chat_history"].append({"role": "user", "text": prompt})
 
-    # 번역 요청 처리
-    if re.search(r"(?:다음을 번역해줘[:：]?\s*|번역[:：]?\s*)", prompt, re.DOTALL):  # 번역 요청 감지
-        # st.write("번역 요청 감지됨: extract_and_translate 함수 호출")
-        try:
-            translated_result = extract_and_translate(prompt)
-            st.session_state["chat_history"].append(
-                {"role": "ai", "text": translated_result.replace("<br>", "\n")})
-            with st.chat_message("ai"):
-                # st.markdown(f"[googletrans 사용]")
-                st.markdown(translated_result, unsafe_allow_html=True)
+        # 유지 대화 출력
+        with st.chat_message("user"):
+            st.markdown(prompt)
 
-        except Exception as e:
-            st.session_state["chat_history"].append({"role": "ai", "text": f"번역 중 오류 발생: {e}"})
-            with st.chat_message("ai"):
-                st.error(f"번역 중 오류 발생: {e}")
-    else:
-        # 일반 대화 처리
-        try:
-            response = model.start_chat().send_message(prompt)
-            st.session_state["chat_history"].append({"role": "ai", "text": f"{response.text}"})
-            with st.chat_message("ai"):
-                st.markdown(f"{response.text}")
-        except Exception as e:
-            st.session_state["chat_history"].append({"role": "ai", "text": f"에러 발생: {e}"})
-            with st.chat_message("ai"):
-                st.error(f"에러 발생: {e}")
+        # 번역 요청 처리
+        if re.search(r"(?:다음을 번역해줘[:：]?\s*|번역[:：]?\s*)", prompt, re.DOTALL):  # 번역 요청 감지
+            # st.write("번역 요청 감지됨: extract_and_translate 함수 호출")
+            try:
+                translated_result = extract_and_translate(prompt)
+                st.session_state["chat_history"].append(
+                    {"role": "ai", "text": translated_result.replace("<br>", "\n")})
+                with st.chat_message("ai"):
+                    # st.markdown(f"[googletrans 사용]")
+                    st.markdown(translated_result, unsafe_allow_html=True)
+
+            except Exception as e:
+                st.session_state["chat_history"].append({"role": "ai", "text": f"번역 중 오류 발생: {e}"})
+                with st.chat_message("ai"):
+                    st.error(f"번역 중 오류 발생: {e}")
+        else:
+            # 일반 대화 처리
+            try:
+                response = model.start_chat().send_message(prompt)
+                st.session_state["chat_history"].append({"role": "ai", "text": f"{response.text}"})
+                with st.chat_message("ai"):
+                    st.markdown(f"{response.text}")
+            except Exception as e:
+                st.session_state["chat_history"].append({"role": "ai", "text": f"에러 발생: {e}"})
+                with st.chat_message("ai"):
+                    st.error(f"에러 발생: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,15 @@
-import os, base64
+import os, re, time, threading
 from dotenv import load_dotenv
-import google.generativeai as genai
-from google.cloud import vision
-from google.oauth2 import service_account
-from pdf2image import convert_from_path
-from nova_func import use_rag, extract_info
+from nova_func import use_rag, extract_info, embed_query, load_retrieval_backend
+from nova_pdf import get_page_count, render_thumbnail
+from nova_ocr_cache import OCRCache, file_sha256
+import nova_ocr
+from nova_jobs import JobQueue, JobQueueFull
+from nova_context import build_history, estimate_tokens, PROMPT_TOKEN_BUDGET
+from nova_response_cache import SemanticResponseCache
+from nova_router import route_query, RouterStats
+from nova_trace import trace, span, recent_traces, stage_totals, TRACE_ENABLED
+from nova_api import call_api, api_stats
 import streamlit as st
 
 # 환경 변수 로드
@@ -12,16 +17,35 @@ load_dotenv()
 gemeni_api_key = os.getenv('GOOGLE_API_KEY')
 vision_api_path = os.getenv('VISION_API_PATH')
 
+# PDF 처리 진행률 갱신 주기(초)
+JOB_POLL_INTERVAL = 1.0
+
+# Gemini 답변 스트리밍 여부
+STREAM_RESPONSE = os.getenv('NOVA_STREAM_RESPONSE', '1') == '1'
+
+# 프롬프트 크기 기록 개수
+PROMPT_STATS_SIZE = 20
+
+# 사이드바에 표시할 최근 trace 수
+TRACE_PANEL_SIZE = 5
+
+# 첫 화면 출력 후 Gemini / Vision 모듈과 벡터 DB를 백그라운드에서 미리 로드
+WARMUP = os.getenv('NOVA_WARMUP', '1') == '1'
+
 # Gemini 모델 로드
+# google.generativeai는 무거우므로 첫 질문 때 로드
 @st.cache_resource
 def load_model():
+    import google.generativeai as genai
     genai.configure(api_key=gemeni_api_key)
     model = genai.GenerativeModel('gemini-1.5-pro')
     return model
 
-# Cloud Vision 클라이언트 로드
+# Cloud Vision 클라이언트 로드 (첫 PDF 업로드 때 로드)
 @st.cache_resource
 def load_client():
+    from google.cloud import vision
+    from google.oauth2 import service_account
     try:
         credentials = service_account.Credentials.from_service_account_file(vision_api_path)
         client = vision.ImageAnnotatorClient(credentials=credentials)
@@ -29,55 +53,84 @@ def load_client():
     except Exception as e:
         st.error(f'Error in load_client(): {str(e)}')
         return None
+
+# OCR 결과 캐시 로드
+@st.cache_resource
+def load_ocr_cache():
+    return OCRCache()
+
+# 백그라운드 warmup (프로세스당 한 번)
+# 첫 질문 / 첫 업로드 전에 무거운 모듈 import와 벡터 DB 로드를 끝내 두어 첫 응답 지연을 줄임
+@st.cache_resource
+def start_warmup():
+    def warmup():
+        start_time = time.perf_counter()
+        try:
+            import google.generativeai, google.cloud.vision, google.oauth2.service_account
+            load_retrieval_backend()
+            print(f'warmup 완료: {time.perf_counter() - start_time:.2f}초')
+        except Exception as e:
+            print(f'warmup 실패: {e}')
+
+    thread = threading.Thread(target=warmup, name='nova-warmup', daemon=True)
+    thread.start()
+    return thread
+
+# 질의 라우팅 통계 로드 (모든 세션이 공유)
+@st.cache_resource
+def load_router_stats():
+    return RouterStats()
+
+# 응답 캐시 로드 (모든 세션이 공유)
+@st.cache_resource
+def load_response_cache():
+    return SemanticResponseCache()
     
 
 ### OCR ###
-# 텍스트 추출 (image)
-def detect_text_from_image(image_path, client):
-    try:
-        with open(image_path, 'rb') as image_file:
-            content = image_file.read()
-        
-        image = vision.Image(content=content)
-        response = client.text_detection(image=image)
-        texts = response.text_annotations
+# 페이지별 OCR 오류 출력
+def display_page_errors(errors):
+    for i, message in sorted(errors):
+        st.error(f'Error in ocr_page(): page {i+1}: {message}')
 
-        # st.write(texts[0].description)
-        return texts[0].description
+# 텍스트 추출 (pdf, 화면 스레드에서 바로 처리)
+def detect_text_from_pdf(input_path, client):
+    try:
+        errors = []
+        text = nova_ocr.detect_text_from_pdf(input_path, client, errors=errors)
+        display_page_errors(errors)
+        return text
     except Exception as e:
-        st.error(f'Error in detect_text_from_image(): {str(e)}')
+        st.error(f'Error in detect_text_from_pdf(): {str(e)}')
         return None
 
-# 텍스트 추출 (pdf)
-def detect_text_from_pdf(input_path, save_path, client):
+# 텍스트 추출 (pdf, 캐시 사용, 화면 스레드에서 바로 처리)
+def extract_text_from_pdf(input_path, client):
     try:
-        pages = convert_from_path(input_path)
-        all_text = ''
-        for i, page in enumerate(pages):
-            image_path = f'{save_path}/{str(i)}.jpg'
-            page.save(image_path, 'JPEG')
-        
-            text = detect_text_from_image(image_path, client)
-            all_text += f'\n\n--- Page {i+1} ---\n\n{text}'
-        
-        return all_text
+        errors = []
+        text = nova_ocr.extract_text_from_pdf(input_path, client, load_ocr_cache(), errors=errors)
+        display_page_errors(errors)
+        return text
     except Exception as e:
-        st.error(f'Error in detect_text_from_pdf(): {str(e)}')
+        st.error(f'Error in extract_text_from_pdf(): {str(e)}')
         return None
 
-# 업로드된 pdf 파일 처리
-def process_pdf(uploaded_file, pdf_save_dir, jpg_save_dir, client):
+# 업로드된 pdf 파일 저장
+def save_uploaded_pdf(uploaded_file, pdf_save_dir):
+    pdf_path = os.path.join(pdf_save_dir, uploaded_file.name)
+    with open(pdf_path, 'wb') as f:
+        f.write(uploaded_file.read())
+    return pdf_path
+
+# 업로드된 pdf 파일 처리 (화면 스레드에서 끝날 때까지 대기)
+def process_pdf(uploaded_file, pdf_save_dir, client):
     try:
         # pdf 파일 저장
-        pdf_path = os.path.join(pdf_save_dir, uploaded_file.name)
-        with open(pdf_path, 'wb') as f:
-                f.write(uploaded_file.read())
+        pdf_path = save_uploaded_pdf(uploaded_file, pdf_save_dir)
         
         # 텍스트 추출
         with st.spinner('텍스트 추출 중...'):
-            jpg_dir = os.path.join(jpg_save_dir, uploaded_file.name)
-            os.makedirs(jpg_dir, exist_ok=True)
-            extracted_text = detect_text_from_pdf(pdf_path, jpg_dir, client)
+            extracted_text = extract_text_from_pdf(pdf_path, client)
         
         return pdf_path, extracted_text
     
@@ -85,20 +138,118 @@ def process_pdf(uploaded_file, pdf_save_dir, jpg_save_dir, client):
         st.error(f'Error in process_pdf(): {str(e)}')
         return None, None
 
+### PDF 백그라운드 처리 ###
+# 백그라운드 작업 대기열 로드 (모든 세션이 공유)
+@st.cache_resource
+def load_job_queue():
+    return JobQueue()
+
+# PDF 처리 작업 (백그라운드 스레드에서 실행, st 호출 금지)
+# 텍스트 추출 -> 논문 정보 추출, 페이지 단위로 진행률 보고 및 취소 확인
+def run_pdf_job(job, pdf_path, client, ocr_cache):
+    with trace('pdf_upload', file_bytes=os.path.getsize(pdf_path)):
+        progress = lambda done, total: job.report(done, total, '텍스트 추출 중')
+        extracted_text = nova_ocr.extract_text_from_pdf(pdf_path, client, ocr_cache, progress, job.cancel_event, job.errors)
+        job.report(job.total, job.total, '논문 정보 추출 중')
+        with span('extract_info', chars=len(extracted_text)):
+            title, abstract, conclusion = extract_info(extracted_text)
+    return {
+        'pdf_path': pdf_path,
+        'text': extracted_text,
+        'digest': file_sha256(pdf_path),
+        'title': title,
+        'abstract': abstract,
+        'conclusion': conclusion,
+    }
+
+# 업로드된 PDF를 백그라운드 작업으로 등록 (이전 파일의 작업은 취소)
+def submit_pdf_job(uploaded_file, pdf_save_dir):
+    previous = st.session_state.get('pdf_job')
+    if previous is not None:
+        previous.cancel()
+        st.session_state.pdf_job = None
+
+    try:
+        pdf_path = save_uploaded_pdf(uploaded_file, pdf_save_dir)
+        client = load_client()
+        st.session_state.pdf_job = load_job_queue().submit(uploaded_file.name, run_pdf_job, pdf_path, client, load_ocr_cache())
+    except JobQueueFull as e:
+        st.error(f'{str(e)} 잠시 후 다시 업로드해 주세요.')
+    except Exception as e:
+        st.error(f'Error in submit_pdf_job(): {str(e)}')
+
+# PDF 처리 진행률 (이 부분만 주기적으로 다시 실행, 처리 중에도 채팅 가능)
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def display_pdf_job():
+    job = st.session_state.get('pdf_job')
+    if job is None:
+        return
+    if job.finished:
+        st.rerun()  # 결과를 채팅 / 미리보기에 반영
+    text = f'{job.name} · {job.stage}'
+    if job.total:
+        text += f' ({job.done}/{job.total} 페이지)'
+    st.progress(job.progress(), text=text)
+    if st.button('처리 취소', key=f'cancel_{job.id}'):
+        job.cancel()
+
+# 끝난 PDF 처리 작업 결과 반영
+def finish_pdf_job(job):
+    st.session_state.pdf_job = None
+    if job.state == 'done':
+        result = job.result
+        display_page_errors(job.errors)
+        add_pdf_to_chat(job.name, result['title'], result['abstract'], result['conclusion'])
+        st.session_state.current_pdf_digest = result['digest']
+        st.session_state.current_pdf_text = result['text']
+    elif job.state == 'failed':
+        st.error(f'Error in process_pdf(): {job.error}')
+    else:
+        st.info(f'{job.name} 처리를 취소했습니다.')
+
+# 파일 버전 (수정 시각, 크기) - 같은 이름으로 다시 업로드된 파일의 캐시 구분용
+def file_version(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+# 페이지 수 (파일 버전별 캐시)
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_page_count(pdf_path, version):
+    return get_page_count(pdf_path)
+
+# 페이지 썸네일 (보는 페이지만 렌더링, 파일 버전 + 페이지별 캐시)
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_thumbnail(pdf_path, version, page_number):
+    return render_thumbnail(pdf_path, page_number)
+
+# join_pages로 결합한 텍스트 -> 페이지별 텍스트
+def split_pages(extracted_text):
+    parts = re.split(r'\n\n--- Page \d+ ---\n\n', extracted_text)
+    return parts[1:] if len(parts) > 1 else [extracted_text]
+
 # 업로드된 pdf 처리 결과 출력
+# 전체 PDF를 base64로 iframe에 넣는 대신 선택한 페이지의 썸네일과 해당 페이지 텍스트만 전송
 def display_pdf(pdf_path, extracted_text):
+    page_texts = split_pages(extracted_text)
+    try:
+        page_count = load_page_count(pdf_path, file_version(pdf_path))
+    except Exception as e:
+        st.error(f'Error in display_pdf(): {str(e)}')
+        page_count = len(page_texts)
+    page_number = st.number_input('페이지', min_value=1, max_value=max(page_count, 1), value=1, step=1, key=f'preview_page_{pdf_path}')
+
     col1, col2 = st.columns([1, 1], gap='large')
     
-    with col1: # 추출된 텍스트 출력
-        st.text_area('OCR 결과', extracted_text, height=400)
+    with col1: # 추출된 텍스트 출력 (선택한 페이지만)
+        page_text = page_texts[page_number - 1] if page_number <= len(page_texts) else ''
+        st.text_area(f'OCR 결과 ({page_number}/{page_count} 페이지)', page_text, height=400)
     
-    with col2: # 업로드된 pdf 출력
-        with open(pdf_path, 'rb') as f:
-            pdf_bytes = f.read()
-        base64_pdf = base64.b64encode(pdf_bytes).decode('utf-8')
-        pdf_display = f'<iframe src="data:application/pdf;base64,{base64_pdf}" width="100%" height=400 type="application/pdf"></iframe>'
+    with col2: # 업로드된 pdf 출력 (선택한 페이지 썸네일)
         st.write('업로드 된 논문 파일')
-        st.markdown(pdf_display, unsafe_allow_html=True)
+        try:
+            st.image(load_thumbnail(pdf_path, file_version(pdf_path), page_number), width='stretch')
+        except Exception as e:
+            st.error(f'Error in display_pdf(): {str(e)}')
 
 # 채팅 내역에 pdf 처리 결과 추가
 def add_pdf_to_chat(filename, title, abstract, conclusion):
@@ -117,12 +268,18 @@ def add_pdf_to_chat(filename, title, abstract, conclusion):
 {conclusion}
 '''
     
-    st.session_state.messages.append({'role': 'assistant', 'content': system_message})
+    # 프롬프트에는 전체 내용 대신 digest로 참조하도록 논문 정보도 함께 저장
+    pdf = {'filename': filename, 'title': title, 'abstract': abstract, 'conclusion': conclusion}
+    st.session_state.messages.append({'role': 'assistant', 'content': system_message, 'pdf': pdf})
 
-def generate_combined_prompt(rag_response, user_query, chat_history):
+# 대화 요약 함수 (Gemini 사용, 같은 요약 요청이 진행 중이면 그 결과를 기다림)
+def make_summarizer(model):
+    if model is None:
+        return None
+    return lambda summary_prompt: call_api('gemini', summary_prompt, model.generate_content, summary_prompt).text
+
+def generate_combined_prompt(rag_response, user_query, chat_history, model=None):
 
-    # 대화 히스토리 포맷팅
-    formatted_history = '\n'.join([f'{"User" if msg["role"]=="user" else "Assistant"}: {msg["content"]}' for msg in chat_history[:-1]])
     if rag_response:
         # RAG에서 찾은 정보가 있으면 논문 정보를 포함한 프롬프트 생성
         combined_rag_response = f"""
@@ -134,6 +291,28 @@ def generate_combined_prompt(rag_response, user_query, chat_history):
         # RAG 응답이 없으면 빈 문자열
         combined_rag_response = ""
 
+    # 대화 히스토리 포맷팅 (질문 / RAG 정보를 제외한 나머지 토큰 예산 안에서 최근 대화 우선)
+    fixed_tokens = estimate_tokens(render_prompt('', user_query, combined_rag_response))
+    if 'summary_cache' not in st.session_state:
+        st.session_state.summary_cache = {}
+    formatted_history, stats = build_history(
+        chat_history[:-1],
+        max(0, PROMPT_TOKEN_BUDGET - fixed_tokens),
+        st.session_state.summary_cache,
+        make_summarizer(model),
+    )
+
+    final_prompt = render_prompt(formatted_history, user_query, combined_rag_response)
+
+    # 프롬프트 크기 기록
+    stats['prompt_tokens'] = estimate_tokens(final_prompt)
+    stats['saved_tokens'] = stats['history_tokens_raw'] - stats['history_tokens']
+    st.session_state.prompt_stats = st.session_state.get('prompt_stats', [])[-(PROMPT_STATS_SIZE - 1):] + [stats]
+
+    return final_prompt
+
+# 프롬프트 생성
+def render_prompt(formatted_history, user_query, combined_rag_response):
     # 이전 대화 내용과 현재 질문을 결합
     context_prompt = f"""
     이전 대화 내용:
@@ -155,27 +334,101 @@ def generate_combined_prompt(rag_response, user_query, chat_history):
     """
     
     return final_prompt
+
+# 프롬프트 크기 출력 (사이드 바)
+def display_prompt_stats():
+    prompt_stats = st.session_state.get('prompt_stats', [])
+    if not prompt_stats:
+        return
+    with st.sidebar.expander('프롬프트 크기'):
+        last = prompt_stats[-1]
+        st.write(f"최근 프롬프트: 약 {last['prompt_tokens']} 토큰 (예산 {PROMPT_TOKEN_BUDGET})")
+        st.write(f"대화 히스토리: {last['history_tokens_raw']} → {last['history_tokens']} 토큰, 요약된 메시지 {last['summarized_messages']}개")
+        st.write(f"절약한 토큰 (최근 {len(prompt_stats)}턴): {sum(stats['saved_tokens'] for stats in prompt_stats)}")
+        st.line_chart([stats['prompt_tokens'] for stats in prompt_stats])
+
+# 논문 검색 필터 (사이드바, 벡터 검색 단계에서 적용)
+def display_search_filters():
+    with st.sidebar.expander('논문 검색 필터'):
+        use_year = st.checkbox('발행 연도로 제한')
+        year_from, year_to = st.slider('발행 연도', 1990, time.localtime().tm_year, (2015, time.localtime().tm_year), disabled=not use_year)
+        author = st.text_input('저자 이름 포함')
+
+    filters = {}
+    if use_year:
+        filters['year_from'], filters['year_to'] = year_from, year_to
+    if author.strip():
+        filters['author'] = author.strip()
+    return filters
+
+# 단계별 처리 시간 (사이드바, 최근 채팅 턴 / PDF 업로드)
+def display_trace_panel():
+    with st.sidebar.expander('단계별 처리 시간'):
+        if not TRACE_ENABLED:
+            st.caption('추적이 꺼져 있습니다. (NOVA_TRACE=1 로 켜기)')
+            return
+        records = recent_traces(limit=TRACE_PANEL_SIZE)
+        if not records:
+            st.caption('기록된 요청이 없습니다.')
+        for record in records:
+            st.write(f"**{record['kind']}** · {record['ms']:.0f}ms · {time.strftime('%H:%M:%S', time.localtime(record['ts']))}")
+            st.dataframe(
+                [{'단계': name, '횟수': total['count'], 'ms': total['ms']} for name, total in stage_totals(record).items()],
+                hide_index=True,
+            )
+
 ### Chatbot ###
+# 스트리밍 응답 수신 (청크가 도착할 때마다 화면에 출력)
+# (전체 텍스트, 첫 토큰까지 걸린 시간)을 반환
+def stream_response(response, placeholder, start_time):
+    chunks = []
+    first_token_time = None
+    for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:  # 텍스트가 없는 청크 (종료 / 안전 필터 정보)
+            continue
+        if first_token_time is None:
+            first_token_time = time.perf_counter() - start_time
+        chunks.append(text)
+        placeholder.markdown(''.join(chunks) + '▌')
+    return ''.join(chunks), first_token_time
+
+# 찾은 논문 다운로드 버튼
+def display_paper_download(arxiv_id):
+    if arxiv_id:
+        # pdf_file_path 경로 설정
+        pdf_file_path = f"nova/papers/{arxiv_id}v1.pdf"  # 논문 PDF 파일 경로
+
+        # 파일이 존재하는 경우 다운로드 버튼 추가
+        if os.path.exists(pdf_file_path):
+            # 다운로드 버튼 생성
+            st.download_button(
+                label="📥 논문 다운로드",
+                data=open(pdf_file_path, "rb").read(),
+                file_name=f"{arxiv_id}v1.pdf",
+                mime="application/pdf"
+            )
+
 # gemini와 대화하기
-def chat_with_gemini(model, prompt,dict_response):
+# 답변은 함수 안에서 출력하고, 채팅 내역에 저장할 최종 답변을 반환
+# 호출은 nova_api를 거침 (호출 수 제한 / quota 초과 재시도, 스트리밍이 아니면 같은 프롬프트 요청을 합침)
+# 스트리밍은 첫 청크를 받을 때까지만 재시도됨 (generate_content 안에서 첫 청크를 받음), 출력 도중 오류는 재시도하지 않음
+def chat_with_gemini(model, prompt, dict_response, stream=STREAM_RESPONSE):
     try:
-        response = model.generate_content(prompt)
-        
-        if dict_response and ":stars:" in response.text:
-            arxiv_id = dict_response.get('arXiv_id', None)
-            if arxiv_id:
-                # pdf_file_path 경로 설정
-                pdf_file_path = f"nova/papers/{arxiv_id}v1.pdf"  # 논문 PDF 파일 경로
-                
-                # 파일이 존재하는 경우 다운로드 버튼 추가
-                if os.path.exists(pdf_file_path):
-                    # 다운로드 버튼 생성
-                    st.download_button(
-                        label="📥 논문 다운로드",
-                        data=open(pdf_file_path, "rb").read(),
-                        file_name=f"{arxiv_id}v1.pdf",
-                        mime="application/pdf"
-                    )
+        placeholder = st.empty()
+        start_time = time.perf_counter()
+        with span('generate', stream=stream, prompt_tokens=estimate_tokens(prompt)) as s:
+            if stream:
+                response = call_api('gemini', None, model.generate_content, prompt, stream=True)
+                response_text, first_token_time = stream_response(response, placeholder, start_time)
+            else:
+                response_text = call_api('gemini', prompt, model.generate_content, prompt).text
+                first_token_time = time.perf_counter() - start_time
+            s.set(response_tokens=estimate_tokens(response_text), first_token_ms=round((first_token_time or 0) * 1000, 2))
+        total_time = time.perf_counter() - start_time
+
+        if dict_response and ":stars:" in response_text:
             rag_info = f"""
             🔍 찾은 논문 🔍
 
@@ -184,16 +437,107 @@ def chat_with_gemini(model, prompt,dict_response):
         결론: {dict_response.get('Conclusion', '정보 없음')}
             """
             # 최종 답변에 논문 정보 포함
-            full_response = f"{response.text}\n\n{rag_info}"
-            return full_response
+            full_response = f"{response_text}\n\n{rag_info}"
+            placeholder.markdown(full_response)
+
+            display_paper_download(dict_response.get('arXiv_id', None))
         else:
-            return response.text       
+            full_response = response_text
+            placeholder.markdown(full_response)
+
+        # 응답 시간 표시
+        if first_token_time is not None:
+            st.caption(f'첫 토큰 {first_token_time:.2f}초 · 전체 {total_time:.2f}초')
+        return full_response
     except Exception as e:
         st.error(f'Error in chat_with_gemini(): {str(e)}')
         return None
 
+# RAG 검색 여부 수동 설정
+RAG_MODES = {'자동': None, '항상 검색': True, '검색 안 함': False}
+
+# 필요한 경우에만 RAG 검색 (라우터 판단 또는 사이드바 수동 설정)
+def retrieve_papers(prompt, chat_history, search_filters=None):
+    with span('route') as s:
+        retrieve = RAG_MODES[st.session_state.get('rag_mode', '자동')]
+        if retrieve is None:
+            retrieve, reason = route_query(prompt, chat_history)
+        else:
+            reason = 'manual'
+        s.set(retrieve=retrieve, reason=reason)
+
+    if not retrieve:
+        load_router_stats().record(False, reason)
+        return {}
+    start_time = time.perf_counter()
+    with span('rag'):
+        dict_response = use_rag(prompt, **(search_filters or {}))
+    load_router_stats().record(True, reason, time.perf_counter() - start_time)
+    return dict_response
+
+# 라우팅 통계 / 수동 설정 (사이드바)
+def display_router_stats():
+    with st.sidebar.expander('논문 검색(RAG) 라우팅'):
+        st.radio('RAG 검색', list(RAG_MODES), key='rag_mode', horizontal=True)
+        stats = load_router_stats().stats()
+        st.write(f"검색 {stats['retrieved']}회 · 생략 {stats['skipped']}회 ({stats['skip_rate']:.0%})")
+        st.write(f"평균 검색 시간: {stats['average_rag_seconds']:.2f}초 · 생략한 검색 추정 시간: 약 {stats['saved_seconds']:.1f}초")
+        if stats['reasons']:
+            st.write(stats['reasons'])
+
+# 응답 캐시 키 (질의 임베딩, 검색된 논문 ID, 업로드 PDF digest)
+# 세션에서 캐시를 끈 경우, RAG 검색이 실패한 경우, 논문 ID와 PDF digest가 모두 없는 경우 None
+# RAG 검색을 생략한 업로드 PDF 후속 질문은 PDF digest만으로 캐시 범위를 정함 (임베딩 캐시를 거쳐 질의 임베딩)
+def response_cache_key(prompt, dict_response):
+    if st.session_state.get('bypass_response_cache') or not isinstance(dict_response, dict):
+        return None
+    paper_id, pdf_digest = dict_response.get('arXiv_id'), st.session_state.get('current_pdf_digest')
+    if not paper_id and not pdf_digest:
+        return None  # 논문 / PDF 없이 대화 맥락에만 의존하는 질문은 캐시하지 않음
+    try:
+        vector = embed_query(prompt)  # RAG 검색을 했다면 임베딩 캐시에 저장된 값 (추가 API 호출 없음)
+    except Exception as e:
+        print(f'응답 캐시 키 생성 실패: {e}')
+        return None
+    return vector, paper_id, pdf_digest
+
+# 캐시된 답변 출력 (Gemini 호출 생략), 캐시에 없으면 None
+def get_cached_response(cache_key, dict_response):
+    if cache_key is None:
+        return None
+    vector, paper_id, pdf_digest = cache_key
+    with span('response_cache') as s:
+        response = load_response_cache().get(vector, paper_id, pdf_digest)
+        s.set(cache_hit=response is not None)
+    if response is not None:
+        st.markdown(response)
+        if dict_response and '🔍 찾은 논문 🔍' in response:
+            display_paper_download(dict_response.get('arXiv_id', None))
+        st.caption('비슷한 질문의 답변을 재사용했습니다.')
+    return response
+
+# 응답 캐시 통계 / 세션별 캐시 끄기 (사이드바)
+def display_response_cache_stats():
+    with st.sidebar.expander('응답 캐시'):
+        st.checkbox('이 세션에서 응답 캐시 사용 안 함', key='bypass_response_cache')
+        stats = load_response_cache().stats()
+        st.write(f"저장된 답변: {stats['size']}/{stats['maxsize']}")
+        st.write(f"적중률: {stats['hit_rate']:.0%} ({stats['hits']}/{stats['hits'] + stats['misses']})")
+        st.write(f"절약한 시간: {stats['saved_seconds']:.1f}초 · 절약한 토큰: 약 {stats['saved_tokens']}")
+
+# Google API 호출 통계 (사이드바, 모든 세션 합계)
+def display_api_stats():
+    with st.sidebar.expander('API 호출'):
+        stats = api_stats()
+        if not stats:
+            st.write('아직 호출하지 않았습니다.')
+        for name, stat in stats.items():
+            st.write(f"**{name}** · 요청 {stat['requests']}회 · 합친 요청 {stat['coalesced']}회 · 진행 중 {stat['in_flight']}")
+            st.write(f"대기 {stat['throttled']}회 ({stat['throttle_rate']:.0%}) · p50 {stat['wait_p50']:.2f}초 · p95 {stat['wait_p95']:.2f}초 · 최대 {stat['wait_max']:.2f}초")
+            st.write(f"quota 초과 {stat['quota_errors']}회 · 재시도 {stat['retries']}회 · 실패 {stat['failures']}회")
+
 # 채팅 출력
-def display_chat(model):
+def display_chat(search_filters=None):
     # 세션 상태 초기화
     if 'messages' not in st.session_state:
         st.session_state.messages = []
@@ -219,11 +563,24 @@ def display_chat(model):
             st.markdown(prompt)
         
         # gemini 응답
-        with st.chat_message('assistant',avatar="🧙‍♂️"):
-            dict_response = use_rag(prompt)
-            final_prompt = generate_combined_prompt(dict_response, prompt, st.session_state.messages)
-            response = chat_with_gemini(model, final_prompt,dict_response) 
-            st.markdown(response)
+        with st.chat_message('assistant',avatar="🧙‍♂️"), trace('chat_turn', query_chars=len(prompt)):
+            model = load_model()
+            dict_response = retrieve_papers(prompt, st.session_state.messages, search_filters)
+            cache_key = response_cache_key(prompt, dict_response)
+            response = get_cached_response(cache_key, dict_response)
+            if response is None:
+                with span('prompt_build') as s:
+                    final_prompt = generate_combined_prompt(dict_response, prompt, st.session_state.messages, model)
+                    s.set(tokens=estimate_tokens(final_prompt))
+                start_time = time.perf_counter()
+                response = chat_with_gemini(model, final_prompt, dict_response)
+                if response is not None and cache_key is not None:
+                    vector, paper_id, pdf_digest = cache_key
+                    load_response_cache().set(
+                        vector, response, paper_id, pdf_digest,
+                        seconds=time.perf_counter() - start_time,
+                        tokens=estimate_tokens(final_prompt) + estimate_tokens(response),
+                    )
             st.session_state.messages.append({'role': 'assistant', 'content': response})
 
 ### UI_Streamlit ###
@@ -234,41 +591,57 @@ def main():
         layout='wide')
     st.title('NOVA와 대화하기')
 
-    # 모델과 클라이언트 로드
-    model = load_model()
-    client = load_client()
-    
     ## OCR 섹션 ##
     # 사이드 바 (파일 업로드)
     st.sidebar.header('논문 파일 업로드')
     uploaded_file = st.sidebar.file_uploader('논문 파일(PDF)을 업로드하세요.', type=['pdf'])
 
     # 저장 디렉토리 설정
-    # pdf_save_dir, jpg_save dir 경로 설정 필요
+    # pdf_save_dir 경로 설정 필요
     pdf_save_dir = 'nova/input_pdf'
-    jpg_save_dir = 'nova/input_pdf/save_jpg'
     os.makedirs(pdf_save_dir, exist_ok=True)
 
-    # 새로운 PDF 파일이 업로드된 경우
+    # 새로운 PDF 파일이 업로드된 경우 (백그라운드에서 처리, 이전 파일 작업은 취소)
     if uploaded_file is not None and uploaded_file.name!=st.session_state.current_pdf:
-        pdf_path, extracted_text = process_pdf(uploaded_file, pdf_save_dir, jpg_save_dir, client)
-        title, abstract, conclusion = extract_info(extracted_text)
+        st.session_state.current_pdf = uploaded_file.name
+        st.session_state.current_pdf_digest = None
+        st.session_state.current_pdf_text = None
+        submit_pdf_job(uploaded_file, pdf_save_dir)
+
+    # 파일을 지운 경우 처리 중인 작업 취소
+    elif uploaded_file is None and st.session_state.get('current_pdf') is not None:
+        if st.session_state.get('pdf_job') is not None:
+            st.session_state.pdf_job.cancel()
+        st.session_state.current_pdf = None
+        st.session_state.current_pdf_digest = None
+        st.session_state.current_pdf_text = None
 
-        if pdf_path and extracted_text:
-            display_pdf(pdf_path, extracted_text)
-            add_pdf_to_chat(uploaded_file.name, title, abstract, conclusion)
-            st.session_state.current_pdf = uploaded_file.name
+    # 처리 중이면 진행률 표시, 끝났으면 결과 반영
+    job = st.session_state.get('pdf_job')
+    if job is not None and job.finished:
+        finish_pdf_job(job)
+    elif job is not None:
+        display_pdf_job()
     
-    # 이전에 업로드된 PDF 파일 다시 표시
-    elif uploaded_file is not None:
-        pdf_path = os.path.join(pdf_save_dir, uploaded_file.name)
-        extracted_text = detect_text_from_pdf(pdf_path, os.path.join(jpg_save_dir, uploaded_file.name), client)
-        display_pdf(pdf_path, extracted_text)
+    # 처리된 PDF 파일 표시 (백그라운드 작업에서 추출한 텍스트 재사용)
+    extracted_text = st.session_state.get('current_pdf_text')
+    if uploaded_file is not None and st.session_state.get('pdf_job') is None and extracted_text:
+        display_pdf(os.path.join(pdf_save_dir, uploaded_file.name), extracted_text)
     
     st.markdown('---')
 
     ## 챗봇 섹션 ##
-    display_chat(model)
+    search_filters = display_search_filters()
+    display_chat(search_filters)
+    display_prompt_stats()
+    display_response_cache_stats()
+    display_router_stats()
+    display_api_stats()
+    display_trace_panel()
+
+    # 화면을 모두 그린 뒤 warmup 시작
+    if WARMUP:
+        start_warmup()
 
 if __name__=='__main__':
     main()
\ No newline at end of file
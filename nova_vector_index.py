@@ -0,0 +1,239 @@
+import os, json, time, mmap, uuid, shutil, threading
+import numpy as np
+
+# 메모리 매핑 벡터 인덱스 (Chroma 대신 사용할 수 있는 로컬 검색 backend)
+# 인덱싱 스크립트가 임베딩을 정규화된 행렬(.npy)과 논문 정보 파일로 내보내면(snapshot), 검색 프로세스는 np.load(mmap_mode='r')로 연다
+#   - 시작 시 DB를 열지 않고 파일만 매핑하며, 같은 snapshot을 여는 여러 프로세스는 OS 페이지 캐시를 공유
+#   - 코사인 유사도 top-k / MMR을 numpy 행렬 연산으로 한 번에 계산
+#   - CURRENT 파일이 가리키는 snapshot을 사용하고, 새 snapshot이 게시되면 다음 검색 때 교체 (hot reload)
+# snapshot 폴더 구성: vectors.npy (N x D), years.npy (N, 연도 없음 = 0), papers.jsonl + offsets.npy (N + 1), authors.txt, meta.json
+
+# vector_index_dir 경로 설정 필요
+VECTOR_INDEX_DIR = os.getenv('NOVA_VECTOR_INDEX_DIR', 'nova/vector_index')
+VECTOR_INDEX_DTYPE = os.getenv('NOVA_VECTOR_INDEX_DTYPE', 'float32')  # float16이면 메모리 절반, 대신 float32 변환 비용으로 검색이 수 배 느림
+VECTOR_INDEX_RELOAD = float(os.getenv('NOVA_VECTOR_INDEX_RELOAD', 10))  # CURRENT 확인 주기(초)
+VECTOR_INDEX_KEEP = 3  # 보관할 snapshot 수 (이전 snapshot을 열고 있는 프로세스가 있을 수 있으므로 바로 지우지 않음)
+MMR_LAMBDA = 0.5  # MMR 관련도 / 다양성 비율 (LangChain 기본값과 같음)
+SCORE_BLOCK_ROWS = 2048  # float16 행렬을 float32로 바꿔 계산할 때 한 번에 처리할 행 수 (CPU 캐시에 들어가는 크기)
+CURRENT_FILE = 'CURRENT'
+
+# 행 단위 L2 정규화 (코사인 유사도 = 내적)
+def normalize_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+# 저자 필터 비교용 정규화 (공백 정리 + 소문자, Chroma 검색도 같은 기준 사용)
+def normalize_authors(text):
+    return ' '.join(str(text or '').split()).lower()
+
+# 파일을 임시 이름으로 쓴 뒤 교체 (읽는 쪽이 절반만 쓰인 파일을 보지 않도록)
+def write_atomic(path, content):
+    tmp_path = f'{path}.{uuid.uuid4().hex[:6]}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+# 현재 snapshot 이름 (없으면 None)
+def read_current(index_dir):
+    try:
+        with open(os.path.join(index_dir, CURRENT_FILE), 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+# snapshot 게시
+# papers는 검색 결과로 돌려줄 논문 정보 dict (Title / Year / Authors / Abstract / Conclusion / arXiv_id) 목록, vectors와 같은 순서
+def publish_snapshot(index_dir, vectors, papers, dtype=VECTOR_INDEX_DTYPE, meta=None, keep=VECTOR_INDEX_KEEP):
+    vectors = normalize_rows(vectors).astype(dtype)
+    if len(vectors) != len(papers):
+        raise ValueError(f'벡터 수({len(vectors)})와 논문 수({len(papers)})가 다릅니다.')
+
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    path = os.path.join(index_dir, name)
+    os.makedirs(path)
+    np.save(os.path.join(path, 'vectors.npy'), vectors)
+    np.save(os.path.join(path, 'years.npy'), np.array([int(paper.get('Year') or 0) for paper in papers], dtype=np.int32))
+
+    # 논문 정보는 검색 결과 행만 읽도록 줄 단위 JSON + 시작 위치 표
+    offsets = [0]
+    with open(os.path.join(path, 'papers.jsonl'), 'wb') as f:
+        for paper in papers:
+            line = (json.dumps(paper, ensure_ascii=False) + '\n').encode('utf-8')
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+    np.save(os.path.join(path, 'offsets.npy'), np.array(offsets, dtype=np.int64))
+    with open(os.path.join(path, 'authors.txt'), 'w', encoding='utf-8') as f:
+        f.writelines(normalize_authors(paper.get('Authors')) + '\n' for paper in papers)
+
+    meta = dict(meta or {}, count=len(papers), dim=int(vectors.shape[1]) if len(vectors) else 0, dtype=str(vectors.dtype), created=time.time())
+    with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    write_atomic(os.path.join(index_dir, CURRENT_FILE), name)
+    prune_snapshots(index_dir, keep)
+    return name
+
+# 오래된 snapshot 삭제 (다른 프로세스가 열고 있어 지울 수 없으면 다음에 다시 시도)
+def prune_snapshots(index_dir, keep=VECTOR_INDEX_KEEP):
+    current = read_current(index_dir)
+    paths = [os.path.join(index_dir, name, 'meta.json') for name in os.listdir(index_dir)]
+    names = [os.path.basename(os.path.dirname(path)) for path in sorted((path for path in paths if os.path.isfile(path)), key=os.path.getmtime)]
+    for name in names[:-keep] if keep else names:
+        if name != current:
+            shutil.rmtree(os.path.join(index_dir, name), ignore_errors=True)
+
+# snapshot 하나 (읽기 전용, 여러 스레드에서 동시에 검색 가능)
+class VectorSnapshot:
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.vectors = np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r')
+        self.years = np.load(os.path.join(path, 'years.npy'), mmap_mode='r')
+        self.offsets = np.load(os.path.join(path, 'offsets.npy'), mmap_mode='r')
+        with open(os.path.join(path, 'papers.jsonl'), 'rb') as f:
+            self._papers = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.offsets[-1] else b''
+        self._authors = None
+        self._authors_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.vectors)
+
+    # 논문 정보 (i번째 행)
+    def paper(self, i):
+        return json.loads(self._papers[int(self.offsets[i]):int(self.offsets[i + 1])])
+
+    # 저자 목록 (저자 필터를 처음 사용할 때 로드)
+    def authors(self):
+        if self._authors is None:
+            with self._authors_lock:
+                if self._authors is None:
+                    with open(os.path.join(self.path, 'authors.txt'), 'r', encoding='utf-8') as f:
+                        self._authors = f.read().split('\n')[:len(self)]
+        return self._authors
+
+    # 필터 조건에 맞는 행 번호 (조건이 없으면 None = 전체)
+    # 연도는 벡터 연산, 저자는 대소문자 구분 없는 부분 일치
+    def candidates(self, year=None, year_from=None, year_to=None, author=None):
+        mask = None
+        if year is not None or year_from is not None or year_to is not None:
+            years = np.asarray(self.years)
+            mask = np.ones(len(years), dtype=bool)
+            if year is not None:
+                mask &= years == int(year)
+            if year_from is not None:
+                mask &= years >= int(year_from)
+            if year_to is not None:
+                mask &= years <= int(year_to)
+        author = normalize_authors(author)
+        if author:
+            author_mask = np.fromiter((author in authors for authors in self.authors()), dtype=bool, count=len(self))
+            mask = author_mask if mask is None else mask & author_mask
+        return None if mask is None else np.flatnonzero(mask)
+
+    # 코사인 유사도 (float16 행렬은 블록 단위로 같은 float32 버퍼에 복사해 계산)
+    def scores(self, query, rows=None):
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        if vectors.dtype == np.float32:
+            return vectors @ query
+        scores = np.empty(len(vectors), dtype=np.float32)
+        buffer = np.empty((min(SCORE_BLOCK_ROWS, len(vectors)), vectors.shape[1]), dtype=np.float32)
+        for start in range(0, len(vectors), SCORE_BLOCK_ROWS):
+            block = vectors[start:start + SCORE_BLOCK_ROWS]
+            np.copyto(buffer[:len(block)], block)
+            np.dot(buffer[:len(block)], query, out=scores[start:start + len(block)])
+        return scores
+
+    # 유사도 상위 k개 [(행 번호, 유사도)], 높은 순
+    def top_k(self, query, k, rows=None):
+        query = normalize_rows(np.asarray(query, dtype=np.float32)[None, :])[0]
+        if rows is not None and len(rows) == 0:
+            return []
+        scores = self.scores(query, rows)
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        indices = top if rows is None else rows[top]
+        return list(zip(indices.tolist(), scores[top].tolist()))
+
+    # 검색 (필터 적용 후 유사도 상위 k개 논문, Score = 코사인 유사도)
+    def search(self, query, k, **filters):
+        return [dict(self.paper(i), Score=score) for i, score in self.top_k(query, k, self.candidates(**filters))]
+
+    # MMR 검색 (유사도 상위 fetch_k개 중에서 관련도와 다양성을 함께 고려해 k개 선택)
+    # 후보끼리의 유사도 행렬을 한 번만 계산하고, 선택할 때마다 "이미 고른 논문과의 최대 유사도"만 벡터로 갱신
+    def mmr(self, query, k, fetch_k, lambda_mult=MMR_LAMBDA, **filters):
+        fetched = self.top_k(query, max(k, fetch_k), self.candidates(**filters))
+        if not fetched:
+            return []
+        indices = np.array([i for i, _ in fetched])
+        relevance = np.array([score for _, score in fetched], dtype=np.float32)
+        candidates = np.asarray(self.vectors[indices], dtype=np.float32)
+        similarity = candidates @ candidates.T
+
+        selected = [0]  # 가장 관련도 높은 후보부터 선택
+        redundancy = similarity[0].copy()
+        available = np.ones(len(indices), dtype=bool)
+        available[0] = False
+        while len(selected) < min(k, len(indices)):
+            objective = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * redundancy, -np.inf)
+            best = int(np.argmax(objective))
+            selected.append(best)
+            available[best] = False
+            np.maximum(redundancy, similarity[best], out=redundancy)
+        return [dict(self.paper(int(indices[i])), Score=float(relevance[i])) for i in selected]
+
+    def close(self):
+        if isinstance(self._papers, mmap.mmap):
+            self._papers.close()
+
+# 인덱스 (CURRENT가 가리키는 snapshot을 열고, 새 snapshot이 게시되면 교체)
+# 교체 중에도 이전 snapshot으로 진행 중인 검색은 그대로 끝남 (snapshot 객체를 지역 변수로 잡고 검색)
+class VectorIndex:
+    def __init__(self, index_dir=VECTOR_INDEX_DIR, reload_interval=VECTOR_INDEX_RELOAD):
+        self.index_dir = index_dir
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    # 현재 snapshot (게시된 snapshot이 없으면 None)
+    def snapshot(self):
+        now = time.monotonic()
+        if self._snapshot is None or now - self._checked_at >= self.reload_interval:
+            with self._lock:
+                if self._snapshot is None or now - self._checked_at >= self.reload_interval:
+                    self._checked_at = now
+                    name = read_current(self.index_dir)
+                    if name is not None and (self._snapshot is None or self._snapshot.name != name):
+                        try:
+                            self._snapshot = VectorSnapshot(os.path.join(self.index_dir, name))
+                            self.reloads += 1
+                            print(f'벡터 인덱스 로드: {name} ({len(self._snapshot)}건)')
+                        except (OSError, ValueError) as e:
+                            print(f'벡터 인덱스 로드 실패: {name} ({e})')
+        return self._snapshot
+
+    def search(self, query, k, **filters):
+        return self.snapshot().search(query, k, **filters)
+
+    def mmr(self, query, k, fetch_k, lambda_mult=MMR_LAMBDA, **filters):
+        return self.snapshot().mmr(query, k, fetch_k, lambda_mult, **filters)
+
+    def stats(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {'snapshot': None, 'count': 0, 'reloads': self.reloads}
+        return {
+            'snapshot': snapshot.name,
+            'count': len(snapshot),
+            'dim': snapshot.meta.get('dim'),
+            'dtype': snapshot.meta.get('dtype'),
+            'reloads': self.reloads,
+        }